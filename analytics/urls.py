@@ -1,8 +1,14 @@
 from django.urls import path
-from .views import ParkingStatusSummaryView, BookingStatsByTariffView, GenerateReportAPIView
+from .views import (ParkingStatusSummaryView,
+                    BookingStatsByTariffView,
+                    GenerateReportAPIView,
+                    TaskProfileListView,
+                    TaskProfileDownloadView)
 
 urlpatterns = [
     path('parking-status/', ParkingStatusSummaryView.as_view(), name='parking-status-summary'),
     path('booking-stats/', BookingStatsByTariffView.as_view(), name='booking-stats'),
     path('reports/generate/', GenerateReportAPIView.as_view(), name='generate-report'),
+    path('task-profiles/', TaskProfileListView.as_view(), name='task-profiles'),
+    path('task-profiles/<str:task_name>/<str:name>/', TaskProfileDownloadView.as_view(), name='task-profile-download'),
 ]
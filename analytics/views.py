@@ -1,4 +1,5 @@
-from django.http import HttpResponse
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, FileResponse
 from django.db import models
 from django.db.models import Count, Case, When
 from django.utils.timezone import now, timedelta
@@ -6,9 +7,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from api.permissions import IsAdminPermission
+from api.mixins import ReplicaReadMixin
 from parking_spots.models import ParkingSpot
 from bookings.models import Booking
 from analytics.report_generators import generate_xlsx_report
+from config.task_metrics import PROFILES_DIR
 from analytics.data_collectors import (
     collect_statistics,
     collect_bookings,
@@ -18,9 +21,10 @@ from analytics.data_collectors import (
 )
 
 
-class ParkingStatusSummaryView(APIView):
+class ParkingStatusSummaryView(ReplicaReadMixin, APIView):
     """
     Получение статистики по статусам мест администратором.
+    Запросы выполняются на реплике БД (если она настроена).
     """
     permission_classes = [IsAuthenticated, IsAdminPermission]
 
@@ -30,9 +34,10 @@ class ParkingStatusSummaryView(APIView):
         return Response(result)
 
 
-class BookingStatsByTariffView(APIView):
+class BookingStatsByTariffView(ReplicaReadMixin, APIView):
     """
     Получение статистики по бронированиям за день, неделю, месяц администратором.
+    Запросы выполняются на реплике БД (если она настроена).
     """
     permission_classes = [IsAuthenticated, IsAdminPermission]
 
@@ -66,11 +71,13 @@ class BookingStatsByTariffView(APIView):
         return Response(stats)
 
 
-class GenerateReportAPIView(APIView):
+class GenerateReportAPIView(ReplicaReadMixin, APIView):
     """
     Генерация отчетов администратором.
+    Отчёт только читает данные, поэтому формируется на реплике БД (если она настроена).
     """
     permission_classes = [IsAuthenticated, IsAdminPermission]
+    replica_methods = ('POST',)
 
     def post(self, request):
         start_date = request.data.get('start_date')
@@ -104,3 +111,53 @@ class GenerateReportAPIView(APIView):
         response = HttpResponse(file_data.getvalue(), content_type=file_type)
         response['Content-Disposition'] = f'attachment; filename="report.xlsx"'
         return response
+
+
+def _list_profiled_tasks():
+    if not default_storage.exists(PROFILES_DIR):
+        return []
+    directories, _ = default_storage.listdir(PROFILES_DIR)
+    return sorted(directories)
+
+
+def _list_profiles(task_name):
+    """
+    Возвращает имена сохранённых профилей задачи (новые первыми).
+    """
+    if task_name not in _list_profiled_tasks():
+        return []
+    _, files = default_storage.listdir(f'{PROFILES_DIR}/{task_name}')
+    return sorted(files, reverse=True)
+
+
+class TaskProfileListView(APIView):
+    """
+    Список сохранённых профилей медленных запусков задач Celery (см. config/task_metrics.py).
+    """
+    permission_classes = [IsAuthenticated, IsAdminPermission]
+
+    def get(self, request):
+        result = []
+        for task_name in _list_profiled_tasks():
+            for name in _list_profiles(task_name):
+                path = f'{PROFILES_DIR}/{task_name}/{name}'
+                result.append({
+                    "task": task_name,
+                    "name": name,
+                    "size": default_storage.size(path),
+                    "created_at": default_storage.get_modified_time(path),
+                })
+        return Response(result)
+
+
+class TaskProfileDownloadView(APIView):
+    """
+    Скачивание профиля запуска задачи Celery.
+    """
+    permission_classes = [IsAuthenticated, IsAdminPermission]
+
+    def get(self, request, task_name, name):
+        # Задача и имя проверяются по списку файлов, поэтому выйти за пределы каталога профилей нельзя
+        if name not in _list_profiles(task_name):
+            return Response({"error": "Профиль не найден"}, status=404)
+        return FileResponse(default_storage.open(f'{PROFILES_DIR}/{task_name}/{name}'), as_attachment=True, filename=name)
@@ -0,0 +1,62 @@
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework.exceptions import NotAuthenticated
+from .authentication import aauthenticate
+from .renderers import orjson_dumps
+
+
+def api_json_response(data, status=200):
+    """
+    Возвращает JSON-ответ в том же формате, что и JSONRenderer DRF
+    (компактный JSON без экранирования кириллицы). Сериализация выполняется через orjson.
+    """
+    return HttpResponse(orjson_dumps(data), status=status, content_type='application/json')
+
+
+def async_login_required(view):
+    """
+    Декоратор для асинхронных представлений: требует валидный JWT access-токен.
+
+    Аутентифицированный пользователь сохраняется в request.user.
+    При отсутствии или недействительности токена возвращается 401, как в DRF.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aauthenticate(request)
+        if user is None:
+            return api_json_response({"detail": str(NotAuthenticated.default_detail)}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_api_view(fallback_view, **handlers):
+    """
+    Собирает ASGI-нативное представление для горячих эндпоинтов.
+
+    Аргументы:
+        fallback_view: Синхронное DRF-представление (результат `.as_view()`),
+            которое обслуживает остальные HTTP-методы.
+        handlers: Асинхронные обработчики по именам методов (например, get=..., post=...).
+            Обработчик может вернуть None, чтобы передать запрос синхронному представлению.
+
+    Атрибуты `cls` и `initkwargs` копируются из DRF-представления,
+    поэтому эндпоинт по-прежнему попадает в Swagger-документацию.
+    """
+    fallback = sync_to_async(fallback_view)
+
+    async def view(request, *args, **kwargs):
+        handler = handlers.get(request.method.lower())
+        if handler is not None:
+            response = await handler(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await fallback(request, *args, **kwargs)
+
+    # csrf_exempt в Django 4.2 не поддерживает async-функции, поэтому флаг ставится вручную
+    view.csrf_exempt = True
+    view.cls = fallback_view.cls
+    view.initkwargs = fallback_view.initkwargs
+    return view
@@ -0,0 +1,45 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import CustomUser
+
+
+async def aget_user_by_token(raw_token):
+    """
+    Асинхронно возвращает пользователя по access-токену JWT.
+
+    Подпись и срок действия токена проверяются без обращения к БД,
+    пользователь загружается через асинхронный ORM.
+
+    Возвращает:
+        CustomUser | None: активный пользователь или None, если токен недействителен.
+    """
+    if not raw_token:
+        return None
+
+    try:
+        validated_token = JWTAuthentication().get_validated_token(raw_token)
+    except InvalidToken:
+        return None
+
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+
+    user = await CustomUser.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+async def aauthenticate(request):
+    """
+    Асинхронный аналог JWTAuthentication.authenticate для обычных (не DRF) представлений.
+
+    Токен берётся из заголовка `Authorization: Bearer <token>`.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    return await aget_user_by_token(authentication.get_raw_token(header))
@@ -0,0 +1,94 @@
+import hashlib
+import json
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+LOCK_TIMEOUT = 60  # секунд, на время обработки первого запроса
+
+
+def _request_fingerprint(request):
+    """
+    Возвращает отпечаток тела запроса, чтобы отличать повтор от другого запроса с тем же ключом.
+    """
+    body = json.dumps(request.data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _replay(stored, fingerprint):
+    """
+    Возвращает сохранённый ответ или 422, если ключ использован для запроса с другим телом.
+    """
+    if stored['fingerprint'] != fingerprint:
+        return Response(
+            {"error": f"{IDEMPOTENCY_HEADER} уже использован для другого запроса."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(stored['data'], status=stored['status'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    Декоратор для POST-методов APIView, добавляющий поддержку заголовка `Idempotency-Key`.
+
+    Если клиент передал ключ:
+    - первый ответ (кроме ошибок 5xx) сохраняется в Redis на IDEMPOTENCY_KEY_TTL;
+    - повторный запрос с тем же ключом получает сохранённый ответ без обращения к БД
+      и без повторной валидации (с заголовком `Idempotent-Replayed: true`);
+    - пока первый запрос обрабатывается, повторы получают 409 Conflict;
+    - повтор с тем же ключом, но другим телом запроса получает 422.
+
+    Ключи изолированы по пользователю и пути запроса.
+    Запросы без заголовка обрабатываются как обычно.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"Длина {IDEMPOTENCY_HEADER} не должна превышать {MAX_KEY_LENGTH} символов."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache_key = f"idempotency:{request.user.pk}:{request.path}:{key}"
+        fingerprint = _request_fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        lock_key = f"{cache_key}:lock"
+        if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            return Response(
+                {"error": "Запрос с этим ключом уже обрабатывается."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        try:
+            # Первый запрос мог сохранить ответ и снять блокировку между проверкой выше
+            # и захватом блокировки: тогда повтор получает сохранённый ответ
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(
+                    cache_key,
+                    {'fingerprint': fingerprint, 'status': response.status_code, 'data': response.data},
+                    timeout=int(settings.IDEMPOTENCY_KEY_TTL.total_seconds())
+                )
+        finally:
+            cache.delete(lock_key)
+
+        return response
+
+    return wrapper
@@ -0,0 +1,63 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from config.db_routers import (enable_replica_reads,
+                               reset_replica_reads,
+                               replica_configured,
+                               is_pinned_to_primary)
+from .projection import projected_rows, build_rows
+from .renderers import ORJSONRenderer
+
+
+class ReplicaReadMixin:
+    """
+    Миксин для DRF-представлений с тяжёлыми запросами только на чтение
+    (админские списки, аналитика, отчёты): запросы к БД выполняются на реплике.
+
+    Реплика используется, только если она настроена и пользователь не закреплён
+    за основной БД после собственных изменений (см. config.db_routers).
+    Запросы с методами из replica_methods помечаются как чтение (request.replica_read),
+    и PrimaryPinMiddleware не закрепляет пользователя за основной БД после них.
+
+    Атрибуты:
+        replica_methods: HTTP-методы, которые читают с реплики
+            (по умолчанию безопасные; для отчётов, формируемых по POST, переопределяется).
+    """
+    replica_methods = SAFE_METHODS
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        request._request.replica_read = request.method in self.replica_methods
+        if (request.method in self.replica_methods
+                and replica_configured()
+                and not is_pinned_to_primary(request.user)):
+            self._replica_token = enable_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            reset_replica_reads(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ProjectedListMixin:
+    """
+    Миксин для ListAPIView: список отдаётся через проекцию values_list() и ORJSONRenderer
+    вместо ModelSerializer и JSONRenderer (см. api.projection).
+
+    serializer_class по-прежнему нужен для документации Swagger:
+    проекция должна выдавать тот же формат, что и сериализатор.
+
+    Атрибуты:
+        projection (dict): Ключ ответа -> поле модели или выражение ORM.
+    """
+    projection = None
+    renderer_classes = [ORJSONRenderer]
+
+    def list(self, request, *args, **kwargs):
+        rows = projected_rows(self.filter_queryset(self.get_queryset()), self.projection)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(build_rows(page, self.projection))
+        return Response(build_rows(rows, self.projection))
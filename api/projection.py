@@ -0,0 +1,41 @@
+"""
+Быстрая выдача списков без ModelSerializer.
+
+Проекция описывает строку ответа словарём «ключ ответа -> поле модели или выражение ORM».
+Строки выбираются через values_list() и собираются в словари, поэтому на каждую строку
+не создаются объекты модели и не вызываются поля сериализатора.
+datetime и Decimal остаются как есть — их сериализует рендерер (api.renderers.ORJSONRenderer
+или JSONRenderer DRF) в том же формате, что и ModelSerializer.
+"""
+
+
+def projected_rows(queryset, projection):
+    """
+    Возвращает queryset кортежей для проекции (подходит для пагинации).
+    """
+    return queryset.values_list(*projection.values())
+
+
+def build_rows(rows, projection):
+    """
+    Собирает словари ответа из кортежей, полученных через projected_rows.
+    """
+    keys = tuple(projection)
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def project(queryset, projection):
+    """
+    Выбирает строки queryset по проекции.
+
+    Возвращает:
+        list[dict]: Строки ответа с ключами в порядке проекции.
+    """
+    return build_rows(projected_rows(queryset, projection), projection)
+
+
+async def aproject(queryset, projection):
+    """
+    Асинхронная версия project для ASGI-представлений.
+    """
+    return build_rows([row async for row in projected_rows(queryset, projection)], projection)
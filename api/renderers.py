@@ -0,0 +1,34 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Типы, которые orjson не сериализует сам (Decimal, ленивые строки и т.п.),
+# преобразуются так же, как в JSONRenderer DRF
+_drf_default = JSONEncoder().default
+
+
+def orjson_dumps(data):
+    """
+    Сериализует данные в JSON через orjson в формате JSONRenderer DRF:
+    компактный UTF-8 без экранирования кириллицы, datetime в UTC с суффиксом Z, Decimal как число.
+    """
+    return orjson.dumps(data, default=_drf_default, option=orjson.OPT_UTC_Z)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Рендерер JSON на orjson для больших списков.
+
+    Выдаёт тот же JSON, что и JSONRenderer DRF, но в несколько раз быстрее.
+    Умеет сериализовать datetime и Decimal напрямую, поэтому подходит для строк,
+    полученных через values()/values_list() без ModelSerializer (см. api.projection).
+    Подключается на уровне представления через renderer_classes.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson_dumps(data)
@@ -130,16 +130,21 @@ class AdminUserDetailSerializer(serializers.ModelSerializer):
 
     def get_bookings(self, obj):
         """
-        Получение всех бронирований, связанных с автомобилями пользователя.
+        Получение всех бронирований, связанных с автомобилями пользователя (включая удалённые автомобили).
+        Связанные объекты загружаются одним запросом, без запроса на каждое бронирование.
         """
-        bookings = Booking.objects.filter(car__user=obj).select_related('tariff', 'parking_place')
+        bookings = (Booking.objects.filter(car__user=obj)
+                    .select_related('car__user', 'tariff', 'parking_place', 'payment')
+                    .order_by('id'))
         return AdminBookingListSerializer(bookings, many=True).data
 
     def get_payments(self, obj):
         """
         Получение всех оплат, связанных с бронированиями автомобилей пользователя.
         """
-        payments = Payment.objects.filter(booking__car__user=obj)
+        payments = (Payment.objects.filter(booking__car__user=obj)
+                    .select_related('booking__car__user', 'booking__tariff')
+                    .order_by('id'))
         return AdminPaymentListSerializer(payments, many=True).data
 
 
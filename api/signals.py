@@ -1,8 +1,8 @@
 from django.dispatch import receiver
 from django.db.models.signals import post_save
-from realtime.notifications.users import notify_users_about_user_change
+from realtime.notifications.users import user_change_event
+from realtime.outbox import enqueue
 from .models import CustomUser
-from asgiref.sync import async_to_sync
 
 
 @receiver(post_save, sender=CustomUser)
@@ -11,4 +11,4 @@ def user_change_handler(instance, created, **kwargs):
         action = 'created'
     else:
         action = 'updated'
-    async_to_sync(notify_users_about_user_change)(instance, action)
+    enqueue('user.change', user_change_event(instance, action))
@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.db.models import Q
 from rest_framework import status
 from django.core.cache import cache
@@ -8,6 +9,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from .permissions import IsAdminPermission
+from .mixins import ReplicaReadMixin
 from .models import CustomUser
 from .serializers import (CustomTokenObtainPairSerializer,
                           UserRegistrationSerializer,
@@ -33,7 +35,8 @@ class UserRegistrationView(APIView):
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response(
                 {'message': 'Регистрация прошла успешно.'},
                 status=status.HTTP_201_CREATED
@@ -65,7 +68,8 @@ class UserProfileView(APIView):
         old_email = user.email
         serializer = UpdateUserSerializer(user, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             new_email = serializer.validated_data.get('email', old_email)
 
             # Если email изменился — обновляем кэш
@@ -84,7 +88,8 @@ class UserProfileView(APIView):
         """
         user = request.user
         try:
-            user.delete()
+            with transaction.atomic():
+                user.delete()
             cache.delete(user.email)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -98,13 +103,15 @@ class AdminUserPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class AdminUserViewSet(ReadOnlyModelViewSet):
+class AdminUserViewSet(ReplicaReadMixin, ReadOnlyModelViewSet):
     """
     Представление только для чтения списка пользователей и их детальной информации (только для администраторов).
 
     Поддерживает действия:
     - list: Получить список пользователей.
     - retrieve: Получить подробную информацию по конкретному пользователю.
+
+    Запросы выполняются на реплике БД (если она настроена).
     """
     permission_classes = [IsAuthenticated, IsAdminPermission]
     pagination_class = AdminUserPagination
@@ -123,13 +130,10 @@ class AdminUserViewSet(ReadOnlyModelViewSet):
                 Q(email__icontains=search_query)
             )
 
-        # Подгружаем связанные данные только для retrieve
+        # Подгружаем автомобили только для retrieve
+        # (бронирования и оплаты загружает AdminUserDetailSerializer)
         if self.action == 'retrieve':
-            queryset = queryset.prefetch_related(
-                'cars',  # Связанные автомобили
-                'cars__bookings',  # Связанные бронирования автомобилей
-                'cars__bookings__payment'  # Связанные оплаты бронирований
-            )
+            queryset = queryset.prefetch_related('cars')
 
         return queryset.order_by('id')  # Сортировка по id
     
@@ -154,6 +158,7 @@ class UpdateAdminStatusView(APIView):
 
         serializer = UpdateAdminStatusSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response({"message": "Статус админа успешно обновлен"}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
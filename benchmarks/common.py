@@ -0,0 +1,66 @@
+import os
+import statistics
+from contextlib import contextmanager
+
+
+def setup_django(settings_module='config.settings_production'):
+    """
+    Инициализирует Django для запуска бенчмарка как отдельного скрипта.
+    Модуль настроек можно переопределить переменной окружения DJANGO_SETTINGS_MODULE.
+    """
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Создаёт временные тестовые БД (test_<DB_NAME>) со всеми миграциями на время бенчмарка
+    и удаляет их после, чтобы тестовые данные не попали в рабочую БД.
+    Реплика (TEST MIRROR) на это время указывает на тестовую основную БД.
+    """
+    from django.test.utils import setup_databases, teardown_databases
+
+    old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+def percentile(values, p):
+    """
+    Возвращает p-й перцентиль (0–100) списка значений методом ближайшего ранга.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    """
+    Возвращает основные метрики латентности (в миллисекундах) для списка измерений в секундах.
+    """
+    ms = [value * 1000 for value in values]
+    return {
+        'mean': statistics.fmean(ms) if ms else 0.0,
+        'p50': percentile(ms, 50),
+        'p95': percentile(ms, 95),
+        'p99': percentile(ms, 99),
+    }
+
+
+def print_table(headers, rows):
+    """
+    Печатает результаты в виде выровненной текстовой таблицы.
+    """
+    widths = [max(len(str(item)) for item in column) for column in zip(headers, *rows)]
+    line = '  '.join(f'{{:<{width}}}' for width in widths)
+    print(line.format(*headers))
+    print(line.format(*['-' * width for width in widths]))
+    for row in rows:
+        print(line.format(*row))
@@ -0,0 +1,90 @@
+"""
+Бенчмарк стоимости установки соединения с PostgreSQL на один запрос.
+
+Имитирует жизненный цикл HTTP-запроса Django (сигналы request_started / request_finished
+и один простой запрос к БД) в нескольких режимах:
+
+- new-connection: CONN_MAX_AGE=0, новое соединение с PostgreSQL на каждый запрос
+  (поведение config.settings);
+- persistent: CONN_MAX_AGE>0 и CONN_HEALTH_CHECKS, соединение переиспользуется
+  (режим Celery-воркеров в config.settings_production);
+- pooler: новое соединение на запрос, но через PgBouncer (режим Daphne в продакшене),
+  если передан --pooler-host.
+
+Запуск (нужен доступный PostgreSQL из переменных окружения DB_*):
+    python -m benchmarks.db_connections --requests 500
+    python -m benchmarks.db_connections --requests 500 --pooler-host localhost --pooler-port 6432
+"""
+import argparse
+import time
+from .common import setup_django, summarize, print_table
+
+
+def run_mode(connection, requests, conn_max_age, host=None, port=None):
+    """
+    Выполняет `requests` имитаций запроса и возвращает список длительностей в секундах.
+    """
+    from django.core import signals
+
+    connection.close()
+    original = dict(connection.settings_dict)
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+    connection.settings_dict['CONN_HEALTH_CHECKS'] = conn_max_age > 0
+    if host:
+        connection.settings_dict['HOST'] = host
+    if port:
+        connection.settings_dict['PORT'] = port
+
+    durations = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            signals.request_started.send(sender=None)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            signals.request_finished.send(sender=None)
+            durations.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(original)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='Количество имитируемых запросов на режим.')
+    parser.add_argument('--conn-max-age', type=int, default=600, help='CONN_MAX_AGE для режима persistent.')
+    parser.add_argument('--pooler-host', help='Хост PgBouncer для режима pooler.')
+    parser.add_argument('--pooler-port', help='Порт PgBouncer для режима pooler.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    modes = [
+        ('new-connection', run_mode(connection, args.requests, 0)),
+        ('persistent', run_mode(connection, args.requests, args.conn_max_age)),
+    ]
+    if args.pooler_host:
+        modes.append(('pooler', run_mode(connection, args.requests, 0, args.pooler_host, args.pooler_port)))
+
+    baseline = summarize(modes[0][1])['mean']
+    rows = []
+    for name, durations in modes:
+        stats = summarize(durations)
+        rows.append([
+            name,
+            f"{stats['mean']:.3f}",
+            f"{stats['p50']:.3f}",
+            f"{stats['p95']:.3f}",
+            f"{baseline - stats['mean']:.3f}",
+        ])
+
+    print(f'Запросов на режим: {args.requests}')
+    print_table(['mode', 'mean, ms', 'p50, ms', 'p95, ms', 'saved per request, ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
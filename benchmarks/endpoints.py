@@ -0,0 +1,159 @@
+"""
+Бенчмарк HTTP-эндпоинтов с бюджетами SQL-запросов.
+
+Заполняет временную тестовую БД синтетическими данными (см. seed.py), выполняет каждый
+списочный и «горячий» эндпоинт через тестовый клиент Django и показывает перцентили
+латентности и количество SQL-запросов (по всем БД, включая реплику).
+Бюджет запросов (ENDPOINTS) не зависит от объёма данных, поэтому превышение означает
+N+1 или лишнюю выборку: в этом случае бенчмарк завершается с кодом 1.
+
+Используются только локальные PostgreSQL (переменные DB_*, нужно право CREATE DATABASE)
+и Redis (REDIS_URL). Индекс свободных мест перестраивается по тестовым данным,
+поэтому лучше указать отдельную БД Redis:
+    REDIS_URL=redis://localhost:6379/15 python -m benchmarks.endpoints
+    REDIS_URL=redis://localhost:6379/15 python -m benchmarks.endpoints --users 500 --bookings-per-car 20 --requests 50
+"""
+import argparse
+import json
+import sys
+import time
+from contextlib import ExitStack
+from .common import setup_django, test_database, summarize, print_table
+from .seed import seed_dataset
+
+# (название, метод, путь, роль, бюджет SQL-запросов на запрос)
+# Роль: 'user' — пользователь с данными, 'admin' — администратор, None — без аутентификации.
+ENDPOINTS = [
+    ('profile', 'GET', '/users/', 'user', 1),
+    ('admin users', 'GET', '/users/admin/', 'admin', 3),
+    ('admin user detail', 'GET', '/users/admin/{user_id}/', 'admin', 5),
+    ('user cars', 'GET', '/cars/user/', 'user', 2),
+    ('admin cars', 'GET', '/cars/admin/', 'admin', 3),
+    ('tariffs', 'GET', '/tariffs/user/', 'user', 2),
+    ('admin tariffs', 'GET', '/tariffs/admin/', 'admin', 2),
+    ('admin price history', 'GET', '/tariffs/admin/price-history/', 'admin', 2),
+    ('user bookings', 'GET', '/bookings/user/', 'user', 2),
+    ('admin bookings', 'GET', '/bookings/admin/?status=completed&status=active', 'admin', 3),
+    ('user payments', 'GET', '/payments/user/', 'user', 2),
+    ('admin payments', 'GET', '/payments/admin/', 'admin', 3),
+    ('parking spots', 'GET', '/parking-spots/', 'user', 2),
+    ('available spots', 'GET', '/parking-spots/available/', 'user', 3),
+    ('available spots count', 'GET', '/parking-spots/available/count/', 'user', 2),
+    ('access logs', 'GET', '/access/qrcode/logs/', 'admin', 3),
+    ('verify access', 'POST', '/access/qrcode/verify-access/', None, 3),
+    ('parking status', 'GET', '/analytics/admin/parking-status/', 'admin', 2),
+    ('booking stats', 'GET', '/analytics/admin/booking-stats/', 'admin', 5),
+    ('user support requests', 'GET', '/support/user/', 'user', 2),
+    ('admin support requests', 'GET', '/support/admin/requests/', 'admin', 3),
+]
+
+
+def qr_payload(booking):
+    """
+    Возвращает подписанные данные QR-кода для бронирования (как в qr_access.qr_generator).
+    """
+    from qr_access.qr_generator import sign_qr_data
+
+    data = {
+        "booking_id": str(booking.pk),
+        "start_time": booking.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end_time": booking.end_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    data["signature"] = sign_qr_data(data)
+    return data
+
+
+def measure(client, method, path, headers, payload, requests):
+    """
+    Выполняет запрос `requests` раз (после одного прогревочного) и возвращает
+    длительности в секундах, максимальное количество SQL-запросов и код последнего ответа.
+    """
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+
+    durations, queries, status_code = [], 0, None
+    for attempt in range(requests + 1):
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            started = time.perf_counter()
+            if method == 'GET':
+                response = client.get(path, headers=headers)
+            else:
+                response = client.post(path, data=json.dumps(payload), content_type='application/json',
+                                       headers=headers)
+            elapsed = time.perf_counter() - started
+        status_code = response.status_code
+        # Прогрев заполняет кэши и не учитывается
+        if attempt:
+            durations.append(elapsed)
+            queries = max(queries, sum(len(context) for context in captured))
+    return durations, queries, status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100, help='Количество пользователей.')
+    parser.add_argument('--cars-per-user', type=int, default=2, help='Автомобилей на пользователя.')
+    parser.add_argument('--bookings-per-car', type=int, default=5, help='Бронирований на автомобиль.')
+    parser.add_argument('--spots', type=int, default=500, help='Количество парковочных мест.')
+    parser.add_argument('--logs', type=int, default=2000, help='Количество логов доступа по QR-коду.')
+    parser.add_argument('--requests', type=int, default=20, help='Количество запросов на эндпоинт.')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Запустить только указанные эндпоинты.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from api.serializers import generate_tokens_for_user
+    from parking_spots.availability import INDEX_ERRORS, rebuild_index
+
+    # Разрешает хост testserver тестового клиента
+    setup_test_environment()
+    endpoints = [endpoint for endpoint in ENDPOINTS if not args.only or endpoint[0] in args.only]
+
+    with test_database():
+        context = seed_dataset(users=args.users, cars_per_user=args.cars_per_user,
+                               bookings_per_car=args.bookings_per_car, spots=args.spots, logs=args.logs)
+        try:
+            rebuild_index()
+        except INDEX_ERRORS:
+            pass
+
+        headers = {
+            role: {'Authorization': f"Bearer {generate_tokens_for_user(context[role])['access']}"}
+            for role in ('user', 'admin')
+        }
+        headers[None] = {}
+        payload = qr_payload(context['paid_booking'])
+        client = Client()
+
+        rows, failures = [], []
+        for name, method, path, role, budget in endpoints:
+            path = path.format(user_id=context['user'].pk)
+            durations, queries, status_code = measure(client, method, path, headers[role], payload, args.requests)
+            stats = summarize(durations)
+            over_budget = queries > budget
+            if over_budget:
+                failures.append(f'{name}: {queries} SQL-запросов при бюджете {budget}')
+            if status_code >= 400:
+                failures.append(f'{name}: ответ {status_code}')
+            rows.append([
+                name, f'{method} {path}', status_code,
+                f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['p99']:.2f}",
+                queries, budget, 'OVER' if over_budget else 'ok',
+            ])
+
+    print(f'Пользователей: {args.users}, бронирований: {args.users * args.cars_per_user * args.bookings_per_car}, '
+          f'запросов на эндпоинт: {args.requests}')
+    print_table(['endpoint', 'request', 'status', 'p50, ms', 'p95, ms', 'p99, ms', 'queries', 'budget', 'result'],
+                rows)
+
+    if failures:
+        print('\nПревышены бюджеты или получены ошибки:', file=sys.stderr)
+        for failure in failures:
+            print(f'  {failure}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Заполнение тестовой БД синтетическими данными для бенчмарков.
+
+Данные создаются через bulk_create в обход сигналов, поэтому витрина BookingSummary
+заполняется здесь же, а индекс свободных мест в Redis нужно перестроить после заполнения
+(parking_spots.availability.rebuild_index).
+"""
+import json
+from datetime import timedelta
+
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark-password'
+
+
+def seed_dataset(users=100, cars_per_user=2, bookings_per_car=5, spots=500, logs=1000):
+    """
+    Создаёт администратора и `users` пользователей с автомобилями, завершёнными бронированиями
+    (оплачено каждое второе) и строками витрины, а также места, логи доступа по QR-коду,
+    обращения в поддержку и историю цен тарифов.
+
+    Возвращает:
+        dict: admin — администратор, user — первый пользователь,
+              paid_booking — оплаченное бронирование этого пользователя.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+    from api.models import CustomUser
+    from bookings.models import Booking, BookingSummary
+    from cars.models import Car
+    from parking_spots.models import ParkingSpot
+    from payments.models import Payment
+    from qr_access.models import QRAccessLog
+    from support.models import SupportRequest
+    from tariffs.models import Tariff, TariffPriceHistory
+
+    admin = CustomUser.objects.create_superuser('admin@benchmark.local', PASSWORD,
+                                                first_name='Админ', last_name='Бенчмарков')
+    # Хэш пароля считается один раз: Argon2 намеренно медленный
+    password = make_password(PASSWORD)
+    customers = CustomUser.objects.bulk_create([
+        CustomUser(email=f'user{index}@benchmark.local', password=password,
+                   first_name='Иван', last_name=f'Петров{index}')
+        for index in range(users)
+    ], batch_size=BATCH_SIZE)
+
+    cars = Car.objects.bulk_create([
+        Car(user=customers[index // cars_per_user], license_plate=f'А{index:06d}ВС',
+            make='Lada', model='Vesta', color='белый')
+        for index in range(users * cars_per_user)
+    ], batch_size=BATCH_SIZE)
+
+    tariffs = Tariff.objects.bulk_create([
+        Tariff(name='Час', price=150, duration_minutes=60),
+        Tariff(name='День', price=1200, duration_minutes=24 * 60),
+        Tariff(name='Неделя', price=6000, duration_minutes=7 * 24 * 60),
+    ])
+    TariffPriceHistory.objects.bulk_create([
+        TariffPriceHistory(tariff=tariff, old_price=tariff.price - step * 10, new_price=tariff.price, changed_by=admin)
+        for tariff in tariffs
+        for step in range(1, 6)
+    ])
+
+    statuses = ['available', 'booked', 'unavailable']
+    ParkingSpot.objects.bulk_create(
+        [ParkingSpot(spot_number=number, status=statuses[number % 3]) for number in range(1, spots + 1)],
+        batch_size=BATCH_SIZE
+    )
+
+    # Завершённые бронирования не участвуют в ограничении на пересечение интервалов
+    start = timezone.now() - timedelta(days=30)
+    bookings = []
+    for index in range(len(cars) * bookings_per_car):
+        tariff = tariffs[index % len(tariffs)]
+        start_time = start + timedelta(minutes=index)
+        bookings.append(Booking(car=cars[index % len(cars)], tariff=tariff, parking_place_id=index % spots + 1,
+                                status='completed', start_time=start_time,
+                                end_time=start_time + tariff.get_duration_delta()))
+    Booking.objects.bulk_create(bookings, batch_size=BATCH_SIZE)
+
+    payments = Payment.objects.bulk_create(
+        [Payment(booking=booking, amount=booking.tariff.price) for booking in bookings[::2]],
+        batch_size=BATCH_SIZE
+    )
+    for payment in payments:
+        payment.booking.payment = payment
+    BookingSummary.objects.bulk_create([BookingSummary.objects.build(booking) for booking in bookings],
+                                       batch_size=BATCH_SIZE)
+
+    reasons = [None] + [reason for reason, _ in QRAccessLog.FAILURE_REASONS]
+    logged = [bookings[index % len(bookings)] for index in range(logs)]
+    QRAccessLog.objects.bulk_create([
+        QRAccessLog(qr_data=json.dumps({"booking_id": str(booking.pk)}), booking=booking,
+                    access_granted=index % 4 == 0, failure_reason=reasons[index % 4])
+        for index, booking in enumerate(logged)
+    ], batch_size=BATCH_SIZE)
+
+    SupportRequest.objects.bulk_create([
+        SupportRequest(user=customer, subject='Не открывается шлагбаум', message='Помогите, пожалуйста.')
+        for customer in customers
+    ], batch_size=BATCH_SIZE)
+
+    return {
+        'admin': admin,
+        'user': customers[0],
+        'paid_booking': bookings[0],
+    }
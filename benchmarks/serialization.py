@@ -0,0 +1,95 @@
+"""
+Бенчмарк выдачи больших списков: ModelSerializer + JSONRenderer (текущий путь DRF)
+против проекции values_list() (api.projection) с JSONRenderer и с ORJSONRenderer.
+
+Измеряется полный путь выдачи списка: выборка из БД, построение строк и рендеринг JSON.
+Данные создаются во временной тестовой БД (см. common.test_database и seed.py), результат —
+строк в секунду (лучшее из --repeat прогонов) и ускорение относительно ModelSerializer.
+
+Запуск (нужен доступный PostgreSQL из переменных окружения DB_* и право CREATE DATABASE):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 1000 10000 100000 --repeat 5
+"""
+import argparse
+import json
+import time
+from .common import setup_django, test_database, print_table
+from .seed import seed_dataset
+
+
+def get_datasets():
+    """
+    Возвращает списки, которые сравниваются: (название, queryset, сериализатор, проекция).
+    """
+    from bookings.models import BookingSummary
+    from bookings.serializers import AdminBookingSummarySerializer, ADMIN_BOOKING_SUMMARY_PROJECTION
+    from parking_spots.models import ParkingSpot
+    from parking_spots.serializers import ParkingSpotSerializer, PARKING_SPOT_PROJECTION
+    from qr_access.models import QRAccessLog
+    from qr_access.serializers import QRAccessLogSerializer, QR_ACCESS_LOG_PROJECTION
+
+    return [
+        ('parking_spots', ParkingSpot.objects.select_related('zone').order_by('spot_number'),
+         ParkingSpotSerializer, PARKING_SPOT_PROJECTION),
+        ('bookings', BookingSummary.objects.order_by('-booking'),
+         AdminBookingSummarySerializer, ADMIN_BOOKING_SUMMARY_PROJECTION),
+        ('qr_logs', QRAccessLog.objects.order_by('-time'),
+         QRAccessLogSerializer, QR_ACCESS_LOG_PROJECTION),
+    ]
+
+
+def best_time(func, repeat):
+    """
+    Возвращает минимальное время выполнения func() в секундах и результат последнего вызова.
+    """
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Количество строк в списке.')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество прогонов на каждый замер.')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from api.projection import project
+    from api.renderers import ORJSONRenderer
+
+    json_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+
+    with test_database():
+        size = max(args.sizes)
+        seed_dataset(users=1, cars_per_user=1, bookings_per_car=size, spots=size, logs=size)
+        rows = []
+        for name, queryset, serializer_class, projection in get_datasets():
+            for size in sorted(args.sizes):
+                items = queryset[:size]
+                modes = [
+                    ('ModelSerializer + JSONRenderer',
+                     lambda: json_renderer.render(serializer_class(items, many=True).data)),
+                    ('values_list + JSONRenderer',
+                     lambda: json_renderer.render(project(items, projection))),
+                    ('values_list + ORJSONRenderer',
+                     lambda: orjson_renderer.render(project(items, projection))),
+                ]
+                results = [(mode, *best_time(func, args.repeat)) for mode, func in modes]
+                _, baseline, expected = results[0]
+                for mode, elapsed, content in results:
+                    # Быстрый путь обязан выдавать тот же JSON, что и сериализатор
+                    if json.loads(content) != json.loads(expected):
+                        raise SystemExit(f'{name}/{mode}: ответ отличается от ModelSerializer')
+                    rows.append([name, size, mode, f'{size / elapsed:,.0f}', f'{baseline / elapsed:.1f}x'])
+
+    print_table(['dataset', 'rows', 'mode', 'rows/s', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:01
+
+import bookings.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_created_at(apps, schema_editor):
+    # Время создания существующих бронирований неизвестно; ближайшая оценка —
+    # начало бронирования (до предварительных бронирований они совпадали).
+    Booking = apps.get_model('bookings', 'Booking')
+    Booking.objects.update(created_at=models.F('start_time'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        # Нужно для оператора = по parking_place в GiST-индексе ограничения
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='booking',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status', 'active')), expressions=[(bookings.models.TsTzRange('start_time', 'end_time', django.contrib.postgres.fields.ranges.RangeBoundary()), '&&'), ('parking_place', '=')], name='exclude_overlapping_active_bookings'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_booking_summary(apps, schema_editor):
+    """
+    Заполняет витрину по уже существующим бронированиям.
+    """
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingSummary = apps.get_model('bookings', 'BookingSummary')
+
+    bookings = Booking.objects.select_related('car__user', 'tariff', 'payment').order_by('pk')
+    batch = []
+    for booking in bookings.iterator(chunk_size=1000):
+        payment = getattr(booking, 'payment', None)
+        batch.append(BookingSummary(
+            booking_id=booking.pk,
+            user_id=booking.car.user_id,
+            car_id=booking.car_id,
+            tariff_id=booking.tariff_id,
+            status=booking.status,
+            start_time=booking.start_time,
+            end_time=booking.end_time,
+            user_email=booking.car.user.email,
+            car_license_plate=booking.car.license_plate,
+            car_make=booking.car.make,
+            car_model=booking.car.model,
+            car_color=booking.car.color,
+            tariff_name=booking.tariff.name,
+            parking_place=booking.parking_place_id,
+            payment_amount=payment.amount if payment else None,
+            payment_date=payment.payment_date if payment else None,
+        ))
+        if len(batch) >= 1000:
+            BookingSummary.objects.bulk_create(batch)
+            batch = []
+    BookingSummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cars', '0001_initial'),
+        ('tariffs', '0003_alter_tariff_name'),
+        ('bookings', '0002_advance_reservations'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSummary',
+            fields=[
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='bookings.booking')),
+                ('status', models.CharField(choices=[('active', 'Активное'), ('completed', 'Завершено'), ('cancelled', 'Отменено')], max_length=20)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('user_email', models.EmailField(max_length=254)),
+                ('car_license_plate', models.CharField(max_length=15)),
+                ('car_make', models.CharField(blank=True, max_length=50, null=True)),
+                ('car_model', models.CharField(blank=True, max_length=100, null=True)),
+                ('car_color', models.CharField(blank=True, max_length=50, null=True)),
+                ('tariff_name', models.CharField(max_length=50)),
+                ('parking_place', models.IntegerField()),
+                ('payment_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('payment_date', models.DateTimeField(blank=True, null=True)),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cars.car')),
+                ('tariff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tariffs.tariff')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-booking'], name='booking_summary_user_idx'), models.Index(fields=['status', '-booking'], name='booking_summary_status_idx')],
+            },
+        ),
+        migrations.RunPython(fill_booking_summary, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,44 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary, RangeOperators
 from django.db import models
+from django.db.models import Func, Q
+from api.models import CustomUser
 from cars.models import Car
 from tariffs.models import Tariff
 from parking_spots.models import ParkingSpot
 from django.utils import timezone
+from psycopg2.extras import DateTimeTZRange
+
+# Ограничение, запрещающее пересекающиеся активные бронирования одного места
+OVERLAPPING_BOOKINGS_CONSTRAINT = 'exclude_overlapping_active_bookings'
+
+
+class TsTzRange(Func):
+    """
+    Интервал бронирования [start_time, end_time) как tstzrange.
+    """
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class BookingQuerySet(models.QuerySet):
+    def overlapping(self, start_time, end_time):
+        """
+        Активные бронирования, пересекающиеся с интервалом [start_time, end_time).
+
+        Условие записано через tstzrange, поэтому для поиска используется
+        GiST-индекс ограничения exclude_overlapping_active_bookings.
+        """
+        return self.alias(
+            period=TsTzRange('start_time', 'end_time', RangeBoundary())
+        ).filter(status='active', period__overlap=DateTimeTZRange(start_time, end_time))
+
+    def started(self, moment=None):
+        """
+        Активные бронирования, которые уже начались и ещё не закончились.
+        """
+        moment = moment or timezone.now()
+        return self.filter(status='active', start_time__lte=moment, end_time__gt=moment)
 
 
 class Booking(models.Model):
@@ -17,8 +53,15 @@ class Booking(models.Model):
     - car (ForeignKey): Автомобиль, на который оформлено бронирование.
     - parking_place (ForeignKey): Забронированное парковочное место.
     - tariff (ForeignKey): Тариф, по которому осуществляется бронирование.
-    - start_time (DateTime): Время начала бронирования (устанавливается автоматически).
+    - start_time (DateTime): Время начала бронирования (по умолчанию — момент создания,
+      можно указать время в будущем для предварительного бронирования).
     - end_time (DateTime): Время окончания бронирования (рассчитывается по длительности тарифа).
+    - created_at (DateTime): Время создания бронирования (от него отсчитывается срок оплаты).
+
+    Ограничения:
+    - Активные бронирования одного места не могут пересекаться по времени.
+      Это проверяет сама PostgreSQL (exclusion constraint с GiST-индексом по tstzrange),
+      поэтому конкурирующие бронирования не требуют блокировок в приложении.
 
     Поведение:
     - При первом сохранении (создании) объекта автоматически вычисляется `end_time`
@@ -35,6 +78,25 @@ class Booking(models.Model):
     tariff = models.ForeignKey(Tariff, on_delete=models.CASCADE, related_name='bookings')
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            ExclusionConstraint(
+                name=OVERLAPPING_BOOKINGS_CONSTRAINT,
+                expressions=[
+                    (TsTzRange('start_time', 'end_time', RangeBoundary()), RangeOperators.OVERLAPS),
+                    ('parking_place', RangeOperators.EQUAL),
+                ],
+                condition=Q(status='active'),
+            ),
+        ]
+
+    @property
+    def has_started(self):
+        return self.start_time <= timezone.now()
 
     def save(self, *args, **kwargs):
         # Проверяем, что объект ещё не сохранён
@@ -44,3 +106,93 @@ class Booking(models.Model):
             if self.tariff:
                 self.end_time = self.start_time + self.tariff.get_duration_delta()
         super().save(*args, **kwargs)
+
+
+class BookingSummaryManager(models.Manager):
+    # Поля, которые перезаписываются при обновлении строки
+    SYNC_FIELDS = [
+        'user', 'car', 'tariff', 'status', 'start_time', 'end_time', 'user_email',
+        'car_license_plate', 'car_make', 'car_model', 'car_color',
+        'tariff_name', 'parking_place', 'payment_amount', 'payment_date',
+    ]
+
+    def build(self, booking):
+        """
+        Возвращает несохранённую строку витрины для объекта бронирования.
+
+        Автомобиль с владельцем, тариф, место и оплата берутся из объекта бронирования,
+        поэтому их стоит загрузить заранее (select_related), чтобы не делать лишних запросов.
+        """
+        car = booking.car
+        payment = getattr(booking, 'payment', None)
+        return self.model(
+            booking_id=booking.pk,
+            user_id=car.user_id,
+            car_id=car.pk,
+            tariff_id=booking.tariff_id,
+            status=booking.status,
+            start_time=booking.start_time,
+            end_time=booking.end_time,
+            user_email=car.user.email,
+            car_license_plate=car.license_plate,
+            car_make=car.make,
+            car_model=car.model,
+            car_color=car.color,
+            tariff_name=booking.tariff.name,
+            parking_place=booking.parking_place_id,
+            payment_amount=payment.amount if payment else None,
+            payment_date=payment.payment_date if payment else None,
+        )
+
+    def sync(self, booking):
+        """
+        Создаёт или обновляет строку витрины по объекту бронирования (INSERT ... ON CONFLICT DO UPDATE).
+        Связанные объекты стоит загрузить заранее, см. build().
+
+        Возвращает:
+            BookingSummary: актуальную строку витрины.
+        """
+        summary = self.build(booking)
+        self.bulk_create([summary], update_conflicts=True, unique_fields=['booking'], update_fields=self.SYNC_FIELDS)
+        return summary
+
+
+class BookingSummary(models.Model):
+    """
+    Денормализованная витрина бронирований для чтения (read model).
+
+    Содержит всё, что показывают списки бронирований пользователя и администратора
+    и уведомления об изменении бронирований, поэтому они читаются одним запросом
+    по индексу без соединения таблиц Booking, Car, CustomUser, Tariff и Payment.
+
+    Строки поддерживаются в актуальном состоянии сигналами (см. bookings/signals.py)
+    в той же транзакции, что и изменение исходных данных. Код, который меняет данные
+    в обход сигналов (update(), bulk_create(), сырой SQL), должен обновлять витрину сам.
+
+    Поля user, car и tariff хранятся только для обновления витрины при изменении
+    пользователя, автомобиля или тарифа; parking_place — номер места.
+    """
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='+')
+    tariff = models.ForeignKey(Tariff, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=20, choices=Booking.STATUSES)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    user_email = models.EmailField()
+    car_license_plate = models.CharField(max_length=15)
+    car_make = models.CharField(max_length=50, null=True, blank=True)
+    car_model = models.CharField(max_length=100, null=True, blank=True)
+    car_color = models.CharField(max_length=50, null=True, blank=True)
+    tariff_name = models.CharField(max_length=50)
+    parking_place = models.IntegerField()
+    payment_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    payment_date = models.DateTimeField(null=True, blank=True)
+
+    objects = BookingSummaryManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-booking'], name='booking_summary_user_idx'),
+            models.Index(fields=['status', '-booking'], name='booking_summary_status_idx'),
+        ]
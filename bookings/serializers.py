@@ -1,10 +1,20 @@
+from datetime import timedelta
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
 from cars.models import Car
 from tariffs.models import Tariff
-from parking_spots.models import ParkingSpot
-from .models import Booking
-from realtime.notifications.bookings import notify_users_about_booking_change
+from parking_spots.availability import free_spots, lock_available_spot
+from parking_spots.models import ParkingSpot, ParkingZone
+from .models import Booking, BookingSummary, OVERLAPPING_BOOKINGS_CONSTRAINT
+
+
+def _violated_constraint(exc):
+    """Имя ограничения БД, нарушение которого вызвало IntegrityError (если драйвер его сообщает)."""
+    diag = getattr(exc.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None)
 
 
 class BaseBookingSerializer(serializers.ModelSerializer):
@@ -60,13 +70,18 @@ class BookingSerializer(BaseBookingSerializer):
     - Создавать новое бронирование, указывая:
         * ID автомобиля (`car_id`)
         * ID тарифа (`tariff_id`)
-        * Парковочное место (`parking_place`)
+        * Парковочное место (`parking_place_id`) или `auto_assign: true` —
+          тогда свободное место выбирает сервер (можно ограничить диапазоном
+          номеров `spot_from` / `spot_to` и зоной `zone` — кодом уровня или площадки)
+        * Время начала (`start_time`, необязательно) — для бронирования заранее,
+          не позже чем через BOOKING_MAX_ADVANCE
     Также отображаются данные автомобиля:
     - Марка, модель, цвет (только для чтения).
 
     Выполняет валидацию:
-    - Нельзя бронировать автомобиль, если на него уже есть активное бронирование.
-    - Место должно быть свободным.
+    - Нельзя бронировать автомобиль, если на него уже есть активное бронирование на это время.
+    - Место должно быть свободным на всё время бронирования.
+    - Нужно указать либо место, либо auto_assign.
     """
     # Отображаемые поля, взятые из связанной модели Car
     car_make = serializers.CharField(source='car.make', read_only=True)
@@ -75,8 +90,15 @@ class BookingSerializer(BaseBookingSerializer):
 
     # Поля, используемые при создании бронирования
     parking_place_id = serializers.PrimaryKeyRelatedField(
-        queryset=ParkingSpot.objects.all(), source='parking_place', write_only=True
+        queryset=ParkingSpot.objects.all(), source='parking_place', write_only=True, required=False
     )
+    auto_assign = serializers.BooleanField(write_only=True, default=False)
+    spot_from = serializers.IntegerField(write_only=True, required=False)
+    spot_to = serializers.IntegerField(write_only=True, required=False)
+    zone = serializers.SlugRelatedField(
+        slug_field='code', queryset=ParkingZone.objects.all(), write_only=True, required=False
+    )
+    start_time = serializers.DateTimeField(required=False)
     car_id = serializers.PrimaryKeyRelatedField(
         queryset=Car.objects.all(), source='car', write_only=True
     )
@@ -86,12 +108,14 @@ class BookingSerializer(BaseBookingSerializer):
 
     class Meta(BaseBookingSerializer.Meta):
         fields = BaseBookingSerializer.Meta.fields + ['car_id',  'car_make', 'car_model', 'car_color',
-                                                      'tariff_id', 'parking_place_id']
+                                                      'tariff_id', 'parking_place_id',
+                                                      'auto_assign', 'spot_from', 'spot_to', 'zone']
 
     def validate(self, data):
         """
         Валидация данных при создании бронирования:
-        - Проверяет, есть ли уже активное бронирование на этот автомобиль.
+        - Проверяет время начала бронирования.
+        - Проверяет, есть ли уже активное бронирование на этот автомобиль на это время.
         - Проверяет, доступно ли выбранное парковочное место.
         """
         car = data.get('car')
@@ -99,29 +123,80 @@ class BookingSerializer(BaseBookingSerializer):
         tariff = data.get('tariff')
         parking_place = data.get('parking_place')
 
+        now = timezone.now()
+        start_time = data.get('start_time') or now
+        # Небольшой запас на задержку между формированием запроса на клиенте и его обработкой
+        if start_time < now - timedelta(minutes=1):
+            raise serializers.ValidationError("Время начала бронирования не может быть в прошлом.")
+        if start_time > now + settings.BOOKING_MAX_ADVANCE:
+            raise serializers.ValidationError(
+                f"Бронировать можно не более чем на {settings.BOOKING_MAX_ADVANCE.days} дней вперёд."
+            )
+        data['start_time'] = max(start_time, now)
+        end_time = data['start_time'] + tariff.get_duration_delta()
+
         # Автомобиль должен принадлежать пользователю
         if car.user != user:
             raise serializers.ValidationError("Вы не можете бронировать чужой автомобиль.")
 
-        # Проверка наличия активного бронирования на автомобиль
-        if Booking.objects.filter(car=car, status='active').exists():
-            raise serializers.ValidationError("На этот автомобиль уже есть активное бронирование")
+        # Проверка наличия активного бронирования на автомобиль на это время
+        if Booking.objects.overlapping(data['start_time'], end_time).filter(car=car).exists():
+            raise serializers.ValidationError("На этот автомобиль уже есть активное бронирование на это время")
 
         # Проверка активности тарифа
         if not tariff.is_active:
             raise serializers.ValidationError("Выбранный тариф недоступен для бронирования.")
 
-        # Проверка доступности парковочного места
-        if parking_place.status != 'available':
+        if data['auto_assign']:
+            if parking_place is not None:
+                raise serializers.ValidationError("Укажите либо парковочное место, либо auto_assign.")
+            spot_from, spot_to = data.get('spot_from'), data.get('spot_to')
+            if spot_from is not None and spot_to is not None and spot_from > spot_to:
+                raise serializers.ValidationError("spot_from не может быть больше spot_to.")
+            # Место выбирается в create() под блокировкой
+            return data
+
+        if parking_place is None:
+            raise serializers.ValidationError("Укажите парковочное место или auto_assign.")
+        if data.get('zone') is not None:
+            raise serializers.ValidationError("Зону можно указать только вместе с auto_assign.")
+
+        # Проверка доступности парковочного места на всё время бронирования.
+        # Окончательно пересечения исключает ограничение в БД (см. create()).
+        if not free_spots(data['start_time'], end_time).filter(pk=parking_place.pk).exists():
             raise serializers.ValidationError("Выбранное место недоступно")
         return data
 
     def create(self, validated_data):
         """
         Создание нового бронирования. Время окончания устанавливается в модели.
+
+        При auto_assign свободное место блокируется и бронируется в одной транзакции,
+        поэтому параллельные запросы не конкурируют за одно и то же место.
+        Если место успели занять параллельным запросом, вставку отклоняет ограничение
+        exclude_overlapping_active_bookings и пользователь получает ошибку валидации.
         """
-        booking = Booking(**validated_data)
-        booking.save()
+        auto_assign = validated_data.pop('auto_assign')
+        spot_from = validated_data.pop('spot_from', None)
+        spot_to = validated_data.pop('spot_to', None)
+        zone = validated_data.pop('zone', None)
+        start_time = validated_data['start_time']
+        end_time = start_time + validated_data['tariff'].get_duration_delta()
+
+        try:
+            with transaction.atomic():
+                if auto_assign:
+                    parking_place = lock_available_spot(start_time, end_time, spot_from, spot_to, zone)
+                    if parking_place is None:
+                        raise serializers.ValidationError({"non_field_errors": ["Нет свободных мест."]})
+                    validated_data['parking_place'] = parking_place
+
+                booking = Booking(**validated_data)
+                booking.save()
+        except IntegrityError as exc:
+            if _violated_constraint(exc) != OVERLAPPING_BOOKINGS_CONSTRAINT:
+                raise
+            raise serializers.ValidationError({"non_field_errors": ["Выбранное место недоступно"]})
         return booking
 
 
@@ -136,3 +211,64 @@ class AdminBookingListSerializer(BaseBookingSerializer):
 
     class Meta(BaseBookingSerializer.Meta):
         fields = BaseBookingSerializer.Meta.fields + ['user_email']
+
+
+class BookingSummarySerializer(serializers.ModelSerializer):
+    """
+    Сериализатор списка бронирований пользователя, читающий из витрины BookingSummary.
+    Формат ответа совпадает с BookingSerializer.
+    """
+    id = serializers.ReadOnlyField(source='booking_id')
+    payment_amount = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = BookingSummary
+        fields = ['id', 'status',
+                  'start_time', 'end_time',
+                  'tariff_name', 'parking_place', 'car_license_plate', 'payment_amount', 'payment_date',
+                  'car_make', 'car_model', 'car_color']
+        read_only_fields = fields
+
+
+class AdminBookingSummarySerializer(BookingSummarySerializer):
+    """
+    Сериализатор списка бронирований для администратора, читающий из витрины BookingSummary.
+    Формат ответа совпадает с AdminBookingListSerializer.
+    """
+    class Meta(BookingSummarySerializer.Meta):
+        fields = ['id', 'status',
+                  'start_time', 'end_time',
+                  'tariff_name', 'parking_place', 'car_license_plate', 'payment_amount', 'payment_date',
+                  'user_email']
+        read_only_fields = fields
+
+
+# Проекции витрины для быстрой выдачи списков (см. api.projection).
+# Формат строк совпадает с BookingSummarySerializer и AdminBookingSummarySerializer.
+BOOKING_SUMMARY_PROJECTION = {
+    'id': 'booking_id',
+    'status': 'status',
+    'start_time': 'start_time',
+    'end_time': 'end_time',
+    'tariff_name': 'tariff_name',
+    'parking_place': 'parking_place',
+    'car_license_plate': 'car_license_plate',
+    'payment_amount': 'payment_amount',
+    'payment_date': 'payment_date',
+    'car_make': 'car_make',
+    'car_model': 'car_model',
+    'car_color': 'car_color',
+}
+
+ADMIN_BOOKING_SUMMARY_PROJECTION = {
+    'id': 'booking_id',
+    'status': 'status',
+    'start_time': 'start_time',
+    'end_time': 'end_time',
+    'tariff_name': 'tariff_name',
+    'parking_place': 'parking_place',
+    'car_license_plate': 'car_license_plate',
+    'payment_amount': 'payment_amount',
+    'payment_date': 'payment_date',
+    'user_email': 'user_email',
+}
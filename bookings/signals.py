@@ -1,8 +1,11 @@
-from asgiref.sync import async_to_sync
 from django.dispatch import receiver
-from django.db.models.signals import post_save
-from realtime.notifications.bookings import notify_users_about_booking_change
-from .models import Booking
+from django.db.models.signals import post_init, post_save, post_delete
+from realtime.notifications.bookings import booking_change_event
+from realtime.outbox import enqueue
+from api.models import CustomUser
+from cars.models import Car
+from tariffs.models import Tariff
+from .models import Booking, BookingSummary
 from payments.models import Payment
 
 
@@ -10,14 +13,63 @@ from payments.models import Payment
 def booking_change_handler(instance, created, **kwargs):
     if created:
         action = 'created'
-        instance.parking_place.status = 'booked'
-        instance.parking_place.save()
+        # Место занимается сразу только для начавшегося бронирования,
+        # предварительные бронирования занимают его по расписанию (см. bookings/tasks.py)
+        if instance.has_started:
+            instance.parking_place.status = 'booked'
+            instance.parking_place.save()
     else:
         action = 'updated'
 
-    try:
-        instance.payment
-    except Payment.DoesNotExist:
-        pass
+    summary = BookingSummary.objects.sync(instance)
+    enqueue('booking.change', booking_change_event(summary, action))
 
-    async_to_sync(notify_users_about_booking_change)(instance, action)
+
+# Обновление витрины BookingSummary при изменении связанных данных.
+# Оплата обновляет витрину в payments/signals.py (вместе с отправкой уведомлений).
+
+@receiver(post_delete, sender=Payment)
+def payment_delete_handler(instance, **kwargs):
+    BookingSummary.objects.filter(booking_id=instance.booking_id).update(payment_amount=None, payment_date=None)
+
+
+@receiver(post_save, sender=Car)
+def car_summary_handler(instance, created, **kwargs):
+    if not created:
+        BookingSummary.objects.filter(car_id=instance.pk).update(
+            car_license_plate=instance.license_plate,
+            car_make=instance.make,
+            car_model=instance.model,
+            car_color=instance.color,
+        )
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_user_email(instance, **kwargs):
+    # Email на момент загрузки: витрина обновляется, только если он изменился.
+    # Берётся из __dict__, чтобы не загружать отложенное поле (only()/defer())
+    instance._summary_email = instance.__dict__.get('email')
+
+
+@receiver(post_save, sender=CustomUser)
+def user_summary_handler(instance, created, update_fields=None, **kwargs):
+    """
+    Обновляет email в витрине, если он изменился. Сохранения других полей
+    (last_login, пароль) витрину не затрагивают.
+    """
+    if created:
+        instance._summary_email = instance.email
+        return
+    if update_fields is not None:
+        changed = 'email' in update_fields
+    else:
+        changed = instance.email != instance._summary_email
+    if changed:
+        BookingSummary.objects.filter(user_id=instance.pk).update(user_email=instance.email)
+        instance._summary_email = instance.email
+
+
+@receiver(post_save, sender=Tariff)
+def tariff_summary_handler(instance, created, **kwargs):
+    if not created:
+        BookingSummary.objects.filter(tariff_id=instance.pk).update(tariff_name=instance.name)
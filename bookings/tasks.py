@@ -1,7 +1,9 @@
 from celery import shared_task
+from django.db import transaction
 from bookings.models import Booking
 from django.utils import timezone
 from datetime import timedelta
+from config.task_metrics import record_rows
 
 
 @shared_task(expires=60)
@@ -9,23 +11,69 @@ def manage_expired_and_unpaid_bookings():
     """
     Проверяет все активные бронирования:
     1. Завершает бронирования, если они истекли.
-    2. Отменяет бронирования, если они не были оплачены в течение 20 минут.
+    2. Отменяет бронирования, если они не были оплачены в течение 20 минут после создания.
+    3. Освобождает места завершённых и отменённых бронирований, если на них нет других
+       начавшихся бронирований.
+    4. Занимает места предварительных бронирований, время которых наступило.
+
+    Каждое изменение сохраняется в своей транзакции вместе с событием outbox,
+    которое записывают сигналы моделей.
+
+    Возвращает количество изменённых бронирований и мест по видам изменений.
     """
     now = timezone.now()
     timeout = timedelta(minutes=20)
+    released_spots = {}
 
     # Завершение бронирований, у которых время окончания прошло
-    expired_bookings = Booking.objects.filter(status='active', end_time__lt=now)
+    # Связанные объекты загружаются сразу: они нужны для уведомлений об изменении бронирования
+    bookings = Booking.objects.select_related('car__user', 'tariff', 'parking_place', 'payment')
+    expired_bookings = bookings.filter(status='active', end_time__lt=now)
+    completed = 0
     for booking in expired_bookings:
+        completed += 1
         booking.status = 'completed'
-        booking.parking_place.status = 'available'  # Освобождение парковочного места
-        booking.parking_place.save()
-        booking.save()
+        with transaction.atomic():
+            booking.save()
+        released_spots[booking.parking_place.pk] = booking.parking_place
 
     # Отмена бронирований, которые не были оплачены в течение 20 минут
-    unpaid_bookings = Booking.objects.filter(status='active', payment__isnull=True, start_time__lte=now - timeout)
+    unpaid_bookings = bookings.filter(status='active', payment__isnull=True, created_at__lte=now - timeout)
+    cancelled = 0
     for booking in unpaid_bookings:
+        cancelled += 1
         booking.status = 'cancelled'
-        booking.parking_place.status = 'available'  # Освобождение парковочного места
-        booking.parking_place.save()
-        booking.save()
+        with transaction.atomic():
+            booking.save()
+        released_spots[booking.parking_place.pk] = booking.parking_place
+
+    # Освобождение мест (место могло быть уже забронировано следующим бронированием)
+    occupied = set(
+        Booking.objects.started(now)
+        .filter(parking_place__in=released_spots)
+        .values_list('parking_place', flat=True)
+    )
+    released = 0
+    for spot_number, spot in released_spots.items():
+        if spot_number not in occupied:
+            released += 1
+            spot.status = 'available'
+            with transaction.atomic():
+                spot.save()
+
+    # Начавшиеся предварительные бронирования занимают свои места
+    started_bookings = Booking.objects.started(now).filter(parking_place__status='available').select_related('parking_place')
+    occupied_by_started = 0
+    for booking in started_bookings:
+        occupied_by_started += 1
+        booking.parking_place.status = 'booked'
+        with transaction.atomic():
+            booking.parking_place.save()
+
+    record_rows(completed + cancelled + released + occupied_by_started)
+    return {
+        'completed': completed,
+        'cancelled': cancelled,
+        'released_spots': released,
+        'occupied_spots': occupied_by_started,
+    }
@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import UserBookingView, AdminBookingListView
+from api.async_views import async_api_view
+from .views import UserBookingView, AdminBookingListView, AdminBookingBulkView, user_booking_list_async
 
 urlpatterns = [
-    path('user/', UserBookingView.as_view(), name='user-bookings'),  # GET — список, POST — создать бронирование
+    path('user/', async_api_view(UserBookingView.as_view(), get=user_booking_list_async),
+         name='user-bookings'),  # GET — список (асинхронно), POST — создать бронирование
     path('admin/', AdminBookingListView.as_view(), name='admin-bookings'),  # GET — список всех бронирований
+    path('admin/bulk/', AdminBookingBulkView.as_view(), name='admin-bookings-bulk'),  # POST — отмена/завершение
 ]
@@ -1,4 +1,6 @@
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
@@ -6,8 +8,43 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from api.permissions import IsAdminPermission
-from .models import Booking
-from .serializers import BookingSerializer, AdminBookingListSerializer
+from api.idempotency import idempotent
+from api.mixins import ReplicaReadMixin, ProjectedListMixin
+from api.projection import project, aproject
+from api.renderers import ORJSONRenderer
+from api.async_views import api_json_response, async_login_required
+from parking_spots.availability import sync_spots
+from parking_spots.models import ParkingSpot
+from realtime.notifications.bookings import bookings_change_event
+from realtime.notifications.parking_spots import spots_change_event
+from realtime.outbox import enqueue_many
+from .models import Booking, BookingSummary
+from .serializers import (BookingSerializer,
+                          AdminBookingSummarySerializer,
+                          BOOKING_SUMMARY_PROJECTION,
+                          ADMIN_BOOKING_SUMMARY_PROJECTION)
+
+
+def filter_user_bookings(user, params):
+    """
+    Возвращает бронирования пользователя из витрины BookingSummary с учётом фильтров
+    из query-параметров (`active`, `paid`). Выборка идёт по индексу (user, -booking) без соединений.
+    """
+    is_active = params.get('active', None)
+    is_paid = params.get('paid', None)
+    bookings = BookingSummary.objects.filter(user=user).order_by('-booking')
+    if is_active == 'true':
+        bookings = bookings.filter(status='active')
+    elif is_active == 'false':
+        bookings = bookings.exclude(status='active')
+
+    if is_paid == 'true':
+        # Только оплаченные бронирования
+        bookings = bookings.filter(payment_date__isnull=False)
+    elif is_paid == 'false':
+        # Только неоплаченные бронирования
+        bookings = bookings.filter(payment_date__isnull=True)
+    return bookings
 
 
 class UserBookingView(APIView):
@@ -23,38 +60,30 @@ class UserBookingView(APIView):
         - `?paid=false` — только неоплаченные бронирования.
 
     - POST: создание нового бронирования.
-        Ожидает поля: car_id, parking_place, tariff_id.
+        Ожидает поля: car_id, tariff_id и parking_place_id
+        (или auto_assign=true — место выберет сервер, см. BookingSerializer),
+        необязательное start_time — для бронирования заранее.
         Проверяет:
         - наличие активного бронирования на автомобиль;
         - доступность выбранного парковочного места.
         В случае успеха возвращает ID созданного бронирования.
+        Поддерживает заголовок Idempotency-Key для безопасных повторов запроса.
 
     Ограничения:
     - Только авторизованные пользователи могут обращаться к представлению.
     """
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
 
     def get(self, request):
         """
         Получение списка бронирований пользователя.
+        Строки выбираются проекцией витрины без ModelSerializer (формат BookingSummarySerializer).
         """
-        is_active = request.query_params.get('active', None)
-        is_paid = request.query_params.get('paid', None)
-        bookings = Booking.objects.filter(car__user=request.user)
-        if is_active == 'true':
-            bookings = bookings.filter(status='active').order_by('-id')
-        elif is_active == 'false':
-            bookings = bookings.exclude(status='active').order_by('-id')
-
-        if is_paid == 'true':
-            # Только оплаченные бронирования
-            bookings = bookings.filter(payment__isnull=False).order_by('-id')
-        elif is_paid == 'false':
-            # Только неоплаченные бронирования
-            bookings = bookings.filter(payment__isnull=True).order_by('-id')
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        bookings = project(filter_user_bookings(request.user, request.query_params), BOOKING_SUMMARY_PROJECTION)
+        return Response(bookings, status=status.HTTP_200_OK)
 
+    @idempotent
     def post(self, request):
         """
         Создание бронирования пользователем.
@@ -69,17 +98,29 @@ class UserBookingView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@async_login_required
+async def user_booking_list_async(request):
+    """
+    Асинхронная версия UserBookingView.get с теми же фильтрами.
+    """
+    bookings = await aproject(filter_user_bookings(request.user, request.GET), BOOKING_SUMMARY_PROJECTION)
+    return api_json_response(bookings)
+
+
 class AdminBookingPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
-class AdminBookingListView(ListAPIView):
+class AdminBookingListView(ReplicaReadMixin, ProjectedListMixin, ListAPIView):
     """
     Представление для получения списка всех бронирований администратором.
+    Запросы выполняются на реплике БД (если она настроена),
+    строки выбираются проекцией витрины без ModelSerializer.
     """
-    serializer_class = AdminBookingListSerializer
+    serializer_class = AdminBookingSummarySerializer
+    projection = ADMIN_BOOKING_SUMMARY_PROJECTION
     permission_classes = [IsAuthenticated, IsAdminPermission]
     pagination_class = AdminBookingPagination
 
@@ -87,13 +128,12 @@ class AdminBookingListView(ListAPIView):
         """
         Получает список бронирований с фильтрацией по статусу и поиском.
 
-        - Загружает связанные объекты: автомобиль, парковочное место и тариф.
+        - Читает из витрины BookingSummary (без соединения таблиц).
         - Фильтрует по статусу бронирования (?status=active&status=completed).
         - Поддерживает поиск по email пользователя и номеру автомобиля (?search=example).
         - Сортирует бронирования по убыванию ID (сначала новые).
         """
-        # Базовый queryset с оптимизированной выборкой связанных объектов
-        queryset = Booking.objects.select_related('car', 'parking_place', 'tariff')
+        queryset = BookingSummary.objects.all()
 
         # Фильтрация по статусам (если переданы)
         statuses = self.request.query_params.getlist("status")
@@ -103,8 +143,83 @@ class AdminBookingListView(ListAPIView):
         search = self.request.query_params.get("search")
         if search:
             queryset = queryset.filter(
-                Q(car__user__email__icontains=search) |
-                Q(car__license_plate__icontains=search)
+                Q(user_email__icontains=search) |
+                Q(car_license_plate__icontains=search)
             )
 
-        return queryset.order_by('-id')
+        return queryset.order_by('-booking')
+
+
+class AdminBookingBulkView(APIView):
+    """
+    Массовая отмена или завершение бронирований администратором.
+
+    Тело запроса:
+        - booking_ids: список id бронирований (не более max_bookings).
+        - action: 'cancel' или 'complete'.
+
+    Бронирования проверяются одним запросом под блокировкой строк: если часть из них
+    не найдена или уже не активна, ни одно бронирование не изменяется.
+    Статусы бронирований, витрины BookingSummary и освобождаемых мест обновляются
+    пакетными UPDATE, а клиенты получают по одному событию bookings.change и spots.change.
+    """
+    permission_classes = [IsAuthenticated, IsAdminPermission]
+    max_bookings = 1000
+    actions = {'cancel': 'cancelled', 'complete': 'completed'}
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        new_status = self.actions.get(data.get('action'))
+        if new_status is None:
+            return Response({"error": "Неверное действие. Допустимы только 'cancel' или 'complete'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        booking_ids = data.get('booking_ids')
+        if not isinstance(booking_ids, list) or not booking_ids or not all(isinstance(i, int) for i in booking_ids):
+            return Response({"error": "booking_ids должен быть непустым списком id бронирований."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(booking_ids) > self.max_bookings:
+            return Response({"error": f"За один запрос можно изменить не более {self.max_bookings} бронирований."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        booking_ids = sorted(set(booking_ids))
+
+        with transaction.atomic():
+            rows = list(
+                Booking.objects.filter(id__in=booking_ids)
+                .select_for_update(of=('self',))
+                .values_list('id', 'status', 'car__user_id', 'parking_place_id')
+            )
+            not_found = sorted(set(booking_ids) - {row[0] for row in rows})
+            not_active = sorted(row[0] for row in rows if row[1] != 'active')
+            if not_found or not_active:
+                return Response({
+                    "error": "Операция не выполнена: часть бронирований не найдена или уже не активна.",
+                    "not_found": not_found,
+                    "not_active": not_active,
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            Booking.objects.filter(id__in=booking_ids).update(status=new_status)
+            BookingSummary.objects.filter(booking_id__in=booking_ids).update(status=new_status)
+
+            # Освобождение мест (место могло быть уже занято другим начавшимся бронированием,
+            # закрытые администратором места остаются закрытыми)
+            spot_numbers = {row[3] for row in rows}
+            occupied = Booking.objects.started(timezone.now()).filter(parking_place__in=spot_numbers)
+            released_spots = list(
+                ParkingSpot.objects.filter(spot_number__in=spot_numbers, status='booked')
+                .exclude(spot_number__in=occupied.values('parking_place'))
+                .values_list('spot_number', 'zone_id')
+            )
+            released = sorted(spot_number for spot_number, _ in released_spots)
+            ParkingSpot.objects.filter(spot_number__in=released).update(status='available')
+
+            events = [('bookings.change', bookings_change_event([(row[0], row[2]) for row in rows], new_status))]
+            if released:
+                events.append(('spots.change', spots_change_event(released_spots, 'available')))
+                transaction.on_commit(lambda: sync_spots(released))
+            enqueue_many(events)
+
+        return Response({
+            "updated": len(booking_ids),
+            "booking_ids": booking_ids,
+            "released_spots": released,
+        }, status=status.HTTP_200_OK)
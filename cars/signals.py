@@ -1,7 +1,7 @@
-from asgiref.sync import async_to_sync
 from django.dispatch import receiver
 from django.db.models.signals import post_save
-from realtime.notifications.cars import notify_users_about_car_change
+from realtime.notifications.cars import car_change_event
+from realtime.outbox import enqueue
 from .models import Car
 
 
@@ -12,7 +12,4 @@ def car_change_handler(instance, created, **kwargs):
     else:
         action = 'updated'
 
-    user = instance.user
-
-    _ = user.email
-    async_to_sync(notify_users_about_car_change)(instance, action)
+    enqueue('car.change', car_change_event(instance, action))
@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.db.models import Q
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
@@ -34,7 +35,8 @@ class UserCarListCreateView(APIView):
     def post(self, request):
         serializer = CarSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -59,7 +61,8 @@ class UserCarDeleteView(APIView):
                     {"error": "Нельзя удалить автомобиль с активными бронированиями."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            car.delete()
+            with transaction.atomic():
+                car.delete()
             return Response({"message": "Автомобиль успешно удалён."}, status=status.HTTP_200_OK)
         except Car.DoesNotExist:
             return Response({"error": "Автомобиль не найден или уже удалён."}, status=status.HTTP_404_NOT_FOUND)
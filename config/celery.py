@@ -9,6 +9,8 @@ app = Celery('config')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()  # Автоматически загружаем задачи из всех приложений
 
+from . import task_metrics  # noqa: E402,F401 — телеметрия и профилирование задач (сигналы Celery)
+
 app.conf.beat_schedule = {
     'complete-expired-bookings-every-minute': {
         'task': 'bookings.tasks.manage_expired_and_unpaid_bookings',
@@ -17,4 +19,18 @@ app.conf.beat_schedule = {
             'expires': 60,  
         },
     },
+    'rebuild-availability-index-every-10-minutes': {
+        'task': 'parking_spots.tasks.rebuild_availability_index',
+        'schedule': crontab(minute='*/10'),
+        'options': {
+            'expires': 600,
+        },
+    },
+    'purge-outbox-daily': {
+        'task': 'realtime.tasks.purge_outbox',
+        'schedule': crontab(hour=3, minute=0),
+        'options': {
+            'expires': 3600,
+        },
+    },
 }
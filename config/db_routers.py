@@ -0,0 +1,92 @@
+"""
+Маршрутизация запросов чтения на реплику PostgreSQL.
+
+Реплика подключается через переменные окружения DB_REPLICA_HOST / DB_REPLICA_PORT
+(остальные параметры берутся из основной БД). Если DB_REPLICA_HOST не задан,
+все запросы идут в основную БД. Для локальной проверки достаточно двух экземпляров
+PostgreSQL с потоковой репликацией, например:
+    DB_HOST=localhost DB_PORT=5432 DB_REPLICA_HOST=localhost DB_REPLICA_PORT=5433
+
+На реплику уходят не все чтения, а только явно помеченные: тяжёлые админские списки,
+аналитика и отчёты (см. api.mixins.ReplicaReadMixin и read_from_replica).
+Чтобы пользователь сразу видел собственные изменения (read-your-writes), после
+успешного изменяющего запроса он на REPLICA_PIN_TIME закрепляется за основной БД
+(см. config.middleware.PrimaryPinMiddleware).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA_DB = 'replica'
+PRIMARY_DB = 'default'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB in settings.DATABASES
+
+
+def enable_replica_reads():
+    """
+    Включает чтение с реплики в текущем контексте.
+    Возвращает токен, который нужно передать в reset_replica_reads.
+    """
+    return _use_replica.set(True)
+
+
+def reset_replica_reads(token):
+    _use_replica.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Контекстный менеджер: все чтения внутри блока выполняются на реплике (если она настроена).
+    """
+    token = enable_replica_reads()
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+def _pin_key(user_id):
+    return f'db:primary_pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """
+    Закрепляет пользователя за основной БД после его изменений, чтобы он не прочитал
+    с реплики устаревшие данные, пока она догоняет основную БД.
+    """
+    if user is not None and user.is_authenticated and replica_configured():
+        cache.set(_pin_key(user.pk), 1, timeout=int(settings.REPLICA_PIN_TIME.total_seconds()))
+
+
+def is_pinned_to_primary(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return cache.get(_pin_key(user.pk)) is not None
+
+
+class PrimaryReplicaRouter:
+    """
+    Роутер БД: записи — всегда в основную БД, чтения — на реплику только внутри read_from_replica().
+    """
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured():
+            return REPLICA_DB
+        return PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        # Явно возвращаем основную БД, иначе объект, прочитанный с реплики, сохранился бы на реплику
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
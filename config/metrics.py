@@ -0,0 +1,351 @@
+"""
+Инструментирование HTTP-запросов и задач Celery: время выполнения, время и количество
+SQL-запросов, попадания и промахи кэша, время публикации сообщений в channel layer.
+
+Для HTTP-запросов метрики собираются только для доли METRICS_SAMPLE_RATE (решение
+принимается в начале запроса, см. config.middleware.MetricsMiddleware), для задач
+Celery — для каждого запуска (см. config.task_metrics). Код вне выборки платит только
+за чтение contextvar в обёртках SQL-запросов, кэша и публикации.
+
+Для запросов из выборки в ответ добавляется заголовок Server-Timing (виден в DevTools
+браузера). Агрегаты накапливаются в хэшах Redis, общих для всех процессов, и отдаются
+в текстовом формате Prometheus по адресу /metrics (см. metrics_view).
+
+HTTP-счётчики учитывают только запросы из выборки; доля выборки публикуется
+метрикой parking_metrics_sample_rate.
+"""
+import hmac
+import random
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django_redis import get_redis_connection
+from django_redis.client import DefaultClient
+from redis.exceptions import RedisError
+
+METRICS_PATH = '/metrics'
+HTTP_METRICS_KEY = 'metrics:http'
+TASK_METRICS_KEY = 'metrics:celery'
+TASK_STATUS_KEY = 'metrics:celery:status'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Ошибки хранилища метрик: метрики не должны влиять на запросы и задачи
+# (NotImplementedError — кэш настроен не на Redis)
+STORAGE_ERRORS = (RedisError, NotImplementedError)
+
+# Счётчики, которые накапливаются в Redis: атрибут метрик -> (суффикс метрики Prometheus, описание)
+COUNTERS = {
+    'db_seconds': ('db_duration_seconds_total', 'Время выполнения SQL-запросов.'),
+    'db_queries': ('db_queries_total', 'Количество SQL-запросов.'),
+    'cache_hits': ('cache_hits_total', 'Попадания в кэш.'),
+    'cache_misses': ('cache_misses_total', 'Промахи кэша.'),
+    'publish_seconds': ('channel_publish_duration_seconds_total', 'Время публикации сообщений в channel layer.'),
+    'publishes': ('channel_publish_total', 'Количество сообщений, опубликованных в channel layer.'),
+}
+TASK_COUNTERS = {
+    **COUNTERS,
+    'rows': ('rows_total', 'Количество обработанных строк.'),
+    'queue_lag_seconds': ('queue_lag_seconds_total', 'Время ожидания задач в очереди.'),
+}
+
+HTTP_LABELS = ('view', 'method', 'status')
+TASK_LABELS = ('task', 'state')
+
+_current = ContextVar('metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Метрики одного HTTP-запроса из выборки.
+    """
+    __slots__ = ('started', 'db_seconds', 'db_queries', 'cache_hits', 'cache_misses', 'publish_seconds', 'publishes')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.publish_seconds = 0.0
+        self.publishes = 0
+
+    def server_timing(self, duration):
+        """
+        Возвращает значение заголовка Server-Timing (длительности в миллисекундах).
+        """
+        return ', '.join([
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'channels;dur={self.publish_seconds * 1000:.1f};desc="{self.publishes} messages"',
+        ])
+
+
+class TaskMetrics(RequestMetrics):
+    """
+    Метрики одного запуска задачи Celery: дополнительно количество обработанных строк
+    (сообщает сама задача, см. config.task_metrics.record_rows) и время ожидания в очереди.
+    """
+    __slots__ = ('rows', 'queue_lag_seconds')
+
+    def __init__(self, queue_lag_seconds=0.0):
+        super().__init__()
+        self.rows = 0
+        self.queue_lag_seconds = queue_lag_seconds
+
+
+def current_metrics():
+    """
+    Возвращает метрики текущего запроса или задачи (None, если метрики не собираются).
+    """
+    return _current.get()
+
+
+def start_collecting(metrics):
+    """
+    Делает `metrics` текущими для SQL-запросов, кэша и публикаций.
+    Возвращает токен для stop_collecting.
+    """
+    return _current.set(metrics)
+
+
+def stop_collecting(token):
+    _current.reset(token)
+
+
+def start_request(request):
+    """
+    Решает, попадает ли запрос в выборку, и для попавших начинает сбор метрик.
+
+    Возвращает:
+        tuple | None: состояние для finish_request или None, если запрос не в выборке.
+    """
+    if request.path_info == METRICS_PATH or random.random() >= settings.METRICS_SAMPLE_RATE:
+        return None
+    metrics = RequestMetrics()
+    return metrics, start_collecting(metrics)
+
+
+def finish_request(state, response):
+    """
+    Завершает сбор метрик запроса: добавляет заголовок Server-Timing и возвращает
+    метрики с длительностью запроса для сохранения (store_request).
+    """
+    metrics, token = state
+    stop_collecting(token)
+    duration = time.perf_counter() - metrics.started
+    response['Server-Timing'] = metrics.server_timing(duration)
+    return metrics, duration
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def _store(key, labels, metrics, duration, counters):
+    """
+    Добавляет длительность и счётчики к агрегатам в хэше Redis одной транзакцией.
+    """
+    labels = '|'.join(labels)
+    pipe = _connection().pipeline(transaction=True)
+    pipe.hincrby(key, f'{labels}|count', 1)
+    pipe.hincrbyfloat(key, f'{labels}|seconds', duration)
+    for bucket in LATENCY_BUCKETS:
+        if duration <= bucket:
+            pipe.hincrby(key, f'{labels}|le:{bucket}', 1)
+    for name in counters:
+        value = getattr(metrics, name)
+        if value:
+            pipe.hincrbyfloat(key, f'{labels}|{name}', value)
+    pipe.execute()
+
+
+def store_request(request, response, metrics, duration):
+    """
+    Добавляет метрики HTTP-запроса к агрегатам в Redis.
+    """
+    match = request.resolver_match
+    view = match.view_name if match else 'unmatched'
+    try:
+        _store(HTTP_METRICS_KEY, (view, request.method, f'{response.status_code // 100}xx'),
+               metrics, duration, COUNTERS)
+    except STORAGE_ERRORS:
+        pass
+
+
+def store_task(task_name, state, metrics, duration):
+    """
+    Добавляет метрики запуска задачи к агрегатам в Redis и запоминает время
+    последнего успешного запуска.
+    """
+    try:
+        _store(TASK_METRICS_KEY, (task_name, state), metrics, duration, TASK_COUNTERS)
+        if state == 'SUCCESS':
+            _connection().hset(TASK_STATUS_KEY, f'{task_name}|last_success', time.time())
+    except STORAGE_ERRORS:
+        pass
+
+
+def count_expired_task(task_name):
+    """
+    Учитывает задачу, которая не была выполнена, потому что истёк её срок (expires).
+    """
+    try:
+        _connection().hincrby(TASK_STATUS_KEY, f'{task_name}|expired', 1)
+    except STORAGE_ERRORS:
+        pass
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL-запросов (connection.execute_wrappers), учитывающая
+    время и количество запросов, если метрики собираются.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_seconds += time.perf_counter() - started
+        metrics.db_queries += 1
+
+
+def _install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorder():
+    """
+    Подключает record_query к уже открытым и ко всем новым соединениям с БД.
+    """
+    connection_created.connect(_install_query_recorder, dispatch_uid='config.metrics.record_query')
+    for connection in connections.all(initialized_only=True):
+        _install_query_recorder(connection)
+
+
+def record_cache(hits, misses):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def record_publish(seconds):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.publish_seconds += seconds
+        metrics.publishes += 1
+
+
+_MISSING = object()
+
+
+class InstrumentedRedisClient(DefaultClient):
+    """
+    Клиент django-redis, учитывающий попадания и промахи кэша в метриках.
+    Подключается в CACHES через OPTIONS['CLIENT_CLASS'].
+    """
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, default=_MISSING, version=version, client=client)
+        if value is _MISSING:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, client=client)
+        record_cache(len(values), len(keys) - len(values))
+        return values
+
+
+def _read(key):
+    """
+    Читает хэш агрегатов: {метки: {поле: значение}}.
+    """
+    series = {}
+    for field, value in _connection().hgetall(key).items():
+        labels, name = field.decode().rsplit('|', 1)
+        series.setdefault(labels, {})[name] = float(value)
+    return dict(sorted(series.items()))
+
+
+def _number(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _label_set(names, labels, extra=''):
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, labels.split('|')))
+    return f'{{{pairs}{extra}}}'
+
+
+def _render_histogram(lines, metric, description, names, series):
+    lines.append(f'# HELP {metric} {description}')
+    lines.append(f'# TYPE {metric} histogram')
+    for labels, values in series.items():
+        count = _number(values.get('count', 0.0))
+        for bucket in LATENCY_BUCKETS:
+            le = f',le="{bucket}"'
+            lines.append(f'{metric}_bucket{_label_set(names, labels, le)} {_number(values.get(f"le:{bucket}", 0.0))}')
+        le = ',le="+Inf"'
+        lines.append(f'{metric}_bucket{_label_set(names, labels, le)} {count}')
+        lines.append(f'{metric}_sum{_label_set(names, labels)} {_number(values.get("seconds", 0.0))}')
+        lines.append(f'{metric}_count{_label_set(names, labels)} {count}')
+
+
+def _render_series(lines, metric, metric_type, description, names, series, field):
+    lines.append(f'# HELP {metric} {description}')
+    lines.append(f'# TYPE {metric} {metric_type}')
+    for labels, values in series.items():
+        if field in values:
+            lines.append(f'{metric}{_label_set(names, labels)} {_number(values[field])}')
+
+
+def render_metrics():
+    """
+    Возвращает накопленные метрики в текстовом формате Prometheus.
+    """
+    lines = [
+        '# HELP parking_metrics_sample_rate Доля HTTP-запросов, для которых собираются метрики.',
+        '# TYPE parking_metrics_sample_rate gauge',
+        f'parking_metrics_sample_rate {_number(float(settings.METRICS_SAMPLE_RATE))}',
+    ]
+
+    http = _read(HTTP_METRICS_KEY)
+    _render_histogram(lines, 'parking_http_request_duration_seconds', 'Время обработки запроса.', HTTP_LABELS, http)
+    for name, (suffix, description) in COUNTERS.items():
+        _render_series(lines, f'parking_http_{suffix}', 'counter', description, HTTP_LABELS, http, name)
+
+    tasks = _read(TASK_METRICS_KEY)
+    _render_histogram(lines, 'parking_celery_task_duration_seconds', 'Время выполнения задачи.', TASK_LABELS, tasks)
+    for name, (suffix, description) in TASK_COUNTERS.items():
+        _render_series(lines, f'parking_celery_task_{suffix}', 'counter', description, TASK_LABELS, tasks, name)
+
+    status = _read(TASK_STATUS_KEY)
+    _render_series(lines, 'parking_celery_task_expired_total', 'counter',
+                   'Задачи, не выполненные из-за истечения срока (expires).', ('task',), status, 'expired')
+    _render_series(lines, 'parking_celery_task_last_success_timestamp_seconds', 'gauge',
+                   'Время последнего успешного выполнения задачи (Unix time).', ('task',), status, 'last_success')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Отдаёт метрики для Prometheus. Требуется заголовок `Authorization: Bearer <METRICS_TOKEN>`;
+    если METRICS_TOKEN не задан, доступ к метрикам закрыт.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=403)
+    try:
+        body = render_metrics()
+    except STORAGE_ERRORS:
+        return HttpResponse('Хранилище метрик недоступно', status=503, content_type='text/plain; charset=utf-8')
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
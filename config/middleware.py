@@ -0,0 +1,114 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+from .db_routers import pin_to_primary, replica_configured
+from .metrics import install_query_recorder, start_request, finish_request, store_request
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware с поддержкой асинхронного режима.
+
+    Стандартный middleware WhiteNoise только синхронный, из-за чего Django под ASGI
+    выполняет каждый запрос (в том числе к асинхронным представлениям) в отдельном потоке.
+    Здесь поиск статического файла выполняется в цикле событий, а в поток
+    выносится только отдача найденного файла.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class PrimaryPinMiddleware:
+    """
+    После успешного изменяющего запроса закрепляет пользователя за основной БД
+    (read-your-writes при чтении с реплики, см. config.db_routers).
+
+    Пользователь берётся из request.user после выполнения представления:
+    DRF записывает туда пользователя, аутентифицированного по JWT.
+    Запросы только на чтение, выполняемые не безопасным методом (например, отчёт
+    по POST в ReplicaReadMixin), помечаются request.replica_read и не закрепляют.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._should_pin(request, response):
+            pin_to_primary(request.user)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._should_pin(request, response):
+            await sync_to_async(pin_to_primary)(request.user)
+        return response
+
+    @staticmethod
+    def _should_pin(request, response):
+        return (
+            replica_configured()
+            and request.method not in SAFE_METHODS
+            and not getattr(request, 'replica_read', False)
+            and response.status_code < 400
+        )
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики для доли запросов METRICS_SAMPLE_RATE (см. config.metrics):
+    время обработки, время и количество SQL-запросов, попадания в кэш и время
+    публикации в channel layer. Для запросов из выборки добавляет заголовок Server-Timing.
+
+    Должен стоять первым в MIDDLEWARE, чтобы учитывать время всех остальных middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_query_recorder()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = start_request(request)
+        response = self.get_response(request)
+        if state is not None:
+            store_request(request, response, *finish_request(state, response))
+        return response
+
+    async def __acall__(self, request):
+        state = start_request(request)
+        response = await self.get_response(request)
+        if state is not None:
+            metrics, duration = finish_request(state, response)
+            await sync_to_async(store_request, thread_sensitive=False)(request, response, metrics, duration)
+        return response
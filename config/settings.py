@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'api',
     'cars',
     'tariffs',
@@ -65,25 +66,47 @@ INSTALLED_APPS = [
 
 ASGI_APPLICATION = "config.asgi.application"
 
+# Channel layer. CHANNEL_LAYER_BACKEND выбирает реализацию:
+# - 'core' (по умолчанию) — RedisChannelLayer: сообщение группы копируется в очередь каждого участника;
+# - 'pubsub' — RedisPubSubChannelLayer: группа — канал Redis PUBLISH/SUBSCRIBE, сообщение
+#   получают только процессы Daphne, в которых есть участники группы. Включается явно.
+# В CHANNEL_REDIS_HOSTS через запятую можно перечислить несколько экземпляров Redis —
+# каналы и группы распределяются между ними по хешу имени.
+CHANNEL_LAYER_BACKENDS = {
+    'core': 'channels_redis.core.RedisChannelLayer',
+    'pubsub': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+}
+CHANNEL_LAYER_BACKEND = os.getenv('CHANNEL_LAYER_BACKEND', 'core')
+CHANNEL_REDIS_HOSTS = [host for host in os.getenv('CHANNEL_REDIS_HOSTS', '').split(',') if host] \
+    or [os.getenv('CELERY_BROKER_URL')]
+
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "BACKEND": CHANNEL_LAYER_BACKENDS[CHANNEL_LAYER_BACKEND],
         "CONFIG": {
-            "hosts": [os.getenv('CELERY_BROKER_URL')],
+            "hosts": CHANNEL_REDIS_HOSTS,
         },
     },
 }
 
+# Обновления мест публикуются в группы сегментов по PARKING_SPOT_GROUP_SIZE номеров
+# (см. realtime/groups.py). Подписка шире PARKING_SPOT_MAX_GROUPS сегментов
+# заменяется подпиской на общую группу.
+PARKING_SPOT_GROUP_SIZE = int(os.getenv('PARKING_SPOT_GROUP_SIZE', '50'))
+PARKING_SPOT_MAX_GROUPS = 20
+
 MIDDLEWARE = [
+    'config.middleware.MetricsMiddleware',  # метрики и Server-Timing для выборки запросов (см. config/metrics.py)
     'axes.middleware.AxesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise, не блокирующий асинхронные представления
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.middleware.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -112,6 +135,12 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Профилирование задач Celery (см. config/task_metrics.py)
+TASK_PROFILE_TASKS = [name for name in os.getenv('TASK_PROFILE_TASKS', '').split(',') if name]  # '*' — все задачи
+TASK_PROFILE_THRESHOLD = float(os.getenv('TASK_PROFILE_THRESHOLD', '5'))  # секунд; более быстрые запуски не сохраняются
+TASK_PROFILER = os.getenv('TASK_PROFILER', 'cprofile')  # 'cprofile' или 'pyinstrument'
+TASK_PROFILE_KEEP = 20  # сколько последних профилей хранить для каждой задачи
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 AUTHENTICATION_BACKENDS = [
@@ -141,6 +170,18 @@ DATABASES = {
     }
 }
 
+# Реплика для тяжёлых админских чтений и отчётов (см. config/db_routers.py)
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['config.db_routers.PrimaryReplicaRouter']
+REPLICA_PIN_TIME = timedelta(seconds=10)  # сколько читать из основной БД после собственных изменений
+
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.Argon2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',
@@ -190,8 +231,33 @@ CACHES = {
         'BACKEND': 'django_redis.cache.RedisCache',
         'LOCATION': os.getenv('REDIS_URL'),
         'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'CLIENT_CLASS': 'config.metrics.InstrumentedRedisClient',  # учитывает попадания в кэш в метриках
         },
         'TIMEOUT': None,  # Данные будут сохраняться на неопределенное время
     }
-}
\ No newline at end of file
+}
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)  # время хранения ответов для заголовка Idempotency-Key
+BOOKING_MAX_ADVANCE = timedelta(days=30)  # насколько заранее можно бронировать место
+
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', '0.05'))  # доля запросов, для которых собираются метрики
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # /metrics требует заголовок Authorization: Bearer <token>; без токена закрыт
+
+# Размер буфера событий WebSocket-лент в Redis для переподключения клиентов (см. realtime/events.py)
+REALTIME_EVENT_BUFFER = int(os.getenv('REALTIME_EVENT_BUFFER', '1000'))
+# Окно накопления событий для пакетной отправки по WebSocket (?batch=1), см. realtime/consumers/mixins.py
+REALTIME_FLUSH_WINDOW_MS = int(os.getenv('REALTIME_FLUSH_WINDOW_MS', '100'))
+# SSE-потоки (см. realtime/sse.py): интервал heartbeat и максимальная длительность потока в секундах,
+# задержка переподключения клиента в миллисекундах
+REALTIME_SSE_HEARTBEAT = 15
+REALTIME_SSE_MAX_AGE = 300
+REALTIME_SSE_RETRY_MS = 2000
+
+# Transactional outbox (см. realtime/outbox.py): размер пакета relay_outbox, интервал опроса
+# пустой очереди и пауза после ошибки рассылки (в секундах), число попыток рассылки события
+# до переноса в отложенные (dead letter), срок хранения разосланных событий
+OUTBOX_BATCH_SIZE = 200
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '0.1'))
+OUTBOX_ERROR_DELAY = 1.0
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETENTION = timedelta(days=7)
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Профиль настроек для продакшена (docker-compose).
+
+Отличается от config.settings только параметрами подключения к PostgreSQL
+(основной БД и реплики, если она настроена),
+которые задаются отдельно для каждого сервиса через переменные окружения:
+
+- DB_CONN_MAX_AGE: время жизни постоянного соединения в секундах (0 — новое соединение на запрос).
+  Для Celery-воркеров соединение переиспользуется между задачами.
+  Для Daphne (ASGI) постоянные соединения не используются: синхронный код выполняется
+  в потоках, создаваемых на каждый запрос, и соединения не переживают запрос.
+  Вместо этого web подключается к БД через PgBouncer в режиме transaction pooling.
+- DB_PGBOUNCER: true, если подключение идёт через PgBouncer в режиме transaction pooling
+  (отключает server-side курсоры, которые несовместимы с этим режимом).
+- DB_CONNECT_TIMEOUT: таймаут установки соединения в секундах.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, os
+
+for database in DATABASES.values():
+    database.update({
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,  # проверка соединения перед переиспользованием в новом запросе/задаче
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER', 'false').lower() == 'true',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            # TCP keepalive, чтобы долгоживущие соединения воркеров не обрывались молча
+            'keepalives': 1,
+            'keepalives_idle': 30,
+            'keepalives_interval': 10,
+            'keepalives_count': 5,
+        },
+    })
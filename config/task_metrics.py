@@ -0,0 +1,165 @@
+"""
+Телеметрия и профилирование задач Celery.
+
+Для каждого запуска задачи собираются (см. config.metrics):
+- время выполнения и итоговое состояние (SUCCESS, FAILURE, RETRY);
+- время и количество SQL-запросов, попадания в кэш и публикации в channel layer;
+- количество обработанных строк — задача сообщает его сама через record_rows;
+- время ожидания в очереди — от публикации задачи (заголовок published_at,
+  добавляется при отправке) или от её ETA до начала выполнения.
+
+Кроме того, учитываются задачи, пропущенные из-за истечения срока (expires), и время
+последнего успешного запуска, поэтому пропуск периодических запусков виден по метрикам
+parking_celery_task_expired_total и parking_celery_task_last_success_timestamp_seconds.
+
+Профилирование включается для задач из TASK_PROFILE_TASKS ('*' — все задачи).
+Если запуск длился дольше TASK_PROFILE_THRESHOLD, профиль сохраняется в хранилище
+файлов (MEDIA_ROOT/task_profiles/<задача>/) и доступен администратору через API
+(см. analytics.views.TaskProfileListView). Профилировщик задаётся TASK_PROFILER:
+'cprofile' (файл .prof для pstats/snakeviz) или 'pyinstrument' (HTML-отчёт,
+пакет pyinstrument нужно установить отдельно).
+"""
+import cProfile
+import marshal
+import time
+from datetime import datetime
+from celery.signals import (before_task_publish, task_prerun, task_postrun, task_revoked,
+                            worker_init, worker_process_init)
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from .metrics import (TaskMetrics, current_metrics, start_collecting, stop_collecting,
+                      store_task, count_expired_task, install_query_recorder)
+
+PROFILES_DIR = 'task_profiles'
+
+# task_id -> (метрики, токен contextvar, профилировщик или None)
+_running = {}
+
+
+class CProfileProfiler:
+    extension = 'prof'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self):
+        # Формат pstats.Stats.dump_stats
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+
+class PyinstrumentProfiler:
+    extension = 'html'
+
+    def __init__(self):
+        from pyinstrument import Profiler
+
+        self.profiler = Profiler()
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def dump(self):
+        return self.profiler.output_html().encode()
+
+
+PROFILERS = {
+    'cprofile': CProfileProfiler,
+    'pyinstrument': PyinstrumentProfiler,
+}
+
+
+def record_rows(count):
+    """
+    Добавляет `count` к количеству строк, обработанных текущей задачей.
+    Вне задачи ничего не делает.
+    """
+    metrics = current_metrics()
+    if isinstance(metrics, TaskMetrics):
+        metrics.rows += count
+
+
+def _should_profile(task_name):
+    tasks = settings.TASK_PROFILE_TASKS
+    return '*' in tasks or task_name in tasks
+
+
+def _queue_lag(request):
+    """
+    Возвращает время ожидания задачи в очереди в секундах (0, если время публикации неизвестно).
+
+    Время публикации берётся из заголовка published_at (см. add_published_at) в request.headers.
+    В протоколе сообщений Celery 2 воркер переносит пользовательские заголовки в атрибуты
+    самого request, а request.headers может быть пустым, поэтому тогда заголовок
+    ищется среди атрибутов request.
+    """
+    published_at = (request.headers or {}).get('published_at')
+    if published_at is None:
+        published_at = request.get('published_at')
+    if published_at is None:
+        return 0.0
+    ready_at = float(published_at)
+    if request.eta:
+        ready_at = max(ready_at, datetime.fromisoformat(str(request.eta)).timestamp())
+    return max(0.0, time.time() - ready_at)
+
+
+def save_profile(task_name, task_id, profiler):
+    """
+    Сохраняет профиль запуска и удаляет самые старые профили задачи сверх TASK_PROFILE_KEEP.
+    """
+    directory = f'{PROFILES_DIR}/{task_name}'
+    name = f'{directory}/{timezone.now():%Y%m%d-%H%M%S}-{task_id}.{profiler.extension}'
+    default_storage.save(name, ContentFile(profiler.dump()))
+
+    _, files = default_storage.listdir(directory)
+    for old in sorted(files)[:-settings.TASK_PROFILE_KEEP]:
+        default_storage.delete(f'{directory}/{old}')
+
+
+@worker_init.connect
+@worker_process_init.connect
+def install_worker_query_recorder(**kwargs):
+    install_query_recorder()
+
+
+@before_task_publish.connect
+def add_published_at(headers=None, **kwargs):
+    headers.setdefault('published_at', time.time())
+
+
+@task_prerun.connect
+def start_task_metrics(task_id=None, task=None, **kwargs):
+    metrics = TaskMetrics(queue_lag_seconds=_queue_lag(task.request))
+    profiler = PROFILERS[settings.TASK_PROFILER]() if _should_profile(task.name) else None
+    _running[task_id] = (metrics, start_collecting(metrics), profiler)
+
+
+@task_postrun.connect
+def finish_task_metrics(task_id=None, task=None, state=None, **kwargs):
+    running = _running.pop(task_id, None)
+    if running is None:
+        return
+    metrics, token, profiler = running
+    stop_collecting(token)
+    duration = time.perf_counter() - metrics.started
+
+    if profiler is not None:
+        profiler.stop()
+        if duration >= settings.TASK_PROFILE_THRESHOLD:
+            save_profile(task.name, task_id, profiler)
+
+    store_task(task.name, state or 'UNKNOWN', metrics, duration)
+
+
+@task_revoked.connect
+def count_expired(request=None, expired=False, **kwargs):
+    if expired:
+        count_expired_task(request.name)
@@ -3,6 +3,7 @@ from django.contrib import admin
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from .metrics import metrics_view
 
 
 schema_view = get_schema_view(
@@ -26,6 +27,8 @@ urlpatterns = [
     path('access/', include('qr_access.urls')),
     path('analytics/admin/', include('analytics.urls')),
     path('support/', include('support.urls')),
+    path('realtime/', include('realtime.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,129 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:40
+
+import re
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+# Копия предобработки из parking_maps.processing на момент миграции: миграция не должна
+# зависеть от последующих изменений формата шаблона и индекса мест.
+DEFAULT_FILL = '#FFFFFF'
+
+_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_METADATA = re.compile(r'<metadata\b.*?</metadata>|<metadata\b[^>]*/>', re.DOTALL)
+_BETWEEN_TAGS = re.compile(r'(<text\b[^>]*/>|<text\b.*?</text>)|(?<=>)\s+(?=<)', re.DOTALL)
+_RECT = re.compile(r'<rect\b[^>]*>')
+_SPOT_ID = re.compile(r'\sid="Rectangle (\d+)"')
+_FILL = re.compile(r'\sfill="[^"]*"')
+
+
+def preprocess_svg(content):
+    """
+    Строит шаблон карты и индекс мест (пары (номер места, смещение значения fill)).
+
+    Исключения:
+        ValueError: Файл не в UTF-8, не является SVG, не содержит мест
+        или содержит одно место несколько раз.
+    """
+    try:
+        svg = content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError("Файл карты должен быть в кодировке UTF-8.")
+    svg = _METADATA.sub('', _COMMENT.sub('', svg))
+    svg = _BETWEEN_TAGS.sub(lambda match: match.group(1) or '', svg).strip()
+    if '<svg' not in svg:
+        raise ValueError("Файл не содержит элемента <svg>.")
+
+    parts = []
+    index = []
+    seen = set()
+    length = 0
+    position = 0
+    for match in _RECT.finditer(svg):
+        spot_id = _SPOT_ID.search(match.group())
+        if spot_id is None:
+            continue
+        spot_number = int(spot_id.group(1))
+        if spot_number in seen:
+            raise ValueError(f"Место {spot_number} встречается на карте несколько раз.")
+        seen.add(spot_number)
+
+        tag = _FILL.sub('', match.group())
+        chunk = svg[position:match.start()] + '<rect fill="'
+        parts.append(chunk)
+        length += len(chunk)
+        index.append([spot_number, length])
+        tail = DEFAULT_FILL + '"' + tag[len('<rect'):]
+        parts.append(tail)
+        length += len(tail)
+        position = match.end()
+
+    if not index:
+        raise ValueError("На карте нет мест (элементов <rect id=\"Rectangle <номер>\">).")
+    parts.append(svg[position:])
+    return ''.join(parts), index
+
+
+def preprocess_existing_maps(apps, schema_editor):
+    """
+    Предобрабатывает уже загруженные карты, чтобы последняя из них осталась активной.
+    Сверка мест с ParkingSpot для старых карт не выполняется.
+    """
+    ParkingMap = apps.get_model('parking_maps', 'ParkingMap')
+    for parking_map in ParkingMap.objects.order_by('pk').iterator():
+        try:
+            with parking_map.svg_file.open('rb') as file:
+                template, spot_index = preprocess_svg(file.read())
+        except (ValueError, OSError) as e:
+            parking_map.status = 'failed'
+            parking_map.error = str(e)[:500]
+        else:
+            parking_map.template.save(f'{parking_map.pk}.svg', ContentFile(template.encode('utf-8')), save=False)
+            parking_map.spot_index = spot_index
+            parking_map.status = 'ready'
+            parking_map.activated_at = parking_map.uploaded_at
+        parking_map.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_maps', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parkingmap',
+            name='activated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='parkingmap',
+            name='error',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='parkingmap',
+            name='report',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='parkingmap',
+            name='spot_index',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='parkingmap',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Обрабатывается'), ('ready', 'Готова'), ('failed', 'Ошибка обработки')], default='processing', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='parkingmap',
+            name='template',
+            field=models.FileField(blank=True, null=True, upload_to='parking_maps/templates/'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingmap',
+            index=models.Index(condition=models.Q(('status', 'ready')), fields=['-activated_at'], name='parking_map_active_idx'),
+        ),
+        migrations.RunPython(preprocess_existing_maps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:42
+
+import hashlib
+from django.db import migrations, models
+
+
+def fill_template_hash(apps, schema_editor):
+    """
+    Заполняет хеш шаблона у уже обработанных карт.
+    """
+    ParkingMap = apps.get_model('parking_maps', 'ParkingMap')
+    for parking_map in ParkingMap.objects.filter(status='ready').iterator():
+        with parking_map.template.open('rb') as file:
+            parking_map.template_hash = hashlib.sha256(file.read()).hexdigest()[:16]
+        parking_map.save(update_fields=['template_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_maps', '0002_preprocessing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parkingmap',
+            name='template_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(fill_template_hash, migrations.RunPython.noop),
+    ]
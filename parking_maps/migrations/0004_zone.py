@@ -0,0 +1,28 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_spots', '0002_parking_zone'),
+        ('parking_maps', '0003_template_hash'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='parkingmap',
+            name='parking_map_active_idx',
+        ),
+        migrations.AddField(
+            model_name='parkingmap',
+            name='zone',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='maps', to='parking_spots.parkingzone'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingmap',
+            index=models.Index(condition=models.Q(('status', 'ready')), fields=['zone', '-activated_at'], name='parking_map_zone_active_idx'),
+        ),
+    ]
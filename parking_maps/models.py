@@ -1,5 +1,25 @@
 from django.db import models
 from api.models import CustomUser
+from parking_spots.models import ParkingZone
+
+
+class ParkingMapQuerySet(models.QuerySet):
+    def active(self, zone=None):
+        """
+        Возвращает активную карту зоны (без зоны — общую карту парковки) —
+        последнюю успешно обработанную. Пока новая карта обрабатывается,
+        активной остаётся предыдущая.
+
+        Исключения:
+            ParkingMap.DoesNotExist: Обработанных карт нет.
+        """
+        return self.select_related('zone').filter(status='ready', zone=zone).latest('activated_at')
+
+    async def aactive(self, zone=None):
+        """
+        Асинхронная версия active().
+        """
+        return await self.select_related('zone').filter(status='ready', zone=zone).alatest('activated_at')
 
 
 class ParkingMap(models.Model):
@@ -14,9 +34,41 @@ class ParkingMap(models.Model):
         svg_file (File): Загружаемый SVG-файл с изображением карты.
         uploaded_by (CustomUser): Пользователь, загрузивший карту. Может быть null, если пользователь удалён.
         uploaded_at (datetime): Дата и время загрузки карты.
+        zone (ParkingZone, optional): Зона (уровень, площадка), которую изображает карта.
+            Карта без зоны — общая карта парковки.
+        status (str): Состояние предобработки: 'processing', 'ready' или 'failed'.
+        error (str): Причина, по которой карту не удалось обработать.
+        template (File): Предобработанный SVG-шаблон (см. parking_maps/processing.py).
+        template_hash (str): Хеш содержимого шаблона (версия геометрии карты).
+        spot_index (list): Пары (номер места, смещение значения fill в шаблоне).
+        report (dict): Результат сверки мест карты с ParkingSpot.
+        activated_at (datetime): Время окончания обработки. Активной считается
+            обработанная карта с наибольшим activated_at (см. ParkingMapQuerySet.active).
     """
+    STATUSES = [
+        ('processing', 'Обрабатывается'),
+        ('ready', 'Готова'),
+        ('failed', 'Ошибка обработки'),
+    ]
+
     name = models.CharField(max_length=50)
     description = models.CharField(max_length=500, null=True, blank=True)
     svg_file = models.FileField(upload_to='parking_maps/')
     uploaded_by = models.ForeignKey(CustomUser, null=True, on_delete=models.SET_NULL, related_name='maps')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    zone = models.ForeignKey(ParkingZone, null=True, blank=True, on_delete=models.PROTECT, related_name='maps')
+    status = models.CharField(max_length=20, choices=STATUSES, default='processing')
+    error = models.CharField(max_length=500, blank=True, default='')
+    template = models.FileField(upload_to='parking_maps/templates/', null=True, blank=True)
+    template_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    spot_index = models.JSONField(default=list, blank=True)
+    report = models.JSONField(default=dict, blank=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ParkingMapQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['zone', '-activated_at'], condition=models.Q(status='ready'),
+                         name='parking_map_zone_active_idx'),
+        ]
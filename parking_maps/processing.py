@@ -0,0 +1,170 @@
+"""
+Предобработка загруженных SVG-карт парковки.
+
+Исходный SVG (часто многомегабайтный экспорт из CAD) разбирается один раз при загрузке:
+- из него удаляются комментарии, блоки <metadata> и пробелы между тегами
+  (кроме содержимого <text>, где пробелы между <tspan> видны на карте);
+- у каждого элемента <rect id="Rectangle <n>"> атрибут fill приводится к цвету по умолчанию
+  (DEFAULT_FILL), при отсутствии атрибут добавляется;
+- строится индекс мест: пары (номер места, смещение значения fill в шаблоне).
+
+При выдаче карты цвета подставляются по смещениям индекса (см. render_template),
+без повторного разбора SVG. Шаблон без раскраски служит и статической геометрией карты
+для клиентов, раскрашивающих её сами по вектору статусов (см. status_vector).
+"""
+import hashlib
+import re
+from functools import lru_cache
+from django.core.files.storage import default_storage
+from realtime.binary import NO_SPOT, STATUS_CODES
+
+DEFAULT_FILL = '#FFFFFF'
+
+STATUS_COLORS = {
+    'available': '#99CB62',
+    'booked': '#F09686',
+    'unavailable': '#EEEEB9',
+}
+
+# Все цвета одной длины: при подстановке заменяются ровно FILL_LENGTH символов шаблона
+FILL_LENGTH = len(DEFAULT_FILL)
+
+_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_METADATA = re.compile(r'<metadata\b.*?</metadata>|<metadata\b[^>]*/>', re.DOTALL)
+# Пробелы между тегами; элементы <text> (группа 1) пропускаются целиком
+_BETWEEN_TAGS = re.compile(r'(<text\b[^>]*/>|<text\b.*?</text>)|(?<=>)\s+(?=<)', re.DOTALL)
+_RECT = re.compile(r'<rect\b[^>]*>')
+_SPOT_ID = re.compile(r'\sid="Rectangle (\d+)"')
+_FILL = re.compile(r'\sfill="[^"]*"')
+
+
+class MapProcessingError(Exception):
+    """
+    SVG-файл нельзя использовать как карту парковки.
+    """
+
+
+def get_color_by_status(status):
+    """
+    Возвращает цвет в зависимости от статуса парковочного места.
+    """
+    return STATUS_COLORS.get(status, DEFAULT_FILL)
+
+
+def minify_svg(content):
+    """
+    Удаляет из SVG комментарии, блоки <metadata> и пробельные символы между тегами.
+
+    Внутри элементов <text> пробелы между тегами сохраняются: между соседними <tspan>
+    они отображаются как пробелы в подписи.
+    """
+    content = _COMMENT.sub('', content)
+    content = _METADATA.sub('', content)
+    return _BETWEEN_TAGS.sub(lambda match: match.group(1) or '', content).strip()
+
+
+def preprocess_svg(content):
+    """
+    Строит шаблон карты и индекс мест по содержимому SVG-файла.
+
+    Аргументы:
+        content (bytes): Исходный SVG-файл.
+
+    Возвращает:
+        tuple[str, list[list[int]]]: Шаблон и пары (номер места, смещение значения fill),
+        упорядоченные по смещению.
+
+    Исключения:
+        MapProcessingError: Файл не в UTF-8, не является SVG, не содержит мест
+        или содержит одно место несколько раз.
+    """
+    try:
+        svg = content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise MapProcessingError("Файл карты должен быть в кодировке UTF-8.")
+    svg = minify_svg(svg)
+    if '<svg' not in svg:
+        raise MapProcessingError("Файл не содержит элемента <svg>.")
+
+    parts = []
+    index = []
+    seen = set()
+    duplicates = set()
+    length = 0
+    position = 0
+    for match in _RECT.finditer(svg):
+        spot_id = _SPOT_ID.search(match.group())
+        if spot_id is None:
+            continue
+        spot_number = int(spot_id.group(1))
+        if spot_number in seen:
+            duplicates.add(spot_number)
+            continue
+        seen.add(spot_number)
+
+        # Тег с fill, приведённым к DEFAULT_FILL и стоящим сразу после имени тега
+        tag = _FILL.sub('', match.group())
+        chunk = svg[position:match.start()] + '<rect fill="'
+        parts.append(chunk)
+        length += len(chunk)
+        index.append([spot_number, length])
+        tail = DEFAULT_FILL + '"' + tag[len('<rect'):]
+        parts.append(tail)
+        length += len(tail)
+        position = match.end()
+
+    if duplicates:
+        numbers = ', '.join(str(n) for n in sorted(duplicates)[:20])
+        raise MapProcessingError(f"Места встречаются на карте несколько раз: {numbers}.")
+    if not index:
+        raise MapProcessingError("На карте нет мест (элементов <rect id=\"Rectangle <номер>\">).")
+    parts.append(svg[position:])
+    return ''.join(parts), index
+
+
+def render_template(template, spot_index, statuses):
+    """
+    Подставляет в шаблон цвета мест по их статусам.
+
+    Аргументы:
+        template (str): Шаблон карты (см. preprocess_svg).
+        spot_index (list): Пары (номер места, смещение значения fill).
+        statuses (dict): Статусы мест по номерам. Места без статуса остаются DEFAULT_FILL.
+
+    Возвращает:
+        str: SVG-карта с раскраской по статусам.
+    """
+    parts = []
+    position = 0
+    for spot_number, offset in spot_index:
+        parts.append(template[position:offset])
+        parts.append(get_color_by_status(statuses.get(spot_number)))
+        position = offset + FILL_LENGTH
+    parts.append(template[position:])
+    return ''.join(parts)
+
+
+def template_hash(template):
+    """
+    Возвращает хеш содержимого шаблона — версию геометрии карты для имени файла и ETag.
+    """
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:16]
+
+
+def status_vector(spot_index, statuses):
+    """
+    Возвращает вектор статусов мест карты: по одной цифре на место в порядке индекса мест.
+    Цифры — коды STATUS_CODES формата spots.bin.v1, NO_SPOT — места нет в БД.
+    """
+    return ''.join(str(STATUS_CODES.get(statuses.get(spot_number), NO_SPOT)) for spot_number, _ in spot_index)
+
+
+@lru_cache(maxsize=32)
+def load_template(name):
+    """
+    Читает шаблон карты из хранилища файлов.
+    Шаблоны не изменяются после обработки, поэтому кэшируются в памяти процесса по имени файла
+    (по одному на зону с активной картой).
+    """
+    with default_storage.open(name) as file:
+        return file.read().decode('utf-8')
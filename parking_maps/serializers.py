@@ -1,12 +1,18 @@
 from rest_framework import serializers
+from parking_spots.models import ParkingZone
 from .models import ParkingMap
 
 
 class ParkingMapSerializer(serializers.ModelSerializer):
+    zone = serializers.SlugRelatedField(
+        slug_field='code', queryset=ParkingZone.objects.all(), required=False, allow_null=True
+    )
+
     class Meta:
         model = ParkingMap
-        fields = ['id', 'name', 'svg_file', 'description', 'uploaded_at', 'uploaded_by']
-        read_only_fields = ['uploaded_at', 'uploaded_by']
+        fields = ['id', 'name', 'svg_file', 'description', 'zone', 'uploaded_at', 'uploaded_by',
+                  'status', 'error', 'report', 'activated_at']
+        read_only_fields = ['uploaded_at', 'uploaded_by', 'status', 'error', 'report', 'activated_at']
 
     def validate_svg_file(self, file):
         """
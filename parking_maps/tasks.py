@@ -0,0 +1,67 @@
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from config.task_metrics import record_rows
+from parking_spots.models import ParkingSpot
+from .models import ParkingMap
+from .processing import MapProcessingError, preprocess_svg, template_hash
+
+# Сколько номеров несовпадающих мест сохранять в отчёте
+REPORT_LIMIT = 100
+
+
+def spots_report(spot_index, zone_id=None):
+    """
+    Сверяет места карты с местами её зоны (для общей карты — со всеми местами) одним запросом.
+
+    Возвращает:
+        dict: Количество мест на карте, места карты, которых нет в зоне (unknown),
+        и места зоны, которых нет на карте (missing).
+    """
+    on_map = {spot_number for spot_number, _ in spot_index}
+    spots = ParkingSpot.objects.all() if zone_id is None else ParkingSpot.objects.filter(zone_id=zone_id)
+    in_db = set(spots.values_list('spot_number', flat=True))
+    unknown = sorted(on_map - in_db)
+    missing = sorted(in_db - on_map)
+    return {
+        'spots': len(on_map),
+        'unknown_count': len(unknown),
+        'unknown': unknown[:REPORT_LIMIT],
+        'missing_count': len(missing),
+        'missing': missing[:REPORT_LIMIT],
+    }
+
+
+@shared_task
+def process_parking_map(map_id):
+    """
+    Предобрабатывает загруженную карту (см. parking_maps/processing.py)
+    и делает её активной после успешной обработки.
+
+    Места карты сверяются с ParkingSpot; несовпадения сохраняются в отчёте карты,
+    но не мешают её активации (места могут добавить позже).
+    """
+    parking_map = ParkingMap.objects.get(pk=map_id)
+    if parking_map.status != 'processing':
+        return parking_map.status
+
+    try:
+        with parking_map.svg_file.open('rb') as file:
+            template, spot_index = preprocess_svg(file.read())
+    except MapProcessingError as e:
+        ParkingMap.objects.filter(pk=map_id).update(status='failed', error=str(e))
+        return 'failed'
+    except Exception:
+        ParkingMap.objects.filter(pk=map_id).update(status='failed', error="Не удалось обработать карту.")
+        raise
+
+    # Имя файла по хешу: геометрия карты отдаётся клиентам как неизменяемый ресурс
+    parking_map.template_hash = template_hash(template)
+    parking_map.template.save(f'{parking_map.template_hash}.svg', ContentFile(template.encode('utf-8')), save=False)
+    parking_map.spot_index = spot_index
+    parking_map.report = spots_report(spot_index, parking_map.zone_id)
+    parking_map.status = 'ready'
+    parking_map.activated_at = timezone.now()
+    parking_map.save(update_fields=['template', 'template_hash', 'spot_index', 'report', 'status', 'activated_at'])
+    record_rows(len(spot_index))
+    return 'ready'
@@ -1,8 +1,17 @@
 from django.urls import path
-from .views import LatestParkingMapView, UploadParkingMapView
+from api.async_views import async_api_view
+from .views import (LatestParkingMapView, UploadParkingMapView, ParkingMapStatusView, ParkingMapGeometryView,
+                    ParkingMapGeometryFileView, ParkingMapStatusVectorView, latest_parking_map_async,
+                    parking_map_status_vector_async)
 
 
 urlpatterns = [
-    path('latest/', LatestParkingMapView.as_view(), name='latest-parking-map'),
+    path('latest/', async_api_view(LatestParkingMapView.as_view(), get=latest_parking_map_async),
+         name='latest-parking-map'),
+    path('latest/geometry/', ParkingMapGeometryView.as_view(), name='latest-parking-map-geometry'),
+    path('latest/statuses/', async_api_view(ParkingMapStatusVectorView.as_view(), get=parking_map_status_vector_async),
+         name='latest-parking-map-statuses'),
+    path('geometry/<slug:template_hash>.svg', ParkingMapGeometryFileView.as_view(), name='parking-map-geometry-file'),
     path('admin/upload/', UploadParkingMapView.as_view(), name='upload-parking-map'),
+    path('admin/<int:pk>/', ParkingMapStatusView.as_view(), name='parking-map-status'),
 ]
@@ -1,81 +1,250 @@
+import hashlib
+from asgiref.sync import sync_to_async
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from rest_framework.response import Response
-from django.core.exceptions import ObjectDoesNotExist
-import re
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
 from api.permissions import IsAdminPermission
-from parking_spots.models import ParkingSpot
+from api.async_views import api_json_response, async_login_required
+from api.renderers import orjson_dumps
+from parking_spots.models import ParkingSpot, ParkingZone
+from realtime.events import current_seq
 from .models import ParkingMap
+from .processing import load_template, render_template, status_vector
 from .serializers import ParkingMapSerializer
+from .tasks import process_parking_map
 
 
-def get_color_by_status(status):
+def generate_svg_with_status(parking_map, statuses):
     """
-    Возвращает цвет в зависимости от статуса парковочного места.
-    """
-    colors = {
-        'available': '#99CB62',
-        'booked': '#F09686',
-        'unavailable': '#EEEEB9'
-    }
-    return colors.get(status, '#FFFFFF')
+    Генерирует SVG-файл с визуальным отображением статусов парковочных мест.
 
+    Цвета мест подставляются в предобработанный шаблон карты по индексу мест
+    (см. parking_maps/processing.py), исходный SVG при этом не разбирается.
+
+    Аргументы:
+        parking_map (ParkingMap): Активная карта;
+        statuses (dict): Статусы парковочных мест по номерам.
 
-def generate_svg_with_status(latest_map, parking_spots):
+    Возвращает:
+        str: SVG-карта в виде строки.
     """
-    Генерирует SVG-файл с визуальным отображением статусов парковочных мест.
+    template = load_template(parking_map.template.name)
+    return render_template(template, parking_map.spot_index, statuses)
 
-    Для каждого объекта ParkingSpot ищется SVG-элемент <rect> с соответствующим id
-    (в формате 'Rectangle <spot_number>'), и изменяется его атрибут fill на цвет,
-    соответствующий текущему статусу места.
 
-    Аргументы:
-        latest_map (ParkingMap): Последняя загруженная карта с SVG-файлом;
-        parking_spots (QuerySet): Набор объектов ParkingSpot, содержащих информацию о статусе.
+def get_active_map(params):
+    """
+    Возвращает активную карту зоны из параметра запроса `zone` (без параметра — общую карту).
 
     Возвращает:
-        str: Модифицированный SVG-файл в виде строки.
+        tuple[ParkingMap | None, str | None]: Карта и текст ошибки, если зоны с таким кодом нет
+        или у неё нет обработанной карты.
+    """
+    try:
+        zone = ParkingZone.objects.by_code(params.get('zone'))
+    except ParkingZone.DoesNotExist:
+        return None, "Зона не найдена."
+    try:
+        return ParkingMap.objects.active(zone), None
+    except ParkingMap.DoesNotExist:
+        return None, "Карта парковки ещё не загружена."
+
+
+async def aget_active_map(params):
+    """
+    Асинхронная версия get_active_map.
+    """
+    try:
+        zone = await ParkingZone.objects.aby_code(params.get('zone'))
+    except ParkingZone.DoesNotExist:
+        return None, "Зона не найдена."
+    try:
+        return await ParkingMap.objects.aactive(zone), None
+    except ParkingMap.DoesNotExist:
+        return None, "Карта парковки ещё не загружена."
+
+
+def map_spots(parking_map):
+    """
+    Возвращает пары (номер места, статус) для раскраски карты: только места зоны карты
+    (для общей карты — все места), поэтому стоимость запроса зависит от размера зоны.
+    """
+    spots = ParkingSpot.objects.all()
+    if parking_map.zone_id is not None:
+        spots = spots.filter(zone_id=parking_map.zone_id)
+    return spots.values_list('spot_number', 'status')
+
+
+def etag_json_response(request, data):
+    """
+    Возвращает JSON-ответ с ETag по содержимому или 304, если у клиента та же версия
+    (заголовок If-None-Match). Клиент должен перепроверять ответ при каждом запросе (no-cache).
     """
-    svg_content = latest_map.svg_file.read().decode('utf-8')
+    body = orjson_dumps(data)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
-    for spot in parking_spots:
-        color = get_color_by_status(spot.status)
-        spot_id = f'Rectangle {spot.spot_number}'
 
-        reg_exp = re.compile(rf'<rect[^>]*id="{spot_id}"[^>]*fill="[^"]*"', re.DOTALL)
+def geometry_data(parking_map):
+    """
+    Возвращает описание геометрии карты: версию (хеш шаблона), адрес неизменяемого
+    SVG-файла геометрии и номера мест в порядке вектора статусов.
+    """
+    return {
+        "map_id": parking_map.pk,
+        "zone": parking_map.zone.code if parking_map.zone_id is not None else None,
+        "hash": parking_map.template_hash,
+        "url": reverse('parking-map-geometry-file', args=[parking_map.template_hash]),
+        "spot_numbers": [spot_number for spot_number, _ in parking_map.spot_index],
+    }
+
+
+def status_vector_data(parking_map, statuses, seq):
+    """
+    Возвращает вектор статусов мест карты (см. parking_maps.processing.status_vector).
 
-        svg_content = re.sub(
-            reg_exp,
-            lambda match: match.group(0).replace(re.search(r'fill="[^"]*"', match.group(0)).group(), f'fill="{color}"'),
-            svg_content
-        )
-    return svg_content
+    seq — номер последнего события ленты parking_spots на момент чтения статусов:
+    клиент может продолжить обновления через ws/parking_spots?since=<seq>.
+    """
+    return {
+        "map_id": parking_map.pk,
+        "hash": parking_map.template_hash,
+        "seq": seq,
+        "statuses": status_vector(parking_map.spot_index, statuses),
+    }
 
 
 class LatestParkingMapView(APIView):
     """
-    Представление для получения последней SVG-карты парковки с раскраской по статусу мест.
+    Представление для получения активной SVG-карты парковки с раскраской по статусу мест.
+    Активной считается последняя успешно обработанная карта (см. ParkingMapQuerySet.active).
+    Параметр `zone` (код зоны) выбирает карту зоны (уровня, площадки); без него
+    возвращается общая карта парковки.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        try:
-            latest_map = ParkingMap.objects.latest('uploaded_at')
-        except ObjectDoesNotExist:
-            return Response(
-                {"error": "Карта парковки ещё не загружена."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        parking_spots = ParkingSpot.objects.all()
-        svg_with_status = generate_svg_with_status(latest_map, parking_spots)
+        latest_map, error = get_active_map(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+        statuses = dict(map_spots(latest_map))
+        svg_with_status = generate_svg_with_status(latest_map, statuses)
         return Response({"svg_content": svg_with_status}, status=status.HTTP_200_OK)
 
 
+@async_login_required
+async def latest_parking_map_async(request):
+    """
+    Асинхронная версия LatestParkingMapView.
+
+    Карта и статусы мест загружаются через асинхронный ORM,
+    чтение шаблона и раскраска карты выполняются в пуле потоков.
+    """
+    latest_map, error = await aget_active_map(request.GET)
+    if error:
+        return api_json_response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    statuses = {spot_number: spot_status
+                async for spot_number, spot_status in map_spots(latest_map)}
+    svg_with_status = await sync_to_async(generate_svg_with_status, thread_sensitive=False)(latest_map, statuses)
+    return api_json_response({"svg_content": svg_with_status})
+
+
+class ParkingMapGeometryView(APIView):
+    """
+    Описание геометрии активной карты (параметр `zone` — как у LatestParkingMapView)
+    для клиентов, раскрашивающих карту сами.
+
+    Сам SVG-файл геометрии (без цветов статусов) доступен по адресу из поля url,
+    который меняется вместе с содержимым файла, поэтому кэшируется клиентом бессрочно.
+    Цвета мест клиент берёт из вектора статусов (ParkingMapStatusVectorView)
+    и обновлений ws/parking_spots.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        latest_map, error = get_active_map(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+        return etag_json_response(request, geometry_data(latest_map))
+
+
+class ParkingMapGeometryFileView(APIView):
+    """
+    SVG-файл геометрии карты по хешу содержимого.
+    Содержимое по одному адресу не меняется, поэтому ответ кэшируется как immutable.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, template_hash):
+        parking_map = ParkingMap.objects.filter(template_hash=template_hash, status='ready').first()
+        if parking_map is None:
+            return Response({"error": "Геометрия карты не найдена."}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = f'"{template_hash}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = FileResponse(default_storage.open(parking_map.template.name), content_type='image/svg+xml')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
+
+class ParkingMapStatusVectorView(APIView):
+    """
+    Вектор статусов мест активной карты (параметр `zone` — как у LatestParkingMapView):
+    строка из кодов статусов (по одной цифре на место)
+    в порядке spot_numbers из описания геометрии. Занимает около байта на место
+    вместо полной SVG-карты с раскраской.
+
+    Поле hash указывает версию геометрии: при его изменении клиент перезагружает геометрию.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        latest_map, error = get_active_map(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+        seq = current_seq('parking_spots')
+        statuses = dict(map_spots(latest_map))
+        return etag_json_response(request, status_vector_data(latest_map, statuses, seq))
+
+
+@async_login_required
+async def parking_map_status_vector_async(request):
+    """
+    Асинхронная версия ParkingMapStatusVectorView.
+    """
+    latest_map, error = await aget_active_map(request.GET)
+    if error:
+        return api_json_response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    seq = await sync_to_async(current_seq, thread_sensitive=False)('parking_spots')
+    statuses = {spot_number: spot_status
+                async for spot_number, spot_status in map_spots(latest_map)}
+    return etag_json_response(request, status_vector_data(latest_map, statuses, seq))
+
+
 class UploadParkingMapView(APIView):
     """
     Добавление карты парковки в формате SVG администратором.
+
+    Карта сохраняется в состоянии 'processing' и предобрабатывается фоновой задачей
+    process_parking_map. До окончания обработки клиенты получают предыдущую карту;
+    состояние обработки доступно через ParkingMapStatusView.
     """
     permission_classes = [IsAuthenticated, IsAdminPermission]
     parser_classes = (MultiPartParser, FormParser)
@@ -83,6 +252,22 @@ class UploadParkingMapView(APIView):
     def post(self, request):
         serializer = ParkingMapSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            parking_map = serializer.save()
+            transaction.on_commit(lambda: process_parking_map.delay(parking_map.pk))
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ParkingMapStatusView(APIView):
+    """
+    Получение администратором состояния обработки загруженной карты
+    (status, error и отчёт о сверке мест карты с ParkingSpot).
+    """
+    permission_classes = [IsAuthenticated, IsAdminPermission]
+
+    def get(self, request, pk):
+        try:
+            parking_map = ParkingMap.objects.get(pk=pk)
+        except ParkingMap.DoesNotExist:
+            return Response({"error": "Карта не найдена."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ParkingMapSerializer(parking_map, context={'request': request}).data, status=status.HTTP_200_OK)
@@ -0,0 +1,279 @@
+"""
+Индекс свободных парковочных мест в Redis.
+
+Номера свободных мест хранятся в отсортированном множестве (ZSET), где оценка равна
+номеру места. Это позволяет отвечать на запросы без обхода таблицы ParkingSpot:
+- количество свободных мест — ZCARD, O(1);
+- первые N свободных мест — ZRANGE, O(log N + k);
+- свободные места в диапазоне номеров — ZRANGEBYSCORE, O(log N + k).
+
+Индекс обновляется после фиксации транзакции при каждом изменении места
+(см. parking_spots/signals.py) и полностью перестраивается из БД, если он ещё не создан
+(например, после очистки Redis), а также периодически задачей rebuild_availability_index.
+Массовые операции обновляют индекс сами одним пакетом, отключая обновления из сигналов
+блоком batch_index_updates().
+Источником истины остаётся БД: если Redis недоступен, ответы формируются запросом к БД.
+
+Каждое точечное обновление индекса увеличивает счётчик версии INDEX_VERSION_KEY.
+Перестройка читает версию до чтения БД и заменяет индекс, только если версия
+не изменилась (WATCH), иначе повторяет чтение: так обновление, зафиксированное
+во время перестройки, не затирается устаревшим состоянием из БД.
+
+Индекс отражает только текущее состояние мест. Свободные места на произвольный интервал
+времени (с учётом предварительных бронирований) ищутся в БД, см. free_spots.
+
+Индекс общий для всей парковки. Запросы по одной зоне (уровню) выполняются в БД
+по индексу внешнего ключа zone, поэтому их стоимость зависит от размера зоны, а не всей парковки.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, WatchError
+from bookings.models import Booking
+from .models import ParkingSpot
+
+AVAILABLE_SPOTS_KEY = 'parking_spots:available'
+INDEX_READY_KEY = 'parking_spots:available:ready'
+INDEX_VERSION_KEY = 'parking_spots:available:version'
+REBUILD_ATTEMPTS = 3
+
+# Исключения, при которых индекс считается недоступным и используется БД
+# (NotImplementedError — кэш настроен не на Redis)
+INDEX_ERRORS = (RedisError, NotImplementedError)
+
+_batch_updates = ContextVar('availability_batch_updates', default=False)
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def _available_spots():
+    return ParkingSpot.objects.filter(status='available')
+
+
+def rebuild_index():
+    """
+    Полностью перестраивает индекс по текущему состоянию БД.
+
+    Старый индекс заменяется в одной транзакции Redis (MULTI/EXEC),
+    поэтому читатели не видят пустое или частично заполненное множество.
+    Если во время чтения БД индекс обновлялся (изменилась версия), чтение повторяется.
+
+    Исключения:
+        WatchError: Индекс обновлялся во время каждой из REBUILD_ATTEMPTS попыток.
+    """
+    conn = _connection()
+    for attempt in range(REBUILD_ATTEMPTS):
+        version = conn.get(INDEX_VERSION_KEY)
+        spot_numbers = list(_available_spots().values_list('spot_number', flat=True))
+        try:
+            with conn.pipeline(transaction=True) as pipe:
+                pipe.watch(INDEX_VERSION_KEY)
+                if pipe.get(INDEX_VERSION_KEY) != version:
+                    raise WatchError('Индекс обновлён во время перестройки')
+                pipe.multi()
+                pipe.delete(AVAILABLE_SPOTS_KEY)
+                if spot_numbers:
+                    pipe.zadd(AVAILABLE_SPOTS_KEY, {str(number): number for number in spot_numbers})
+                pipe.set(INDEX_READY_KEY, 1)
+                pipe.execute()
+            return len(spot_numbers)
+        except WatchError:
+            if attempt == REBUILD_ATTEMPTS - 1:
+                raise
+
+
+def _ready_connection():
+    """
+    Возвращает соединение с Redis, предварительно построив индекс, если его ещё нет.
+    """
+    conn = _connection()
+    if not conn.exists(INDEX_READY_KEY):
+        rebuild_index()
+    return conn
+
+
+def sync_spot(spot_number):
+    """
+    Приводит запись о месте в индексе к его текущему состоянию в БД.
+
+    Статус перечитывается из БД, а не берётся из объекта сигнала: так порядок
+    фиксации конкурирующих транзакций не может оставить в индексе устаревший статус.
+    """
+    sync_spots([spot_number])
+
+
+def sync_spots(spot_numbers):
+    """
+    Пакетная версия sync_spot: приводит записи о местах в индексе к состоянию в БД
+    одним запросом к БД и одной транзакцией Redis.
+    """
+    spot_numbers = set(spot_numbers)
+    try:
+        conn = _connection()
+        if not spot_numbers:
+            return
+        if not conn.exists(INDEX_READY_KEY):
+            # Индекс будет построен целиком при первом чтении; версия меняется,
+            # чтобы идущая сейчас перестройка перечитала БД
+            conn.incr(INDEX_VERSION_KEY)
+            return
+        available = set(_available_spots().filter(spot_number__in=spot_numbers).values_list('spot_number', flat=True))
+        pipe = conn.pipeline(transaction=True)
+        if available:
+            pipe.zadd(AVAILABLE_SPOTS_KEY, {str(number): number for number in available})
+        if spot_numbers - available:
+            pipe.zrem(AVAILABLE_SPOTS_KEY, *[str(number) for number in spot_numbers - available])
+        pipe.incr(INDEX_VERSION_KEY)
+        pipe.execute()
+    except INDEX_ERRORS:
+        # Индекс будет исправлен следующей перестройкой
+        pass
+
+
+@contextmanager
+def batch_index_updates():
+    """
+    Контекстный менеджер: внутри блока сигналы ParkingSpot не обновляют индекс по одному месту.
+    Вызывающий код сам обновляет индекс одним пакетом (sync_spots, remove_spots).
+    """
+    token = _batch_updates.set(True)
+    try:
+        yield
+    finally:
+        _batch_updates.reset(token)
+
+
+def index_updates_batched():
+    return _batch_updates.get()
+
+
+def remove_spots(spot_numbers):
+    """
+    Удаляет места из индекса без обращения к БД (например, после удаления мест).
+    """
+    try:
+        if spot_numbers:
+            pipe = _connection().pipeline(transaction=True)
+            pipe.zrem(AVAILABLE_SPOTS_KEY, *[str(number) for number in spot_numbers])
+            pipe.incr(INDEX_VERSION_KEY)
+            pipe.execute()
+    except INDEX_ERRORS:
+        pass
+
+
+def count_available(zone=None):
+    """
+    Возвращает количество свободных мест (при заданной зоне — только в ней).
+    """
+    if zone is not None:
+        return _available_spots().filter(zone=zone).count()
+    try:
+        return _ready_connection().zcard(AVAILABLE_SPOTS_KEY)
+    except INDEX_ERRORS:
+        return _available_spots().count()
+
+
+def _available_in_db(limit, spot_from=None, spot_to=None, zone=None):
+    spots = _available_spots()
+    if spot_from is not None:
+        spots = spots.filter(spot_number__gte=spot_from)
+    if spot_to is not None:
+        spots = spots.filter(spot_number__lte=spot_to)
+    if zone is not None:
+        spots = spots.filter(zone=zone)
+    return list(spots.order_by('spot_number').values_list('spot_number', flat=True)[:limit])
+
+
+def first_available(limit=1, spot_from=None, spot_to=None, zone=None):
+    """
+    Возвращает до `limit` номеров свободных мест по возрастанию,
+    при необходимости — только из диапазона номеров [spot_from, spot_to] и из зоны.
+
+    Аргументы:
+        limit (int): Максимальное количество номеров.
+        spot_from (int | None): Нижняя граница номера места (включительно).
+        spot_to (int | None): Верхняя граница номера места (включительно).
+        zone (ParkingZone | None): Зона мест. Места зоны ищутся в БД, а не в индексе.
+
+    Возвращает:
+        list[int]: Номера свободных мест.
+    """
+    if zone is not None:
+        return _available_in_db(limit, spot_from, spot_to, zone)
+    try:
+        conn = _ready_connection()
+        if spot_from is None and spot_to is None:
+            members = conn.zrange(AVAILABLE_SPOTS_KEY, 0, limit - 1)
+        else:
+            members = conn.zrangebyscore(
+                AVAILABLE_SPOTS_KEY,
+                '-inf' if spot_from is None else spot_from,
+                '+inf' if spot_to is None else spot_to,
+                start=0,
+                num=limit
+            )
+        return [int(member) for member in members]
+    except INDEX_ERRORS:
+        return _available_in_db(limit, spot_from, spot_to)
+
+
+def free_spots(start_time, end_time, spot_from=None, spot_to=None, zone=None):
+    """
+    Возвращает QuerySet мест, свободных на интервале [start_time, end_time):
+    место не отключено администратором и не имеет пересекающихся активных бронирований.
+
+    Пересечения проверяются через NOT EXISTS по GiST-индексу бронирований,
+    поэтому запрос не перебирает бронирования каждого места.
+    """
+    busy = Booking.objects.overlapping(start_time, end_time).filter(parking_place=OuterRef('pk'))
+    spots = ParkingSpot.objects.exclude(status='unavailable').filter(~Exists(busy))
+    if spot_from is not None:
+        spots = spots.filter(spot_number__gte=spot_from)
+    if spot_to is not None:
+        spots = spots.filter(spot_number__lte=spot_to)
+    if zone is not None:
+        spots = spots.filter(zone=zone)
+    return spots
+
+
+def lock_available_spot(start_time, end_time, spot_from=None, spot_to=None, zone=None, candidates=20):
+    """
+    Выбирает и блокирует свободное место для автоматического назначения при бронировании.
+    Должна вызываться внутри transaction.atomic().
+
+    Для бронирования, начинающегося сейчас, сначала проверяются первые `candidates`
+    мест из индекса, затем (если все они уже заняты или индекс устарел) — вся таблица. Места, заблокированные параллельными
+    бронированиями, пропускаются (SELECT ... FOR UPDATE SKIP LOCKED), поэтому
+    одновременные запросы получают разные места, не ожидая друг друга.
+    Места выбираются по возрастанию номера: нумерация начинается от въезда,
+    поэтому это и есть ближайшие к въезду места.
+
+    Аргументы:
+        start_time (datetime): Начало бронирования.
+        end_time (datetime): Окончание бронирования.
+        spot_from (int | None): Нижняя граница номера места (включительно).
+        spot_to (int | None): Верхняя граница номера места (включительно).
+        zone (ParkingZone | None): Зона, в которой выбирается место.
+        candidates (int): Сколько номеров взять из индекса.
+
+    Возвращает:
+        ParkingSpot | None: Заблокированное свободное место или None, если свободных мест нет.
+    """
+    spots = (free_spots(start_time, end_time, spot_from, spot_to, zone)
+             .select_for_update(skip_locked=True)
+             .order_by('spot_number'))
+
+    if start_time > timezone.now() or zone is not None:
+        # Индекс описывает только текущее состояние мест всей парковки
+        return spots.first()
+
+    spot_numbers = first_available(candidates, spot_from=spot_from, spot_to=spot_to)
+    if spot_numbers:
+        spot = spots.filter(spot_number__in=spot_numbers).first()
+        if spot is not None:
+            return spot
+    return spots.first()
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking_spots', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParkingZone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.SlugField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='parkingspot',
+            name='zone',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='spots', to='parking_spots.parkingzone'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingspot',
+            index=models.Index(fields=['zone', 'spot_number'], name='parking_spot_zone_idx'),
+        ),
+    ]
@@ -1,6 +1,43 @@
 from django.db import models
 
 
+class ParkingZoneQuerySet(models.QuerySet):
+    def by_code(self, code):
+        """
+        Возвращает зону по коду (например, из параметра запроса `zone`) или None, если код не задан.
+
+        Исключения:
+            ParkingZone.DoesNotExist: Зоны с таким кодом нет.
+        """
+        return None if code is None else self.get(code=code)
+
+    async def aby_code(self, code):
+        """
+        Асинхронная версия by_code().
+        """
+        return None if code is None else await self.aget(code=code)
+
+
+class ParkingZone(models.Model):
+    """
+    Зона парковки — уровень или отдельная площадка.
+
+    Места и карты привязываются к зоне, поэтому раскраска карты зоны, запросы статусов
+    и рассылка обновлений затрагивают только места этой зоны.
+
+    Атрибуты:
+        code (str): Короткий уникальный код зоны (например, 'L1'), используется в параметрах запросов;
+        name (str): Название зоны.
+    """
+    code = models.SlugField(max_length=20, unique=True)
+    name = models.CharField(max_length=50)
+
+    objects = ParkingZoneQuerySet.as_manager()
+
+    def __str__(self):
+        return self.code
+
+
 class ParkingSpot(models.Model):
     """
     Модель, представляющая парковочное место.
@@ -10,7 +47,8 @@ class ParkingSpot(models.Model):
         status (str): Текущий статус парковочного места. Может быть:
             - 'booked' — место забронировано,
             - 'available' — место доступно для бронирования,
-            - 'unavailable' — место временно недоступно для бронирования.
+            - 'unavailable' — место временно недоступно для бронирования;
+        zone (ParkingZone, optional): Зона, к которой относится место.
     """
     STATUSES = [
         ('booked', 'забронировано'),
@@ -19,3 +57,11 @@ class ParkingSpot(models.Model):
     ]
     spot_number = models.IntegerField(primary_key=True)
     status = models.CharField(max_length=50, choices=STATUSES)
+    zone = models.ForeignKey(ParkingZone, null=True, blank=True, on_delete=models.PROTECT, related_name='spots',
+                             db_index=False)
+
+    class Meta:
+        indexes = [
+            # Места зоны по возрастанию номера (выборки по зоне, автоназначение места в зоне)
+            models.Index(fields=['zone', 'spot_number'], name='parking_spot_zone_idx'),
+        ]
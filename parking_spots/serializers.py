@@ -1,15 +1,47 @@
 from rest_framework import serializers
-from .models import ParkingSpot
+from .models import ParkingSpot, ParkingZone
 from bookings.models import Booking
 
 
 class ParkingSpotSerializer(serializers.ModelSerializer):
     """
-    Сериализатор для модели ParkingSpot.
+    Сериализатор для модели ParkingSpot. Зона выводится кодом.
     """
+    zone = serializers.SlugRelatedField(slug_field='code', read_only=True)
+
     class Meta:
         model = ParkingSpot
-        fields = ['spot_number', 'status']
+        fields = ['spot_number', 'status', 'zone']
+
+
+# Проекция для быстрой выдачи списка мест (см. api.projection), формат ParkingSpotSerializer
+PARKING_SPOT_PROJECTION = {
+    'spot_number': 'spot_number',
+    'status': 'status',
+    'zone': 'zone__code',
+}
+
+
+class ParkingZoneSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор зоны парковки.
+    """
+    class Meta:
+        model = ParkingZone
+        fields = ['id', 'code', 'name']
+
+
+class SpotIntervalSerializer(serializers.Serializer):
+    """
+    Интервал времени [start_time, end_time) для поиска мест, свободных на это время.
+    """
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError("Время окончания должно быть позже времени начала.")
+        return data
 
 
 class UpdateSpotSerializer(serializers.ModelSerializer):
@@ -1,10 +1,37 @@
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_save
-from realtime.notifications.parking_spots import notify_users_about_parking_spots_change
+from django.db.models.signals import post_save, post_delete
+from realtime.notifications.parking_spots import spot_change_event
+from realtime.outbox import enqueue
+from .availability import sync_spot, remove_spots, index_updates_batched
 from .models import ParkingSpot
-from asgiref.sync import async_to_sync
 
 
 @receiver(post_save, sender=ParkingSpot)
 def notify_parking_spot_update(instance, **kwargs):
-    async_to_sync(notify_users_about_parking_spots_change)(instance)
+    enqueue('spot.change', spot_change_event(instance))
+
+
+@receiver(post_save, sender=ParkingSpot)
+def update_availability_index(instance, **kwargs):
+    """
+    Обновляет индекс свободных мест после фиксации транзакции
+    (кроме массовых операций, см. batch_index_updates).
+    """
+    if index_updates_batched():
+        return
+    spot_number = instance.spot_number
+    transaction.on_commit(lambda: sync_spot(spot_number))
+
+
+@receiver(post_delete, sender=ParkingSpot)
+def remove_from_availability_index(instance, **kwargs):
+    """
+    Удаляет место из индекса свободных мест после фиксации транзакции.
+    Удалённое место не может быть свободным, поэтому БД не перечитывается.
+    При массовом удалении (batch_index_updates) индекс обновляет само представление.
+    """
+    if index_updates_batched():
+        return
+    spot_number = instance.spot_number
+    transaction.on_commit(lambda: remove_spots([spot_number]))
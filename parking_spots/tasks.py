@@ -0,0 +1,19 @@
+from celery import shared_task
+from redis.exceptions import WatchError
+from config.task_metrics import record_rows
+from .availability import rebuild_index
+
+
+@shared_task(expires=600)
+def rebuild_availability_index():
+    """
+    Перестраивает индекс свободных мест в Redis по данным БД.
+    Исправляет возможные расхождения (например, изменения, не попавшие в индекс из-за сбоя Redis).
+    """
+    try:
+        count = rebuild_index()
+    except WatchError:
+        # Индекс всё это время обновлялся точечно; перестройка — при следующем запуске
+        return None
+    record_rows(count)
+    return count
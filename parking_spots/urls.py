@@ -1,9 +1,24 @@
 from django.urls import path
-from .views import ParkingSpotListCreateView, ParkingSpotUpdateDeleteView, BulkCreateParkingSpotsView
+from api.async_views import async_api_view
+from .views import (ParkingSpotListCreateView,
+                    ParkingZoneListCreateView,
+                    ParkingSpotUpdateDeleteView,
+                    BulkCreateParkingSpotsView,
+                    BulkUpdateParkingSpotsView,
+                    BulkDeleteParkingSpotsView,
+                    AvailableParkingSpotsView,
+                    AvailableParkingSpotsCountView,
+                    parking_spot_list_async)
 
 
 urlpatterns = [
-    path('', ParkingSpotListCreateView.as_view(), name='parking-spot-list-create'),
+    path('', async_api_view(ParkingSpotListCreateView.as_view(), get=parking_spot_list_async),
+         name='parking-spot-list-create'),  # GET — асинхронно, POST — через DRF
+    path('zones/', ParkingZoneListCreateView.as_view(), name='parking-zone-list-create'),
+    path('available/', AvailableParkingSpotsView.as_view(), name='available-parking-spots'),
+    path('available/count/', AvailableParkingSpotsCountView.as_view(), name='available-parking-spots-count'),
     path('admin/bulk-create/', BulkCreateParkingSpotsView.as_view(), name='bulk-create-parking-spots'),
+    path('admin/bulk-update/', BulkUpdateParkingSpotsView.as_view(), name='bulk-update-parking-spots'),
+    path('admin/bulk-delete/', BulkDeleteParkingSpotsView.as_view(), name='bulk-delete-parking-spots'),
     path('admin/<str:spot_number>/', ParkingSpotUpdateDeleteView.as_view(), name='parking-spot-detail'),
 ]
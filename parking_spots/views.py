@@ -1,11 +1,54 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from api.permissions import IsAdminPermission
+from api.async_views import api_json_response, async_login_required
+from api.projection import project, aproject
+from api.renderers import ORJSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
-from .models import ParkingSpot
-from .serializers import ParkingSpotSerializer, UpdateSpotSerializer
+from .availability import batch_index_updates, count_available, first_available, free_spots, remove_spots, sync_spots
+from .models import ParkingSpot, ParkingZone
+from .serializers import (ParkingSpotSerializer, ParkingZoneSerializer, SpotIntervalSerializer, UpdateSpotSerializer,
+                          PARKING_SPOT_PROJECTION)
 from bookings.models import Booking
+from realtime.notifications.parking_spots import spots_change_event
+from realtime.outbox import enqueue, enqueue_many
+
+
+def zone_spots(zone):
+    """
+    Возвращает места зоны (без зоны — все места) по возрастанию номера.
+    """
+    spots = ParkingSpot.objects.order_by('spot_number')
+    return spots if zone is None else spots.filter(zone=zone)
+
+
+class ParkingZoneListCreateView(APIView):
+    """
+    Представление для получения списка и создания зон парковки (уровней, площадок).
+
+    Поддерживает:
+        - GET: список зон (доступно авторизованным пользователям).
+        - POST: создание зоны (только для администратора): `code` и `name`.
+    """
+    def get_permissions(self):
+        if self.request.method == 'GET':
+            return [IsAuthenticated()]
+        return [IsAuthenticated(), IsAdminPermission()]
+
+    def get(self, request):
+        zones = ParkingZone.objects.order_by('code')
+        return Response(ParkingZoneSerializer(zones, many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        serializer = ParkingZoneSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class ParkingSpotListCreateView(APIView):
@@ -13,9 +56,11 @@ class ParkingSpotListCreateView(APIView):
     Представление для получения списка и создания парковочных мест.
 
     Поддерживает:
-        - GET: получение списка всех парковочных мест (доступно авторизованным пользователям).
+        - GET: получение списка всех парковочных мест (доступно авторизованным пользователям),
+          с параметром `zone` — только мест зоны.
         - POST: создание нового парковочного места (только для администратора).
     """
+    renderer_classes = [ORJSONRenderer]
 
     def get_permissions(self):
         """
@@ -28,11 +73,15 @@ class ParkingSpotListCreateView(APIView):
 
     def get(self, request):
         """
-        Возвращает отсортированный список всех парковочных мест.
+        Возвращает отсортированный список парковочных мест
+        (проекцией без ModelSerializer, формат ParkingSpotSerializer).
         """
-        parking_spots = ParkingSpot.objects.all().order_by('spot_number')
-        serializer = ParkingSpotSerializer(parking_spots, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            zone = ParkingZone.objects.by_code(request.query_params.get('zone'))
+        except ParkingZone.DoesNotExist:
+            return Response({"error": "Зона не найдена."}, status=status.HTTP_404_NOT_FOUND)
+        parking_spots = project(zone_spots(zone), PARKING_SPOT_PROJECTION)
+        return Response(parking_spots, status=status.HTTP_200_OK)
 
     def post(self, request):
         """
@@ -42,9 +91,14 @@ class ParkingSpotListCreateView(APIView):
             - Номер места обязателен.
             - Статус: 'available' или 'unavailable'.
             - Место с таким номером не должно существовать.
+            - Зона (`zone`, код) необязательна, но должна существовать.
         """
         spot_number = request.data.get("spot_number")
         status_value = request.data.get("status")
+        try:
+            zone = ParkingZone.objects.by_code(request.data.get('zone'))
+        except ParkingZone.DoesNotExist:
+            return Response({"error": "Зона не найдена."}, status=400)
 
         if not spot_number:
             return Response({"error": "Номер места обязателен."}, status=400)
@@ -55,10 +109,102 @@ class ParkingSpotListCreateView(APIView):
         if ParkingSpot.objects.filter(spot_number=spot_number).exists():
             return Response({"error": f"Место с номером {spot_number} уже существует."}, status=400)
 
-        spot = ParkingSpot.objects.create(spot_number=spot_number, status=status_value)
+        with transaction.atomic():
+            spot = ParkingSpot.objects.create(spot_number=spot_number, status=status_value, zone=zone)
         return Response(ParkingSpotSerializer(spot).data, status=201)
 
 
+@async_login_required
+async def parking_spot_list_async(request):
+    """
+    Асинхронная версия ParkingSpotListCreateView.get: список мест, отсортированный по номеру.
+    """
+    try:
+        zone = await ParkingZone.objects.aby_code(request.GET.get('zone'))
+    except ParkingZone.DoesNotExist:
+        return api_json_response({"error": "Зона не найдена."}, status=status.HTTP_404_NOT_FOUND)
+    parking_spots = await aproject(zone_spots(zone), PARKING_SPOT_PROJECTION)
+    return api_json_response(parking_spots)
+
+
+def get_spot_interval(request):
+    """
+    Возвращает интервал (start_time, end_time) из параметров запроса или None, если он не задан.
+    При некорректных параметрах выбрасывает ValidationError.
+    """
+    if 'start_time' not in request.query_params and 'end_time' not in request.query_params:
+        return None
+    serializer = SpotIntervalSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data['start_time'], serializer.validated_data['end_time']
+
+
+class AvailableParkingSpotsView(APIView):
+    """
+    Представление для получения номеров свободных мест из индекса свободных мест.
+
+    Параметры запроса:
+        - limit: сколько номеров вернуть (по умолчанию 10, не больше 100);
+        - from, to: границы диапазона номеров мест (включительно, необязательные);
+        - zone: код зоны (необязательный) — только места зоны (поиск в БД по индексу зоны);
+        - start_time, end_time: интервал времени (необязательные). Если заданы, возвращаются
+          места, свободные на весь интервал с учётом предварительных бронирований (поиск в БД).
+
+    Номера возвращаются по возрастанию.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 10
+    max_limit = 100
+
+    def get(self, request):
+        params = {}
+        for name in ('limit', 'from', 'to'):
+            value = request.query_params.get(name)
+            if value is None:
+                continue
+            try:
+                params[name] = int(value)
+            except ValueError:
+                return Response({"error": f"Параметр {name} должен быть целым числом."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        limit = params.get('limit', self.default_limit)
+        if not 1 <= limit <= self.max_limit:
+            return Response({"error": f"Параметр limit должен быть от 1 до {self.max_limit}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            zone = ParkingZone.objects.by_code(request.query_params.get('zone'))
+        except ParkingZone.DoesNotExist:
+            return Response({"error": "Зона не найдена."}, status=status.HTTP_404_NOT_FOUND)
+
+        interval = get_spot_interval(request)
+        if interval is None:
+            spot_numbers = first_available(limit, spot_from=params.get('from'), spot_to=params.get('to'), zone=zone)
+        else:
+            spots = free_spots(*interval, spot_from=params.get('from'), spot_to=params.get('to'), zone=zone)
+            spot_numbers = list(spots.order_by('spot_number').values_list('spot_number', flat=True)[:limit])
+        return Response({"spot_numbers": spot_numbers}, status=status.HTTP_200_OK)
+
+
+class AvailableParkingSpotsCountView(APIView):
+    """
+    Представление для получения количества свободных мест из индекса свободных мест.
+    С параметрами start_time и end_time считает места, свободные на весь интервал,
+    с параметром zone — только места зоны.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            zone = ParkingZone.objects.by_code(request.query_params.get('zone'))
+        except ParkingZone.DoesNotExist:
+            return Response({"error": "Зона не найдена."}, status=status.HTTP_404_NOT_FOUND)
+        interval = get_spot_interval(request)
+        available = count_available(zone) if interval is None else free_spots(*interval, zone=zone).count()
+        return Response({"available": available}, status=status.HTTP_200_OK)
+
+
 class ParkingSpotUpdateDeleteView(APIView):
     """
     Представление для обновления и удаления одного парковочного места.
@@ -86,7 +232,8 @@ class ParkingSpotUpdateDeleteView(APIView):
 
         serializer = UpdateSpotSerializer(spot, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response({
                 "message": "Статус места успешно обновлен",
                 "data": serializer.data
@@ -110,7 +257,8 @@ class ParkingSpotUpdateDeleteView(APIView):
                     "error": f"Место {spot_number} не может быть удалено, так как оно забронировано."
                 }, status=400)
 
-            spot.delete()
+            with transaction.atomic():
+                spot.delete()
             return Response({
                 "detail": f"Парковочное место {spot_number} успешно удалено."
             }, status=200)
@@ -127,6 +275,7 @@ class BulkCreateParkingSpotsView(APIView):
         - Запрос должен содержать список объектов.
         - Каждый объект должен содержать уникальный `spot_number`.
         - Допустимые значения `status`: 'available', 'unavailable'.
+        - Необязательный `zone` — код существующей зоны.
         - Если `spot_number` уже существует в базе — место не создаётся и добавляется в список ошибок.
     """
     permission_classes = [IsAuthenticated, IsAdminPermission]
@@ -155,8 +304,15 @@ class BulkCreateParkingSpotsView(APIView):
                 errors.append({"spot_number": spot_number, "error": "Место с таким номером уже существует."})
                 continue
 
+            try:
+                zone = ParkingZone.objects.by_code(spot_data.get('zone'))
+            except ParkingZone.DoesNotExist:
+                errors.append({"spot_number": spot_number, "error": "Зона не найдена."})
+                continue
+
             # Создание парковочного места
-            spot = ParkingSpot.objects.create(spot_number=spot_number, status=status)
+            with transaction.atomic():
+                spot = ParkingSpot.objects.create(spot_number=spot_number, status=status, zone=zone)
             created_spots.append(spot)
 
         created_spots_serialized = ParkingSpotSerializer(created_spots, many=True).data
@@ -165,3 +321,162 @@ class BulkCreateParkingSpotsView(APIView):
             "created": created_spots_serialized,
             "errors": errors
         }, status=207)
+
+
+def parse_spot_selection(data, max_spots):
+    """
+    Возвращает условие выбора мест для массовой операции из тела запроса:
+    список номеров `spot_numbers` или диапазон `from`–`to` (включительно).
+
+    Возвращает:
+        tuple[dict | None, list[int] | None, str | None]: Фильтр для ParkingSpot,
+        запрошенные номера (для списка) и текст ошибки.
+    """
+    if 'spot_numbers' in data:
+        numbers = data['spot_numbers']
+        if not isinstance(numbers, list) or not numbers or not all(isinstance(n, int) for n in numbers):
+            return None, None, "spot_numbers должен быть непустым списком номеров мест."
+        if len(numbers) > max_spots:
+            return None, None, f"За один запрос можно изменить не более {max_spots} мест."
+        return {'spot_number__in': numbers}, sorted(set(numbers)), None
+
+    spot_from, spot_to = data.get('from'), data.get('to')
+    if not isinstance(spot_from, int) or not isinstance(spot_to, int) or spot_from > spot_to:
+        return None, None, "Укажите spot_numbers или диапазон from–to (from не больше to)."
+    if spot_to - spot_from + 1 > max_spots:
+        return None, None, f"За один запрос можно изменить не более {max_spots} мест."
+    return {'spot_number__gte': spot_from, 'spot_number__lte': spot_to}, None, None
+
+
+class BulkSpotOperationMixin:
+    """
+    Общая часть массовых операций с местами.
+
+    Места выбираются и проверяются одним запросом: номера существующих мест, их зоны
+    и наличие у них активных бронирований (EXISTS) под блокировкой строк мест.
+    Если часть мест не найдена или связана с активными бронированиями,
+    операция не выполняется ни для одного места.
+    """
+    permission_classes = [IsAuthenticated, IsAdminPermission]
+    max_spots = 2000
+
+    def select_spots(self, request, check_busy=True):
+        """
+        Возвращает тройки (номер места, id зоны, статус) выбранных мест или Response с ошибкой.
+        Должна вызываться внутри transaction.atomic().
+        """
+        if not isinstance(request.data, dict):
+            return Response({"error": "Ожидался объект."}, status=status.HTTP_400_BAD_REQUEST)
+        selection, requested, error = parse_spot_selection(request.data, self.max_spots)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        active_bookings = Booking.objects.filter(parking_place=OuterRef('pk'), status='active')
+        rows = list(
+            ParkingSpot.objects.filter(**selection)
+            .annotate(busy=Exists(active_bookings))
+            .select_for_update(of=('self',))
+            .order_by('spot_number')
+            .values_list('spot_number', 'zone_id', 'status', 'busy')
+        )
+        found = [(spot_number, zone_id, spot_status) for spot_number, zone_id, spot_status, _ in rows]
+        not_found = sorted(set(requested) - {spot_number for spot_number, _, _ in found}) if requested else []
+        busy = [spot_number for spot_number, _, _, is_busy in rows if is_busy and check_busy]
+        if not_found or busy:
+            return Response({
+                "error": "Операция не выполнена: часть мест не найдена или связана с активными бронированиями.",
+                "not_found": not_found,
+                "busy": busy,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not found:
+            return Response({"error": "В диапазоне нет мест."}, status=status.HTTP_400_BAD_REQUEST)
+        return found
+
+
+class BulkUpdateParkingSpotsView(BulkSpotOperationMixin, APIView):
+    """
+    Массовое изменение статуса или зоны мест администратором
+    (например, закрытие уровня на обслуживание или разметка мест по уровням).
+
+    Тело запроса: `spot_numbers` (список номеров) или `from` и `to` (диапазон номеров), а также
+    `status` ('available' или 'unavailable') и/или `zone` (код зоны или null — убрать из зоны).
+    Зону можно менять и у мест с активными бронированиями, статус — нельзя.
+
+    Изменения выполняются одним UPDATE, индекс свободных мест обновляется одним пакетом.
+    При изменении статуса клиенты получают одно событие spots.change. Места, перенесённые
+    в другую зону без изменения статуса, передаются событиями spots.change с их текущим
+    статусом (по одному на статус); прежние зоны мест указываются в поле previous_zones.
+    """
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        new_status = data.get('status')
+        if 'status' not in data and 'zone' not in data:
+            return Response({"error": "Укажите status и/или zone."}, status=status.HTTP_400_BAD_REQUEST)
+        if 'status' in data and new_status not in ('available', 'unavailable'):
+            return Response({"error": "Неверный статус. Допустимы только 'available' или 'unavailable'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        changes = {}
+        if 'status' in data:
+            changes['status'] = new_status
+        if 'zone' in data:
+            try:
+                changes['zone'] = ParkingZone.objects.by_code(data['zone'])
+            except ParkingZone.DoesNotExist:
+                return Response({"error": "Зона не найдена."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            spots = self.select_spots(request, check_busy='status' in changes)
+            if isinstance(spots, Response):
+                return spots
+            spot_numbers = [spot_number for spot_number, _, _ in spots]
+            ParkingSpot.objects.filter(spot_number__in=spot_numbers).update(**changes)
+            # Прежние зоны мест, перенесённых в другую зону
+            previous_zones = {}
+            if 'zone' in changes:
+                zone_id = changes['zone'].pk if changes['zone'] is not None else None
+                previous_zones = {spot_number: old_zone_id for spot_number, old_zone_id, _ in spots
+                                  if old_zone_id != zone_id}
+                spots = [(spot_number, zone_id, spot_status) for spot_number, _, spot_status in spots]
+            if 'status' in changes:
+                enqueue('spots.change', spots_change_event(
+                    [(spot_number, zone_id) for spot_number, zone_id, _ in spots], new_status, previous_zones.items()
+                ))
+                transaction.on_commit(lambda: sync_spots(spot_numbers))
+            elif previous_zones:
+                # Статус перенесённых мест не меняется: по событию на каждый их текущий статус
+                by_status = defaultdict(list)
+                for spot_number, zone_id, spot_status in spots:
+                    if spot_number in previous_zones:
+                        by_status[spot_status].append((spot_number, zone_id))
+                enqueue_many([
+                    ('spots.change', spots_change_event(
+                        status_spots, spot_status, [(spot_number, previous_zones[spot_number])
+                                                    for spot_number, _ in status_spots]
+                    ))
+                    for spot_status, status_spots in sorted(by_status.items())
+                ])
+
+        return Response({"updated": len(spot_numbers), "spot_numbers": spot_numbers}, status=status.HTTP_200_OK)
+
+
+class BulkDeleteParkingSpotsView(BulkSpotOperationMixin, APIView):
+    """
+    Массовое удаление мест администратором.
+
+    Тело запроса: `spot_numbers` (список номеров) или `from` и `to` (диапазон номеров).
+    Как и при удалении одного места, вместе с местами удаляются их прошлые бронирования.
+    Клиенты получают одно событие spots.change со статусом 'deleted',
+    места удаляются из индекса свободных мест одним запросом к Redis.
+    """
+    def post(self, request):
+        with transaction.atomic(), batch_index_updates():
+            spots = self.select_spots(request)
+            if isinstance(spots, Response):
+                return spots
+            spot_numbers = [spot_number for spot_number, _, _ in spots]
+            ParkingSpot.objects.filter(spot_number__in=spot_numbers).delete()
+            enqueue('spots.change', spots_change_event([(spot_number, zone_id) for spot_number, zone_id, _ in spots],
+                                                       'deleted'))
+            transaction.on_commit(lambda: remove_spots(spot_numbers))
+
+        return Response({"deleted": len(spot_numbers), "spot_numbers": spot_numbers}, status=status.HTTP_200_OK)
@@ -1,7 +1,48 @@
-from django.db import models
+from django.db import models, connections
+from django.utils import timezone
 from bookings.models import Booking
 
 
+class PaymentManager(models.Manager):
+    """
+    Менеджер оплат.
+
+    Методы:
+    - create_once: создаёт оплату бронирования не более одного раза.
+    """
+    def create_once(self, booking):
+        """
+        Создаёт оплату бронирования одним запросом INSERT ... ON CONFLICT DO NOTHING
+        по уникальному ключу booking_id.
+
+        Сумма берётся из уже загруженного тарифа бронирования (`booking.tariff.price`),
+        поэтому дополнительных запросов не выполняется. Сигнал post_save не отправляется —
+        уведомления отправляет вызывающий код.
+
+        Возвращает:
+            Payment | None: созданную оплату или None, если бронирование уже оплачено.
+        """
+        payment = self.model(booking=booking, amount=booking.tariff.price, payment_date=timezone.now())
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (booking_id, amount, payment_date) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (booking_id) DO NOTHING RETURNING id",
+                [booking.pk, payment.amount, payment.payment_date]
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        payment.pk = row[0]
+        payment._state.adding = False
+        payment._state.db = self.db
+        return payment
+
+
 class Payment(models.Model):
     """
     Модель оплаты бронирования парковочного места.
@@ -19,6 +60,8 @@ class Payment(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
     payment_date = models.DateTimeField(auto_now_add=True)
 
+    objects = PaymentManager()
+
     def save(self, *args, **kwargs):
         # Сумма автоматически устанавливается на основе цены тарифа
         self.amount = self.booking.tariff.price
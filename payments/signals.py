@@ -1,20 +1,26 @@
 from django.dispatch import receiver
 from django.db.models.signals import post_save
-from realtime.notifications.payments import notify_users_about_payment_change
-from realtime.notifications.bookings import notify_users_about_booking_change
+from realtime.notifications.payments import payment_change_event
+from realtime.notifications.bookings import booking_change_event
+from realtime.outbox import enqueue_many
+from bookings.models import BookingSummary
 from .models import Payment
-from asgiref.sync import async_to_sync
+
+
+def send_payment_notifications(payment, summary):
+    """
+    Записывает в outbox события об оплате и об изменении оплаченного бронирования
+    (одним INSERT, в транзакции оплаты).
+
+    Данные бронирования берутся из строки витрины BookingSummary.
+    """
+    enqueue_many([
+        ('payment.change', payment_change_event(payment, summary)),
+        ('booking.change', booking_change_event(summary, 'updated')),
+    ])
 
 
 @receiver(post_save, sender=Payment)
 def payment_change_handler(instance, created, **kwargs):
-    booking = instance.booking
-
-    _ = booking.car.license_plate
-    _ = booking.car.user.email
-    _ = booking.tariff.name
-    _ = booking.parking_place.spot_number
-    _ = instance.amount
-    _ = instance.payment_date
-    async_to_sync(notify_users_about_payment_change)(instance)
-    async_to_sync(notify_users_about_booking_change)(instance.booking, 'updated')
+    summary = BookingSummary.objects.sync(instance.booking)
+    send_payment_notifications(instance, summary)
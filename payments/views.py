@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework import status
@@ -5,9 +6,12 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from api.permissions import IsAdminPermission
-from bookings.models import Booking
+from api.idempotency import idempotent
+from api.mixins import ReplicaReadMixin
+from bookings.models import Booking, BookingSummary
 from .models import Payment
 from .serializers import PaymentSerializer, AdminPaymentListSerializer
+from .signals import send_payment_notifications
 
 
 class UserPaymentListView(ListAPIView):
@@ -25,26 +29,50 @@ class UserMakePaymentView(APIView):
     """
     Создаёт новую оплату по указанному ID бронирования (передаётся в URL).
     Доступно только если бронирование принадлежит текущему пользователю.
-    Сумма оплаты определяется автоматически в модели Payment на основе цены тарифа, связанного с бронированием.
+    Сумма оплаты определяется автоматически на основе цены тарифа, связанного с бронированием.
+
+    Бронирование вместе с владельцем, тарифом, местом и существующей оплатой загружается
+    одним запросом с блокировкой строки (SELECT ... FOR UPDATE), а оплата создаётся через
+    INSERT ... ON CONFLICT DO NOTHING, поэтому параллельные запросы не могут оплатить
+    бронирование дважды. Уведомления отправляются после фиксации транзакции.
+
+    Поддерживает заголовок Idempotency-Key: повтор запроса получает сохранённый ответ.
     """
+    already_paid_error = {"non_field_errors": ["Это бронирование уже оплачено."]}
+
+    @idempotent
     def post(self, request, booking_id):
-        try:
-            booking = Booking.objects.get(id=booking_id)
-        except Booking.DoesNotExist:
-            return Response({"error": "Бронирование не найдено."}, status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            try:
+                booking = (
+                    Booking.objects
+                    .select_related('car__user', 'tariff', 'parking_place', 'payment')
+                    .select_for_update(of=('self',))
+                    .get(id=booking_id)
+                )
+            except Booking.DoesNotExist:
+                return Response({"error": "Бронирование не найдено."}, status=status.HTTP_404_NOT_FOUND)
+
+            if booking.status != "active":
+                return Response({"error": "Бронирование уже неактивно."}, status=status.HTTP_400_BAD_REQUEST)
+
+            if booking.car.user_id != request.user.id:
+                return Response({"error": "Вы не можете оплатить чужое бронирование."}, status=status.HTTP_403_FORBIDDEN)
 
-        if booking.status != "active":
-            return Response({"error": "Бронирование уже неактивно."}, status=status.HTTP_400_BAD_REQUEST)
+            if hasattr(booking, 'payment'):
+                return Response(self.already_paid_error, status=status.HTTP_400_BAD_REQUEST)
 
-        if booking.car.user != request.user:
-            return Response({"error": "Вы не можете оплатить чужое бронирование."}, status=status.HTTP_403_FORBIDDEN)
+            payment = Payment.objects.create_once(booking)
+            if payment is None:
+                return Response(self.already_paid_error, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = PaymentSerializer(data={'booking': booking.id})
+            booking.payment = payment
+            # create_once не отправляет post_save, поэтому витрина обновляется
+            # и события уведомлений записываются здесь, в транзакции оплаты
+            summary = BookingSummary.objects.sync(booking)
+            send_payment_notifications(payment, summary)
 
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(PaymentSerializer(payment).data, status=status.HTTP_201_CREATED)
 
 
 class AdminPaymentPagination(PageNumberPagination):
@@ -53,9 +81,10 @@ class AdminPaymentPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class AdminPaymentListView(ListAPIView):
+class AdminPaymentListView(ReplicaReadMixin, ListAPIView):
     """
     Представление для получения списка всех оплат администратором.
+    Запросы выполняются на реплике БД (если она настроена).
     """
     queryset = Payment.objects.select_related('booking__car__user', 'booking__tariff').order_by('-id')
     serializer_class = AdminPaymentListSerializer
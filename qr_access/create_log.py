@@ -1,11 +1,27 @@
 from .models import QRAccessLog
 import json
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+
+def build_log(qr_data, access_granted, failure_reason=None, booking=None):
+    """
+    Формирует (но не сохраняет) запись QRAccessLog.
+
+    Используется для пакетной записи логов через bulk_create.
+    Параметры совпадают с create_log.
+    """
+    return QRAccessLog(
+        qr_data=json.dumps(qr_data, cls=DjangoJSONEncoder, ensure_ascii=False),
+        booking=booking,
+        access_granted=access_granted,
+        failure_reason=failure_reason
+    )
 
 
 def create_log(qr_data, access_granted, failure_reason=None, booking=None):
     """
-    Создаёт запись в QRAccessLog.
+    Создаёт запись в QRAccessLog (в одной транзакции с событием outbox, см. qr_access.signals).
 
     Параметры:
         qr_data (str): Сырые данные из QR-кода.
@@ -16,10 +32,7 @@ def create_log(qr_data, access_granted, failure_reason=None, booking=None):
     Возвращает:
         QRAccessLog: созданная запись.
     """
-    log_entry = QRAccessLog.objects.create(
-        qr_data=json.dumps(qr_data, cls=DjangoJSONEncoder, ensure_ascii=False),
-        booking=booking,
-        access_granted=access_granted,
-        failure_reason=failure_reason
-    )
+    log_entry = build_log(qr_data, access_granted, failure_reason=failure_reason, booking=booking)
+    with transaction.atomic():
+        log_entry.save()
     return log_entry
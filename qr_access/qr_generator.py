@@ -7,6 +7,20 @@ from io import BytesIO
 from django.conf import settings
 
 
+def sign_qr_data(data):
+    """
+    Возвращает HMAC-SHA256 подпись данных QR-кода (без поля signature).
+
+    Данные сериализуются в компактный JSON с сохранением порядка ключей,
+    поэтому подпись совпадает при генерации и при проверке QR-кода.
+    """
+    return hmac.new(
+        settings.SIGNATURE_KEY.encode(),
+        json.dumps(data, separators=(',', ':')).encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+
 def generate_qr_code(booking_id, start_time, end_time):
     """
     Генерирует QR-код с закодированной информацией о бронировании.
@@ -29,13 +43,7 @@ def generate_qr_code(booking_id, start_time, end_time):
         "end_time": end_time.strftime("%Y-%m-%dT%H:%M:%SZ")
     }
 
-    signature = hmac.new(
-        settings.SIGNATURE_KEY.encode(),
-        json.dumps(data, separators=(',', ':')).encode(),
-        hashlib.sha256
-    ).hexdigest()
-
-    data["signature"] = signature
+    data["signature"] = sign_qr_data(data)
     data = json.dumps(data, separators=(",", ":"))
 
     qr = qrcode.make(data)
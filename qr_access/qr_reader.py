@@ -1,11 +1,49 @@
 import hmac
-import json
-import hashlib
-from datetime import datetime, timezone
-from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.db import transaction
 from rest_framework.exceptions import ValidationError
 from bookings.models import Booking
-from .create_log import create_log
+from realtime.notifications.access_logs import access_log_event
+from realtime.outbox import enqueue_many
+from .create_log import create_log, build_log
+from .models import QRAccessLog
+from .qr_generator import sign_qr_data
+from .serializers import QRCodeAccessSerializer
+
+FAILURE_MESSAGES = dict(QRAccessLog.FAILURE_REASONS)
+
+
+def get_failure_reason(validated_data, booking):
+    """
+    Проверяет данные QR-кода для уже найденного бронирования.
+
+    Аргументы:
+        validated_data (dict): Данные, прошедшие QRCodeAccessSerializer.
+        booking (Booking | None): Бронирование из QR-кода (None, если не найдено).
+            Для проверки оплаты без лишнего запроса бронирование должно быть
+            загружено с select_related('payment').
+
+    Возвращает:
+        str | None: Код причины отказа из QRAccessLog.FAILURE_REASONS или None, если доступ разрешён.
+    """
+    if booking is None:
+        return 'booking_not_found'
+
+    if not hasattr(booking, "payment"):
+        return 'booking_unpaid'
+
+    # Формирование данных без подписи
+    unsigned_data = {
+        "booking_id": str(validated_data['booking_id']),
+        "start_time": validated_data["start_time"].strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end_time": validated_data["end_time"].strftime("%Y-%m-%dT%H:%M:%SZ")
+    }
+
+    # Сравнение подписей
+    if not hmac.compare_digest(validated_data["signature"], sign_qr_data(unsigned_data)):
+        return 'invalid_signature'
+
+    return None
 
 
 def validate_qr_code_data(validated_data):
@@ -28,39 +66,99 @@ def validate_qr_code_data(validated_data):
             - signature (str)
     """
     booking_id = str(validated_data['booking_id'])
-    start_time = validated_data["start_time"]
-    end_time = validated_data["end_time"]
-    signature = validated_data["signature"]
 
     # Проверка, существует ли бронирование
-    try:
-        booking = Booking.objects.get(id=booking_id)
-    except Booking.DoesNotExist:
-        create_log(validated_data, access_granted=False, failure_reason='booking_not_found')
-        raise ValidationError("Бронирование не найдено")
+    booking = None
+    if booking_id.isdigit():
+        booking = Booking.objects.select_related('payment').filter(id=booking_id).first()
 
-    # Проверка оплаты
-    if not hasattr(booking, "payment"):
-        create_log(validated_data, access_granted=False, failure_reason='booking_unpaid', booking=booking)
-        raise ValidationError("Бронирование не оплачено")
+    failure_reason = get_failure_reason(validated_data, booking)
+    create_log(validated_data, access_granted=failure_reason is None, failure_reason=failure_reason, booking=booking)
 
-    # Формирование данных без подписи
-    unsigned_data = {
-        "booking_id": booking_id,
-        "start_time": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "end_time": end_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if failure_reason:
+        raise ValidationError(FAILURE_MESSAGES[failure_reason])
+
+
+async def avalidate_qr_code_data(validated_data):
+    """
+    Асинхронная версия validate_qr_code_data для ASGI-представления проверки QR-кода.
+
+    Бронирование загружается через асинхронный ORM, запись лога выполняется в пуле потоков.
+    """
+    booking_id = str(validated_data['booking_id'])
+
+    booking = None
+    if booking_id.isdigit():
+        booking = await Booking.objects.select_related('payment').filter(id=booking_id).afirst()
+
+    failure_reason = get_failure_reason(validated_data, booking)
+    await sync_to_async(create_log)(
+        validated_data, access_granted=failure_reason is None, failure_reason=failure_reason, booking=booking
+    )
+
+    if failure_reason:
+        raise ValidationError(FAILURE_MESSAGES[failure_reason])
+
+
+def validate_qr_code_batch(payloads):
+    """
+    Проверяет пакет QR-кодов, считанных контроллером въезда с нескольких полос.
+
+    В отличие от validate_qr_code_data:
+    - все бронирования и их оплаты загружаются одним запросом (id__in);
+    - подписи проверяются в одном цикле;
+    - логи всех попыток записываются одним bulk_create.
+
+    Аргументы:
+        payloads (list[dict]): Сырые данные QR-кодов в порядке сканирования.
+
+    Возвращает:
+        list[dict]: Результат проверки для каждого QR-кода (в том же порядке):
+            - index: порядковый номер в пакете;
+            - access_granted: был ли предоставлен доступ;
+            - detail или error: сообщение для контроллера;
+            - errors: ошибки формата (только для некорректных данных).
+    """
+    serializers = [QRCodeAccessSerializer(data=payload) for payload in payloads]
+    booking_ids = {
+        str(serializer.validated_data['booking_id'])
+        for serializer in serializers if serializer.is_valid()
     }
+    booking_ids = [booking_id for booking_id in booking_ids if booking_id.isdigit()]
+    bookings = Booking.objects.select_related('payment').in_bulk(booking_ids)
 
-    # Формирование подписи на основе поступивших данных
-    expected_signature = hmac.new(
-        settings.SIGNATURE_KEY.encode(),
-        json.dumps(unsigned_data, separators=(",", ":")).encode(),
-        hashlib.sha256
-    ).hexdigest()
+    results = []
+    logs = []
+    for index, (payload, serializer) in enumerate(zip(payloads, serializers)):
+        if not serializer.is_valid():
+            logs.append(build_log(payload, access_granted=False, failure_reason='invalid_format'))
+            results.append({
+                "index": index,
+                "access_granted": False,
+                "error": "Некорректный формат данных",
+                "errors": serializer.errors
+            })
+            continue
 
-    # Сравнение подписей
-    if not hmac.compare_digest(signature, expected_signature):
-        create_log(validated_data, access_granted=False, failure_reason='invalid_signature', booking=booking)
-        raise ValidationError('Подпись не совпадает')
+        validated_data = serializer.validated_data
+        booking_id = str(validated_data['booking_id'])
+        booking = bookings.get(int(booking_id)) if booking_id.isdigit() else None
+
+        failure_reason = get_failure_reason(validated_data, booking)
+        logs.append(build_log(
+            validated_data,
+            access_granted=failure_reason is None,
+            failure_reason=failure_reason,
+            booking=booking
+        ))
+        if failure_reason:
+            results.append({"index": index, "access_granted": False, "error": FAILURE_MESSAGES[failure_reason]})
+        else:
+            results.append({"index": index, "access_granted": True, "detail": "Доступ разрешён"})
+
+    # bulk_create не вызывает post_save, поэтому события уведомлений записываются вручную
+    with transaction.atomic():
+        QRAccessLog.objects.bulk_create(logs)
+        enqueue_many([('access_log.created', access_log_event(log_entry)) for log_entry in logs])
 
-    create_log(validated_data, access_granted=True, booking=booking)
+    return results
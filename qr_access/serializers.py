@@ -1,3 +1,4 @@
+from django.db.models import Case, F, Value, When
 from rest_framework import serializers
 from .models import QRAccessLog
 
@@ -26,3 +27,19 @@ class QRAccessLogSerializer(serializers.ModelSerializer):
 
     def get_failure_reason_display(self, obj):
         return obj.get_failure_reason_display() if obj.failure_reason else None
+
+
+# Проекция для быстрой выдачи списка логов (см. api.projection), формат QRAccessLogSerializer.
+# Название причины отказа вычисляется в SQL так же, как get_failure_reason_display().
+QR_ACCESS_LOG_PROJECTION = {
+    'id': 'id',
+    'qr_data': 'qr_data',
+    'access_granted': 'access_granted',
+    'failure_reason': 'failure_reason',
+    'failure_reason_display': Case(
+        *[When(failure_reason=reason, then=Value(label)) for reason, label in QRAccessLog.FAILURE_REASONS],
+        default=F('failure_reason')
+    ),
+    'time': 'time',
+    'booking': 'booking',
+}
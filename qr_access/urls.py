@@ -1,9 +1,16 @@
 from django.urls import path
-from .views import QRView, VerifyQRCodeAccessView, QRAccessLogListView
+from api.async_views import async_api_view
+from .views import (QRView,
+                    VerifyQRCodeAccessView,
+                    VerifyQRCodeBatchAccessView,
+                    QRAccessLogListView,
+                    verify_qr_code_access_async)
 
 
 urlpatterns = [
     path('qrcode/generate/<booking_id>/', QRView.as_view(), name='generate-qrcode'),
-    path('qrcode/verify-access/', VerifyQRCodeAccessView.as_view(), name='verify-access'),
+    path('qrcode/verify-access/', async_api_view(VerifyQRCodeAccessView.as_view(), post=verify_qr_code_access_async),
+         name='verify-access'),
+    path('qrcode/verify-access/batch/', VerifyQRCodeBatchAccessView.as_view(), name='verify-access-batch'),
     path('qrcode/logs/', QRAccessLogListView.as_view(), name='access-logs')
 ]
@@ -1,4 +1,5 @@
 import json
+from asgiref.sync import sync_to_async
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
@@ -7,12 +8,14 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.exceptions import ValidationError
 from .qr_generator import generate_qr_code
-from .qr_reader import validate_qr_code_data
+from .qr_reader import validate_qr_code_data, avalidate_qr_code_data, validate_qr_code_batch
 from .models import QRAccessLog
-from .serializers import QRCodeAccessSerializer, QRAccessLogSerializer
+from .serializers import QRCodeAccessSerializer, QRAccessLogSerializer, QR_ACCESS_LOG_PROJECTION
 from bookings.models import Booking
 from .create_log import create_log
 from api.permissions import IsAdminPermission
+from api.mixins import ReplicaReadMixin, ProjectedListMixin
+from api.async_views import api_json_response
 
 
 class QRView(APIView):
@@ -86,16 +89,79 @@ class VerifyQRCodeAccessView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+async def verify_qr_code_access_async(request):
+    """
+    Асинхронная версия VerifyQRCodeAccessView.post для контроллеров въезда.
+
+    Обрабатывает только JSON-запросы; запросы в других форматах
+    передаются синхронному DRF-представлению (возвращается None).
+    """
+    if request.content_type != 'application/json':
+        return None
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None
+
+    serializer = QRCodeAccessSerializer(data=data)
+    if not serializer.is_valid():
+        await sync_to_async(create_log)(
+            qr_data=json.dumps(data, ensure_ascii=False),
+            access_granted=False,
+            failure_reason='invalid_format'
+        )
+        return api_json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        await avalidate_qr_code_data(serializer.validated_data)
+    except ValidationError as e:
+        return api_json_response({"error": str(e.detail[0])}, status=status.HTTP_403_FORBIDDEN)
+    return api_json_response({"detail": "Доступ разрешён"}, status=status.HTTP_200_OK)
+
+
+class VerifyQRCodeBatchAccessView(APIView):
+    """
+    Представление API для пакетной проверки доступа по QR-кодам (многополосный въезд).
+
+    Метод POST принимает список объектов в том же формате, что и VerifyQRCodeAccessView.
+    Все бронирования загружаются одним запросом, а логи записываются одной пакетной вставкой.
+
+    Возвращает 200 OK со списком результатов в порядке сканирования:
+        - index (int): Номер QR-кода в пакете.
+        - access_granted (bool): Разрешён ли доступ.
+        - detail / error (str): Сообщение для контроллера.
+    """
+    permission_classes = [AllowAny]
+    max_batch_size = 100
+
+    def post(self, request):
+        if not isinstance(request.data, list) or not request.data:
+            return Response({"error": "Ожидался непустой список QR-кодов."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(request.data) > self.max_batch_size:
+            return Response(
+                {"error": f"Максимальный размер пакета — {self.max_batch_size} QR-кодов."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = validate_qr_code_batch(request.data)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 class QRAccessLogPagination(PageNumberPagination):
     page_size = 100
     page_size_query_param = 'page_size'
 
 
-class QRAccessLogListView(ListAPIView):
+class QRAccessLogListView(ReplicaReadMixin, ProjectedListMixin, ListAPIView):
     """
     Представление для получения списка логов попыток доступа по QR-коду.
+    Запросы выполняются на реплике БД (если она настроена),
+    строки выбираются проекцией без ModelSerializer.
     """
     queryset = QRAccessLog.objects.all().order_by('-time')
     serializer_class = QRAccessLogSerializer
+    projection = QR_ACCESS_LOG_PROJECTION
     permission_classes = [IsAuthenticated, IsAdminPermission]
     pagination_class = QRAccessLogPagination
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RealtimeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'realtime'
+
+    def ready(self):
+        # Регистрация обработчиков событий outbox (см. realtime/outbox.py)
+        from .notifications import access_logs, bookings, cars, parking_spots, payments, users  # noqa: F401
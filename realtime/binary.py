@@ -0,0 +1,77 @@
+"""
+Бинарный формат обновлений парковочных мест (подпротокол WebSocket spots.bin.v1).
+
+Клиент (например, табло с медленным каналом) запрашивает подпротокол при подключении
+к ws/parking_spots (заголовок Sec-WebSocket-Protocol: spots.bin.v1) и получает вместо
+JSON бинарные кадры. Все числа — беззнаковые, порядок байтов big-endian.
+
+Статус места кодируется 2 битами (STATUS_CODES), код 3 означает, что места с таким
+номером нет (в том числе место удалено).
+
+Кадр обновлений (события копятся в течение REALTIME_FLUSH_WINDOW_MS, см. BatchingMixin):
+    u8  тип кадра = 1
+    u32 seq — номер последнего события в кадре (0, если номера нет)
+    u32 × N — записи (номер места << 2) | код статуса
+
+Кадр снимка (?snapshot=1 или ?since=N, см. SnapshotDeltaMixin):
+    u8  тип кадра = 2
+    u32 seq
+    u32 номер первого места
+    u32 количество мест в диапазоне
+    битовая карта: по 2 бита на место подряд начиная с первого,
+    4 места в байте, старшие биты — меньший номер
+
+Запись обновления занимает 4 байта против ~50 байт JSON-кадра.
+"""
+import struct
+
+SUBPROTOCOL = 'spots.bin.v1'
+
+STATUS_CODES = {
+    'available': 0,
+    'booked': 1,
+    'unavailable': 2,
+    'deleted': 3,
+}
+NO_SPOT = 3
+
+UPDATES_FRAME = 1
+SNAPSHOT_FRAME = 2
+
+_HEADER = struct.Struct('>BI')
+_SNAPSHOT_HEADER = struct.Struct('>BIII')
+
+
+def encode_updates(updates, seq=None):
+    """
+    Кодирует кадр обновлений.
+
+    Аргументы:
+        updates: Пары (номер места, статус).
+        seq: Номер последнего события в кадре.
+    """
+    records = [(spot_number << 2) | STATUS_CODES[status] for spot_number, status in updates]
+    return _HEADER.pack(UPDATES_FRAME, seq or 0) + struct.pack(f'>{len(records)}I', *records)
+
+
+def encode_snapshot(spots, seq):
+    """
+    Кодирует кадр снимка по парам (номер места, статус), отсортированным по номеру.
+    Номера, которых нет в spots, помечаются кодом NO_SPOT.
+    """
+    if not spots:
+        return _SNAPSHOT_HEADER.pack(SNAPSHOT_FRAME, seq, 0, 0)
+
+    first, last = spots[0][0], spots[-1][0]
+    count = last - first + 1
+    codes = bytearray([NO_SPOT]) * count
+    for spot_number, status in spots:
+        codes[spot_number - first] = STATUS_CODES[status]
+
+    # Дополняем до кратного 4 и упаковываем по 4 кода в байт
+    codes += bytes([NO_SPOT]) * (-count % 4)
+    bitmap = bytes(
+        (codes[i] << 6) | (codes[i + 1] << 4) | (codes[i + 2] << 2) | codes[i + 3]
+        for i in range(0, len(codes), 4)
+    )
+    return _SNAPSHOT_HEADER.pack(SNAPSHOT_FRAME, seq, first, count) + bitmap
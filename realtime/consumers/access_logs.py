@@ -1,14 +1,19 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
+from .mixins import BatchingMixin, is_admin
 
 
-class AdminAccessLogConsumer(AsyncWebsocketConsumer):
+class AdminAccessLogConsumer(BatchingMixin, AsyncWebsocketConsumer):
     async def connect(self):
+        if not is_admin(self.scope.get('user')):
+            await self.close()
+            return
+        self.configure_batching()
         await self.channel_layer.group_add("admin_access_logs", self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
+        self.stop_batching()
         await self.channel_layer.group_discard("admin_access_logs", self.channel_name)
 
     async def send_message(self, event):
-        message = event['message']
-        await self.send(text_data=message)
+        await self.push(event['message'])
@@ -1,15 +1,40 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from realtime.snapshots import bookings_snapshot
+from .mixins import SnapshotDeltaMixin, is_admin
 
 
-class AdminBookingConsumer(AsyncWebsocketConsumer):
+class AdminBookingConsumer(SnapshotDeltaMixin, AsyncWebsocketConsumer):
+    """
+    Изменения бронирований для администратора.
+
+    Параметры `snapshot`, `since` и `batch` — см. SnapshotDeltaMixin и BatchingMixin.
+    Снимок содержит активные бронирования в формате событий:
+    {"type": "snapshot", "seq": N, "bookings": [...]}.
+    """
+    feed = 'admin_bookings'
+
     async def connect(self):
+        if not is_admin(self.scope.get('user')):
+            await self.close()
+            return
+        self.configure_batching()
+        try:
+            since, snapshot = self.stream_params(parse_qs(self.scope['query_string'].decode()))
+        except ValueError:
+            await self.close()
+            return
         await self.channel_layer.group_add("admin_bookings", self.channel_name)
         await self.accept()
+        await self.send_initial_state(since, snapshot)
 
     async def disconnect(self, close_code):
+        self.stop_batching()
         await self.channel_layer.group_discard("admin_bookings", self.channel_name)
 
+    async def get_snapshot(self):
+        return await database_sync_to_async(bookings_snapshot)()
+
     async def send_message(self, event):
-        message = event['message']
-        await self.send(text_data=message)
-        
\ No newline at end of file
+        await self.send_event(event.get('seq'), event['message'])
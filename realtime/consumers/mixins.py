@@ -0,0 +1,159 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from realtime.events import current_seq, events_since
+
+
+def is_admin(user):
+    """
+    Проверяет, что пользователь подключения — администратор (как IsAdminPermission в REST API).
+    """
+    return user is not None and user.is_authenticated and user.is_staff
+
+
+class BatchingMixin:
+    """
+    Пакетная отправка событий WebSocket-ленты.
+
+    С параметром подключения `batch=1` события не отправляются сразу, а накапливаются
+    в течение REALTIME_FLUSH_WINDOW_MS и уходят одним кадром — JSON-массивом событий.
+    События с одинаковым ключом (batch_key) за это окно объединяются: остаётся
+    последнее, на месте последнего. Так массовое изменение (например, освобождение
+    сотен мест задачей) приходит клиенту одним кадром вместо сотен.
+
+    Без параметра каждое событие отправляется отдельным кадром, как раньше.
+    """
+    batch = False
+    pending = None
+    flush_task = None
+
+    def configure_batching(self):
+        query = parse_qs(self.scope['query_string'].decode())
+        self.batch = query.get('batch', ['0'])[0] in ('1', 'true')
+        self.pending = {}
+
+    def batch_key(self, data):
+        """
+        Возвращает ключ объединения события или None, если событие не объединяется с другими.
+        По умолчанию — тип события и id объекта.
+        """
+        obj = data.get('data')
+        if isinstance(obj, dict) and 'id' in obj:
+            return data.get('type'), obj['id']
+        return None
+
+    async def push(self, message, data=None):
+        """
+        Отправляет событие (текст JSON) клиенту сразу или в составе следующего пакета.
+        `data` — уже разобранное событие, если оно есть у вызывающего кода.
+        """
+        if not self.batch:
+            await self.send(text_data=message)
+            return
+
+        key = self.batch_key(data if data is not None else json.loads(message))
+        if key is None:
+            key = object()
+        self.pending.pop(key, None)
+        self.pending[key] = message
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(settings.REALTIME_FLUSH_WINDOW_MS / 1000)
+        self.flush_task = None
+        messages, self.pending = list(self.pending.values()), {}
+        await self.send_batch(messages)
+
+    async def send_batch(self, messages):
+        """
+        Отправляет накопленные события (тексты JSON) одним кадром.
+        """
+        await self.send(text_data='[' + ','.join(messages) + ']')
+
+    def stop_batching(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+
+
+class SnapshotDeltaMixin(BatchingMixin):
+    """
+    Снимок состояния и пропущенные события для WebSocket-ленты с номерами событий
+    (см. realtime/events.py).
+
+    Параметры подключения:
+    - `snapshot=1` — сразу после подключения отправить снимок текущего состояния:
+      {"type": "snapshot", "seq": N, ...}; события с номером не больше N не отправляются;
+    - `since=N` — отправить события с номерами больше N из буфера, а если их там
+      уже нет — снимок.
+
+    Без параметров лента работает как раньше: только новые события.
+    Каждое событие содержит поле seq — номер, с которого клиент продолжит после переподключения.
+
+    Подкласс задаёт feed и get_snapshot(), а события отправляет через send_event()
+    (с учётом пакетной отправки, см. BatchingMixin).
+    Группы нужно добавить до вызова send_initial_state(): события, пришедшие
+    во время подготовки снимка, обрабатываются после него и отбрасываются по номеру.
+    """
+    feed = None
+    last_seq = 0
+
+    async def get_snapshot(self):
+        """
+        Возвращает словарь с текущим состоянием ленты для снимка.
+        """
+        raise NotImplementedError
+
+    def filter_event(self, data):
+        """
+        Возвращает событие для отправки клиенту (возможно, урезанное) или None,
+        если событие клиенту не нужно.
+        """
+        return data
+
+    @staticmethod
+    def stream_params(query):
+        """
+        Возвращает параметры since и snapshot из разобранной строки запроса (parse_qs).
+        Некорректный since вызывает ValueError.
+        """
+        since = int(query['since'][0]) if 'since' in query else None
+        snapshot = query.get('snapshot', ['0'])[0] in ('1', 'true')
+        return since, snapshot
+
+    async def send_initial_state(self, since, snapshot):
+        if since is not None:
+            events = await sync_to_async(events_since)(self.feed, since)
+            if events is not None:
+                self.last_seq = since
+                for seq, message in events:
+                    await self.send_event(seq, message)
+                return
+        elif not snapshot:
+            return
+
+        # Номер читается до снимка: события после него могут уже войти в снимок,
+        # но их повторная отправка безопасна — они содержат состояние целиком
+        seq = await sync_to_async(current_seq)(self.feed)
+        snapshot = await self.get_snapshot()
+        self.last_seq = seq
+        await self.send_snapshot(seq, snapshot)
+
+    async def send_snapshot(self, seq, snapshot):
+        await self.send(text_data=json.dumps({'type': 'snapshot', 'seq': seq, **snapshot}))
+
+    async def send_event(self, seq, message):
+        if seq is not None:
+            if seq <= self.last_seq:
+                return
+            self.last_seq = seq
+        data = json.loads(message)
+        filtered = self.filter_event(data)
+        if filtered is None:
+            return
+        if filtered is not data:
+            message = json.dumps(filtered)
+        await self.push(message, filtered)
@@ -1,14 +1,105 @@
+import json
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from realtime.binary import SUBPROTOCOL, encode_snapshot, encode_updates
+from realtime.groups import PARKING_UPDATES_GROUP, spot_groups, zone_group
+from realtime.notifications.parking_spots import filter_spot_event, spot_event_updates, zone_id_by_code
+from realtime.snapshots import spots_snapshot
+from .mixins import SnapshotDeltaMixin
 
 
-class ParkingSpotConsumer(AsyncWebsocketConsumer):
+class ParkingSpotConsumer(SnapshotDeltaMixin, AsyncWebsocketConsumer):
+    """
+    Обновления статусов парковочных мест.
+
+    Параметры подключения `from` и `to` ограничивают диапазон номеров мест:
+    клиент подписывается только на группы нужных сегментов (см. realtime.groups)
+    и получает обновления только по местам из диапазона. Параметр `zone` (код зоны)
+    подписывает клиента на группу зоны: он получает обновления и снимок только
+    по местам зоны (диапазон при этом дополнительно ограничивает номера). Места, перенесённые
+    из зоны в другую, приходят подписчику зоны в поле previous_zones события spots.change:
+    клиент убирает их из зоны (в бинарных кадрах они передаются с кодом NO_SPOT).
+    Без параметров клиент получает обновления по всем местам.
+
+    Параметры `snapshot`, `since` и `batch` — см. SnapshotDeltaMixin и BatchingMixin.
+    Снимок содержит пары [номер места, статус]:
+    {"type": "snapshot", "seq": N, "spots": [[1, "available"], ...]}.
+
+    При подпротоколе spots.bin.v1 обновления и снимки отправляются бинарными кадрами
+    (см. realtime.binary), обновления — всегда пакетами.
+    """
+    feed = 'parking_spots'
+
     async def connect(self):
-        await self.channel_layer.group_add("parking_updates", self.channel_name)
-        await self.accept()
+        self.configure_batching()
+        query = parse_qs(self.scope['query_string'].decode())
+        try:
+            self.spot_from = int(query['from'][0]) if 'from' in query else None
+            self.spot_to = int(query['to'][0]) if 'to' in query else None
+            since, snapshot = self.stream_params(query)
+        except ValueError:
+            await self.close()
+            return
+
+        self.zone_id = None
+        if 'zone' in query:
+            self.zone_id = await zone_id_by_code(query['zone'][0])
+            if self.zone_id is None:
+                await self.close()
+                return
+
+        if (self.spot_from is None) != (self.spot_to is None) or (
+                self.spot_from is not None and self.spot_from > self.spot_to):
+            await self.close()
+            return
+        if self.zone_id is not None:
+            self.groups = [zone_group(self.zone_id)]
+        elif self.spot_from is None:
+            self.groups = [PARKING_UPDATES_GROUP]
+        else:
+            self.groups = spot_groups(self.spot_from, self.spot_to)
+
+        self.binary = SUBPROTOCOL in self.scope.get('subprotocols', [])
+        if self.binary:
+            self.batch = True
+
+        for group in self.groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept(subprotocol=SUBPROTOCOL if self.binary else None)
+        await self.send_initial_state(since, snapshot)
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("parking_updates", self.channel_name)
+        self.stop_batching()
+        for group in getattr(self, 'groups', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    def filter_event(self, data):
+        # Сегмент может быть шире запрошенного диапазона, а повторно отправляемые
+        # из буфера события (since) относятся ко всем местам
+        return filter_spot_event(data, self.spot_from, self.spot_to, self.zone_id)
+
+    def batch_key(self, data):
+        # События о наборе мест (массовые операции) не объединяются
+        return data.get("spot_number")
+
+    async def get_snapshot(self):
+        return await database_sync_to_async(spots_snapshot)(self.spot_from, self.spot_to, self.zone_id)
+
+    async def send_snapshot(self, seq, snapshot):
+        if not self.binary:
+            await super().send_snapshot(seq, snapshot)
+            return
+        await self.send(bytes_data=encode_snapshot(snapshot['spots'], seq))
+
+    async def send_batch(self, messages):
+        if not self.binary:
+            await super().send_batch(messages)
+            return
+        events = [json.loads(message) for message in messages]
+        updates = [update for event in events for update in spot_event_updates(event, self.zone_id)]
+        seqs = [event['seq'] for event in events if 'seq' in event]
+        await self.send(bytes_data=encode_updates(updates, max(seqs, default=None)))
 
     async def send_parking_update(self, event):
-        message = event["message"]
-        await self.send(text_data=message)
+        await self.send_event(event.get("seq"), event["message"])
@@ -0,0 +1,29 @@
+from channels.generic.websocket import AsyncWebsocketConsumer
+from realtime.groups import user_group
+from .mixins import BatchingMixin
+
+
+class UserBookingConsumer(BatchingMixin, AsyncWebsocketConsumer):
+    """
+    Уведомления пользователя об изменении его бронирований и оплат
+    (события booking.change и payment.change в том же формате, что и у администратора).
+
+    Требует аутентификации по JWT (см. realtime.middleware). Параметр `batch` — см. BatchingMixin.
+    """
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        self.configure_batching()
+        self.group = user_group(user.pk)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        self.stop_batching()
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def send_message(self, event):
+        await self.push(event['message'])
@@ -0,0 +1,98 @@
+"""
+Буфер событий WebSocket-лент в Redis.
+
+Каждое событие ленты (например, обновление места или бронирования) получает
+монотонный номер seq и сохраняется в поток Redis (XADD) с идентификатором `<seq>-0`.
+Поток ограничен REALTIME_EVENT_BUFFER последними событиями (MAXLEN ~).
+
+Это позволяет клиенту после переподключения запросить события, пропущенные с номера N
+(?since=N), вместо полной перезагрузки данных через REST. Если нужных событий в буфере
+уже нет, клиент получает снимок текущего состояния (см. realtime/consumers/mixins.py).
+
+Если Redis недоступен, события рассылаются без номера и в буфер не попадают.
+"""
+import json
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+# Исключения, при которых буфер считается недоступным
+# (NotImplementedError — кэш настроен не на Redis)
+STREAM_ERRORS = (RedisError, NotImplementedError)
+
+
+def _stream_key(feed):
+    return f'realtime:events:{feed}'
+
+
+def _seq_key(feed):
+    return f'realtime:events:{feed}:seq'
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def append_event(feed, message):
+    """
+    Присваивает событию следующий номер ленты и сохраняет его в буфер.
+
+    Номер и запись в поток изменяются в одной транзакции (WATCH/MULTI/EXEC),
+    поэтому порядок событий в потоке совпадает с порядком номеров.
+
+    Возвращает:
+        tuple[int | None, str]: Номер события (None, если Redis недоступен)
+        и текст сообщения в JSON с полем seq.
+    """
+    seq_key = _seq_key(feed)
+
+    def add(pipe):
+        seq = int(pipe.get(seq_key) or 0) + 1
+        text = json.dumps({**message, 'seq': seq})
+        pipe.multi()
+        pipe.set(seq_key, seq)
+        pipe.xadd(_stream_key(feed), {'message': text}, id=f'{seq}-0',
+                  maxlen=settings.REALTIME_EVENT_BUFFER, approximate=True)
+        return seq, text
+
+    try:
+        return _connection().transaction(add, seq_key, value_from_callable=True)
+    except STREAM_ERRORS:
+        return None, json.dumps(message)
+
+
+def current_seq(feed):
+    """
+    Возвращает номер последнего события ленты (0, если событий не было или Redis недоступен).
+    """
+    try:
+        return int(_connection().get(_seq_key(feed)) or 0)
+    except STREAM_ERRORS:
+        return 0
+
+
+def events_since(feed, seq):
+    """
+    Возвращает события ленты с номерами больше seq.
+
+    Возвращает:
+        list[tuple[int, str]] | None: Пары (номер, текст сообщения) по возрастанию номера
+        или None, если часть событий уже вытеснена из буфера, номер больше последнего
+        (например, после очистки Redis) или Redis недоступен.
+    """
+    try:
+        connection = _connection()
+        last = int(connection.get(_seq_key(feed)) or 0)
+        if seq > last:
+            return None
+        if seq == last:
+            return []
+        entries = connection.xrange(_stream_key(feed), min=f'({seq}-0')
+    except STREAM_ERRORS:
+        return None
+
+    events = [(int(entry_id.split(b'-')[0]), fields[b'message'].decode()) for entry_id, fields in entries]
+    # Первое событие после seq должно быть в буфере, иначе часть событий потеряна
+    if not events or events[0][0] != seq + 1:
+        return None
+    return events
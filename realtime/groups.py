@@ -0,0 +1,64 @@
+"""
+Группы channel layer для обновлений парковочных мест.
+
+Места разбиты на сегменты по PARKING_SPOT_GROUP_SIZE номеров (места 1–50 — группа
+parking_updates.0, 51–100 — parking_updates.1 и т.д.), и обновление места публикуется
+в группу его сегмента. Клиент, подписавшийся на диапазон номеров (?from=&to=), входит
+только в группы пересекающихся с диапазоном сегментов, поэтому обновления остальных
+мест до его процесса Daphne не доходят. Клиенты без фильтра остаются в общей группе
+parking_updates, куда публикуются все обновления.
+
+Кроме того, обновление места зоны (уровня, площадки) публикуется в группу зоны
+parking_updates.zone.<id>: клиент, подписавшийся на зону (?zone=<код>), получает
+обновления только её мест.
+
+Событие о наборе мест (массовая операция) публикуется целиком в каждую затронутую группу
+с одним номером ленты; подписчик нескольких групп принимает первую копию и отбрасывает
+остальные по номеру, а лишние места урезает по своему диапазону или зоне.
+
+Уведомления о бронированиях и оплатах пользователя публикуются в его группу user_<id>.
+"""
+from django.conf import settings
+
+PARKING_UPDATES_GROUP = 'parking_updates'
+
+
+def spot_shard(spot_number):
+    """
+    Возвращает номер сегмента, к которому относится место.
+    """
+    return (spot_number - 1) // settings.PARKING_SPOT_GROUP_SIZE
+
+
+def spot_group(spot_number):
+    """
+    Возвращает имя группы сегмента, к которому относится место.
+    """
+    return f'{PARKING_UPDATES_GROUP}.{spot_shard(spot_number)}'
+
+
+def spot_groups(spot_from, spot_to):
+    """
+    Возвращает имена групп сегментов, покрывающих диапазон номеров [spot_from, spot_to].
+
+    Если диапазон охватывает больше PARKING_SPOT_MAX_GROUPS сегментов, возвращается
+    общая группа: подписка на неё дешевле, чем на каждый сегмент по отдельности.
+    """
+    first, last = spot_shard(spot_from), spot_shard(spot_to)
+    if last - first + 1 > settings.PARKING_SPOT_MAX_GROUPS:
+        return [PARKING_UPDATES_GROUP]
+    return [f'{PARKING_UPDATES_GROUP}.{shard}' for shard in range(first, last + 1)]
+
+
+def zone_group(zone_id):
+    """
+    Возвращает имя группы зоны.
+    """
+    return f'{PARKING_UPDATES_GROUP}.zone.{zone_id}'
+
+
+def user_group(user_id):
+    """
+    Возвращает имя группы уведомлений пользователя.
+    """
+    return f'user_{user_id}'
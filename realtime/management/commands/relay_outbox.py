@@ -0,0 +1,29 @@
+import asyncio
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from realtime.outbox import relay, replay, retry_failed
+
+
+class Command(BaseCommand):
+    help = 'Рассылает события outbox обработчикам (channel layer и другие потребители), см. realtime/outbox.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help='Сколько событий читать за один проход')
+        parser.add_argument('--replay-from', type=int,
+                            help='Повторно разослать события начиная с этого id и завершиться')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Вернуть в очередь события, отложенные после OUTBOX_MAX_ATTEMPTS неудачных попыток, '
+                                 'и завершиться')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f'Возвращено в очередь событий: {retry_failed()}')
+            return
+
+        if options['replay_from'] is not None:
+            count = asyncio.run(replay(options['batch_size'], options['replay_from']))
+            self.stdout.write(f'Разослано событий: {count}')
+            return
+
+        asyncio.run(relay(options['batch_size'], settings.OUTBOX_POLL_INTERVAL, settings.OUTBOX_ERROR_DELAY))
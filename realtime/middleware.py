@@ -0,0 +1,41 @@
+from urllib.parse import parse_qs
+from channels.auth import AuthMiddlewareStack
+from channels.middleware import BaseMiddleware
+from api.authentication import aget_user_by_token
+
+
+def get_raw_token(scope):
+    """
+    Извлекает access-токен из параметра подключения `token`
+    или из заголовка Authorization: Bearer <token>.
+    Браузерный WebSocket не позволяет задать заголовки, поэтому поддерживаются оба способа.
+    """
+    query = parse_qs(scope['query_string'].decode())
+    if 'token' in query:
+        return query['token'][0]
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] == 'Bearer':
+                return parts[1]
+    return None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Аутентификация WebSocket-подключений по JWT (как в REST API, см. SIMPLE_JWT).
+
+    Если токен передан и действителен, scope['user'] — его пользователь.
+    Иначе остаётся пользователь сессии (AuthMiddlewareStack) или AnonymousUser.
+    """
+    async def __call__(self, scope, receive, send):
+        raw_token = get_raw_token(scope)
+        if raw_token is not None:
+            user = await aget_user_by_token(raw_token)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
+
+
+def JWTAuthMiddlewareStack(inner):
+    return AuthMiddlewareStack(JWTAuthMiddleware(inner))
@@ -0,0 +1,42 @@
+from django.db import models
+from django.db.models import Q
+
+
+class OutboxEvent(models.Model):
+    """
+    Событие предметной области в таблице outbox (transactional outbox).
+
+    Событие записывается в той же транзакции, что и изменение данных, поэтому
+    при откате транзакции оно исчезает вместе с изменением, а запись не зависит
+    от доступности Redis. Рассылку выполняет отдельный процесс relay_outbox
+    (см. realtime/outbox.py).
+
+    Атрибуты:
+        topic (str): Тип события, например 'booking.change'.
+        payload (dict): Данные события для обработчиков темы.
+        created_at (datetime): Время записи события.
+        published_at (datetime | None): Время рассылки; None — событие ещё не разослано.
+            Разосланные события хранятся OUTBOX_RETENTION и могут быть разосланы повторно.
+        attempts (int): Количество неудачных попыток рассылки.
+        failed_at (datetime | None): Время, когда событие отложено после OUTBOX_MAX_ATTEMPTS
+            неудачных попыток (dead letter); такие события relay больше не рассылает.
+        last_error (str): Ошибка последней неудачной попытки.
+    """
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Очередь неразосланных событий: relay читает её по возрастанию id
+            models.Index(fields=['id'], condition=Q(published_at__isnull=True, failed_at__isnull=True),
+                         name='outbox_pending_idx'),
+            models.Index(fields=['created_at'], name='outbox_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.topic} #{self.id}'
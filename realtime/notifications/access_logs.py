@@ -1,13 +1,13 @@
 import json
-from channels.layers import get_channel_layer
+from realtime.outbox import outbox_handler
+from realtime.publish import group_send
 
 
-async def notify_users_about_logs_change(access_log):
+def access_log_event(access_log):
     """
-    Отправляет уведомление через WebSocket о попытке доступа по QR.
+    Возвращает событие о попытке доступа по QR для outbox.
     """
-    channel_layer = get_channel_layer()
-    message = {
+    return {
         'data': {
             "id": access_log.id,
             "qr_data": access_log.qr_data,
@@ -15,10 +15,17 @@ async def notify_users_about_logs_change(access_log):
             "failure_reason": access_log.failure_reason,
             "failure_reason_display": access_log.get_failure_reason_display() if access_log.failure_reason else None,
             "time": access_log.time.isoformat(),
-            "booking": access_log.booking.id if access_log.booking else None
+            "booking": access_log.booking_id
         }
     }
-    await channel_layer.group_send(
+
+
+@outbox_handler('access_log.created')
+async def notify_users_about_logs_change(message):
+    """
+    Отправляет уведомление через WebSocket о попытке доступа по QR.
+    """
+    await group_send(
         "admin_access_logs",
         {
             "type": "send_message",
@@ -1,37 +1,116 @@
 import json
-from channels.layers import get_channel_layer
+from asgiref.sync import sync_to_async
+from realtime.events import append_event
+from realtime.groups import user_group
+from realtime.outbox import outbox_handler
+from realtime.publish import group_send
 
 
-async def notify_users_about_booking_change(booking, action):
+def booking_event_data(summary):
     """
-    Отправляет уведомление через WebSocket о создании или обновлении бронирования.
+    Возвращает данные бронирования для уведомления по строке витрины BookingSummary.
     """
-    channel_layer = get_channel_layer()
-
     data = {
-        "id": booking.id,
-        "status": booking.status,
-        "car_license_plate": booking.car.license_plate,
-        "user_email": booking.car.user.email,
-        "parking_place": booking.parking_place.spot_number,
-        "start_time": booking.start_time.isoformat(),
-        "end_time": booking.end_time.isoformat(),
-        "tariff_name": booking.tariff.name,
+        "id": summary.booking_id,
+        "status": summary.status,
+        "car_license_plate": summary.car_license_plate,
+        "user_email": summary.user_email,
+        "parking_place": summary.parking_place,
+        "start_time": summary.start_time.isoformat(),
+        "end_time": summary.end_time.isoformat(),
+        "tariff_name": summary.tariff_name,
     }
 
-    if hasattr(booking, 'payment'):
-        data["payment_amount"] = float(booking.payment.amount)
-        data["payment_date"] = booking.payment.payment_date.isoformat()
+    if summary.payment_date is not None:
+        data["payment_amount"] = float(summary.payment_amount)
+        data["payment_date"] = summary.payment_date.isoformat()
+    return data
 
-    message = {
-        'type': 'booking.change',
-        'action': action,
-        'data': data
+
+def booking_change_event(summary, action):
+    """
+    Возвращает событие о создании или обновлении бронирования для outbox.
+    Данные берутся из строки витрины BookingSummary, без обращения к связанным моделям.
+    """
+    return {
+        'user_id': summary.user_id,
+        'message': {
+            'type': 'booking.change',
+            'action': action,
+            'data': booking_event_data(summary)
+        },
     }
-    await channel_layer.group_send(
+
+
+@outbox_handler('booking.change')
+async def notify_users_about_booking_change(payload):
+    """
+    Отправляет уведомление через WebSocket о создании или обновлении бронирования.
+
+    Событие получает номер ленты admin_bookings (см. realtime/events.py)
+    и дублируется в группу владельца бронирования.
+    """
+    message = payload['message']
+    seq, text = await sync_to_async(append_event)("admin_bookings", message)
+    await group_send(
         "admin_bookings",
+        {
+            "type": "send_message",
+            "message": text,
+            "seq": seq,
+        }
+    )
+    await group_send(
+        user_group(payload['user_id']),
         {
             "type": "send_message",
             "message": json.dumps(message),
         }
     )
+
+
+def bookings_change_event(bookings, action):
+    """
+    Возвращает одно событие о массовом изменении статуса бронирований для outbox.
+
+    Аргументы:
+        bookings: Пары (id бронирования, id пользователя).
+        action: 'cancelled' или 'completed'.
+    """
+    users = {}
+    for booking_id, user_id in bookings:
+        users.setdefault(str(user_id), []).append(booking_id)
+    return {
+        'users': users,
+        'message': {
+            'type': 'bookings.change',
+            'action': action,
+            'ids': sorted(booking_id for booking_id, _ in bookings),
+        },
+    }
+
+
+@outbox_handler('bookings.change')
+async def notify_users_about_bookings_bulk_change(payload):
+    """
+    Отправляет одно уведомление администраторам о массовом изменении бронирований
+    и каждому владельцу — с его бронированиями.
+    """
+    message = payload['message']
+    seq, text = await sync_to_async(append_event)("admin_bookings", message)
+    await group_send(
+        "admin_bookings",
+        {
+            "type": "send_message",
+            "message": text,
+            "seq": seq,
+        }
+    )
+    for user_id, ids in payload['users'].items():
+        await group_send(
+            user_group(user_id),
+            {
+                "type": "send_message",
+                "message": json.dumps({**message, 'ids': ids}),
+            }
+        )
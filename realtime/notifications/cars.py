@@ -1,13 +1,13 @@
 import json
-from channels.layers import get_channel_layer
+from realtime.outbox import outbox_handler
+from realtime.publish import group_send
 
 
-async def notify_users_about_car_change(car, action):
+def car_change_event(car, action):
     """
-    Отправляет уведомление через WebSocket о создании или обновлении автомобиля.
+    Возвращает событие о создании или обновлении автомобиля для outbox.
     """
-    channel_layer = get_channel_layer()
-    message = {
+    return {
         'type': 'car.change',
         'action': action,
         'data': {
@@ -21,7 +21,14 @@ async def notify_users_about_car_change(car, action):
             'is_deleted': car.is_deleted,
         }
     }
-    await channel_layer.group_send(
+
+
+@outbox_handler('car.change')
+async def notify_users_about_car_change(message):
+    """
+    Отправляет уведомление через WebSocket о создании или обновлении автомобиля.
+    """
+    await group_send(
         "admin_cars",
         {
             "type": "send_message",
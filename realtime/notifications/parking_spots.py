@@ -1,21 +1,170 @@
-from channels.layers import get_channel_layer
-import json
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from parking_spots.models import ParkingZone
+from realtime.events import append_event
+from realtime.groups import PARKING_UPDATES_GROUP, spot_group, zone_group
+from realtime.outbox import outbox_handler
+from realtime.publish import group_send
 
 
-async def notify_users_about_parking_spots_change(spot):
+def spot_change_event(spot):
     """
-    Отправляет уведомление через WebSocket об изменении статуса места.
+    Возвращает событие об изменении статуса места для outbox.
+    Поле zone — id зоны места (None, если место не относится к зоне).
     """
-    channel_layer = get_channel_layer()
-    message = {
+    return {
         "spot_number": spot.spot_number,
-        "status": spot.status
+        "status": spot.status,
+        "zone": spot.zone_id,
     }
-    await channel_layer.group_send(
-        "parking_updates",
-        {
-            "type": "send_parking_update",
-            "message": json.dumps(message)
-        }
-    )
 
+
+@outbox_handler('spot.change')
+async def notify_users_about_parking_spots_change(message):
+    """
+    Отправляет уведомление через WebSocket об изменении статуса места:
+    в группу сегмента места, в группу его зоны и в общую группу (см. realtime.groups).
+    Событие получает номер ленты parking_spots (см. realtime/events.py).
+    """
+    seq, text = await sync_to_async(append_event)("parking_spots", message)
+    event = {
+        "type": "send_parking_update",
+        "message": text,
+        "seq": seq,
+    }
+    await group_send(spot_group(message["spot_number"]), event)
+    if message.get("zone") is not None:
+        await group_send(zone_group(message["zone"]), event)
+    await group_send(PARKING_UPDATES_GROUP, event)
+
+
+def _numbers_by_zone(spots):
+    zones = defaultdict(list)
+    for spot_number, zone_id in sorted(spots):
+        if zone_id is not None:
+            zones[str(zone_id)].append(spot_number)
+    return dict(zones)
+
+
+def spots_change_event(spots, status, previous_zones=None):
+    """
+    Возвращает одно событие об изменении статуса (или удалении, status='deleted')
+    набора мест для outbox. Используется массовыми операциями администратора.
+
+    Аргументы:
+        spots: Пары (номер места, id зоны или None).
+        status: Статус мест (новый или текущий, если изменилась только зона).
+        previous_zones: Для мест, перенесённых в другую зону, — пары (номер места, id прежней зоны или None).
+
+    Номера мест, относящихся к зонам, дополнительно перечисляются по зонам в поле zones,
+    номера перенесённых мест — по прежним зонам в поле previous_zones.
+    """
+    event = {
+        "type": "spots.change",
+        "status": status,
+        "spot_numbers": sorted(spot_number for spot_number, _ in spots),
+    }
+    zones = _numbers_by_zone(spots)
+    if zones:
+        event["zones"] = zones
+    previous = _numbers_by_zone(previous_zones or [])
+    if previous:
+        event["previous_zones"] = previous
+    return event
+
+
+def spot_event_in_range(data, spot_from, spot_to):
+    """
+    Возвращает событие ленты мест, ограниченное диапазоном номеров [spot_from, spot_to]:
+    для события о наборе мест — с номерами только из диапазона. Если в диапазон
+    не попало ни одно место, возвращает None; без диапазона возвращает событие как есть.
+    """
+    if spot_from is None:
+        return data
+    if "spot_numbers" not in data:
+        return data if spot_from <= data["spot_number"] <= spot_to else None
+    numbers = [number for number in data["spot_numbers"] if spot_from <= number <= spot_to]
+    if not numbers:
+        return None
+    if len(numbers) == len(data["spot_numbers"]):
+        return data
+    return {**data, "spot_numbers": numbers}
+
+
+def spot_event_in_zone(data, zone_id):
+    """
+    Возвращает событие ленты мест, ограниченное местами зоны, или None,
+    если событие не касается мест зоны. Без зоны возвращает событие как есть.
+
+    Места, перенесённые из зоны в другую, остаются в событии и перечисляются
+    в поле previous_zones — по нему клиент убирает их из зоны.
+    """
+    if zone_id is None:
+        return data
+    if "spot_numbers" not in data:
+        return data if data.get("zone") == zone_id else None
+    key = str(zone_id)
+    numbers = data.get("zones", {}).get(key, [])
+    moved_out = data.get("previous_zones", {}).get(key, [])
+    if not numbers and not moved_out:
+        return None
+    trimmed = {name: value for name, value in data.items() if name not in ("zones", "previous_zones")}
+    trimmed["spot_numbers"] = sorted(numbers + moved_out)
+    if moved_out:
+        trimmed["previous_zones"] = {key: moved_out}
+    return trimmed
+
+
+def filter_spot_event(data, spot_from=None, spot_to=None, zone_id=None):
+    """
+    Возвращает событие ленты мест, ограниченное зоной и диапазоном номеров подписки,
+    или None, если событие её не касается.
+    """
+    data = spot_event_in_zone(data, zone_id)
+    return None if data is None else spot_event_in_range(data, spot_from, spot_to)
+
+
+async def zone_id_by_code(code):
+    """
+    Возвращает id зоны по коду или None, если зоны нет.
+    """
+    return await ParkingZone.objects.filter(code=code).values_list('pk', flat=True).afirst()
+
+
+def spot_event_updates(data, zone_id=None):
+    """
+    Возвращает пары (номер места, статус) из события ленты мест.
+
+    Для подписчика зоны (zone_id) места, перенесённые из неё в другую зону
+    (previous_zones, см. spot_event_in_zone), получают статус 'deleted': в зоне их больше нет.
+    """
+    if "spot_numbers" not in data:
+        return [(data["spot_number"], data["status"])]
+    moved_out = set(data.get("previous_zones", {}).get(str(zone_id), ())) if zone_id is not None else set()
+    return [(number, "deleted" if number in moved_out else data["status"]) for number in data["spot_numbers"]]
+
+
+@outbox_handler('spots.change')
+async def notify_users_about_parking_spots_bulk_change(message):
+    """
+    Отправляет одно уведомление об изменении набора мест в группы сегментов и зон
+    (в том числе прежних зон перенесённых мест), которых оно касается, и в общую группу.
+    Событие получает один номер ленты parking_spots.
+
+    Во все группы уходит событие целиком: подписчик нескольких групп (например, диапазона
+    из двух сегментов) получает его несколько раз с одним номером и отбрасывает повторы,
+    поэтому каждая копия должна содержать все места. Лишние места отбрасывает
+    filter_spot_event на стороне подключения.
+    """
+    seq, text = await sync_to_async(append_event)("parking_spots", message)
+    groups = {spot_group(number) for number in message["spot_numbers"]}
+    groups |= {zone_group(zone_id) for zone_id in message.get("zones", {})}
+    groups |= {zone_group(zone_id) for zone_id in message.get("previous_zones", {})}
+    event = {
+        "type": "send_parking_update",
+        "message": text,
+        "seq": seq,
+    }
+    for group in sorted(groups):
+        await group_send(group, event)
+    await group_send(PARKING_UPDATES_GROUP, event)
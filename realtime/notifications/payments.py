@@ -1,28 +1,39 @@
 import json
-from channels.layers import get_channel_layer
+from realtime.groups import user_group
+from realtime.outbox import outbox_handler
+from realtime.publish import group_send
 
 
-async def notify_users_about_payment_change(payment):
+def payment_change_event(payment, summary):
+    """
+    Возвращает событие о создании оплаты для outbox.
+    Данные бронирования берутся из строки витрины BookingSummary.
+    """
+    return {
+        'user_id': summary.user_id,
+        'message': {
+            'type': 'payment.change',
+            'data': {
+                "id": payment.id,
+                "amount": float(payment.amount),
+                "payment_date": payment.payment_date.isoformat() if payment.payment_date else None,
+                "booking_id": summary.booking_id,
+                "user_email": summary.user_email,
+                "tariff_name": summary.tariff_name,
+            }
+        },
+    }
+
+
+@outbox_handler('payment.change')
+async def notify_users_about_payment_change(payload):
     """
     Отправляет уведомление через WebSocket о создании оплаты.
+    Уведомление получают администраторы и владелец бронирования.
     """
-    channel_layer = get_channel_layer()
-    message = {
-        'type': 'payment.change',
-        'data': {
-            "id": payment.id,
-            "amount": float(payment.amount),
-            "payment_date": payment.payment_date.isoformat() if payment.payment_date else None,
-            "booking_id": payment.booking.id,
-            "user_email": payment.booking.car.user.email,
-            "tariff_name": payment.booking.tariff.name,
-        }
+    event = {
+        "type": "send_message",
+        "message": json.dumps(payload['message']),
     }
-    await channel_layer.group_send(
-        "admin_payments",
-        {
-            "type": "send_message",
-            "message": json.dumps(message),
-        }
-    )
-    
\ No newline at end of file
+    await group_send("admin_payments", event)
+    await group_send(user_group(payload['user_id']), event)
@@ -1,13 +1,13 @@
 import json
-from channels.layers import get_channel_layer
+from realtime.outbox import outbox_handler
+from realtime.publish import group_send
 
 
-async def notify_users_about_user_change(user, action):
+def user_change_event(user, action):
     """
-    Отправляет уведомление через WebSocket о создании или обновлении пользователя.
+    Возвращает событие о создании или обновлении пользователя для outbox.
     """
-    channel_layer = get_channel_layer()
-    message = {
+    return {
         'type': 'user.change',
         'action': action,
         'data': {
@@ -20,7 +20,14 @@ async def notify_users_about_user_change(user, action):
             'is_staff': user.is_staff,
         }
     }
-    await channel_layer.group_send(
+
+
+@outbox_handler('user.change')
+async def notify_users_about_user_change(message):
+    """
+    Отправляет уведомление через WebSocket о создании или обновлении пользователя.
+    """
+    await group_send(
         "admin_users",
         {
             "type": "send_message",
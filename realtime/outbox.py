@@ -0,0 +1,187 @@
+"""
+Transactional outbox для событий предметной области.
+
+Сигналы и представления не отправляют уведомления сами, а записывают событие
+в таблицу OutboxEvent (enqueue) в той же транзакции, что и изменение данных.
+Запись стоит одного INSERT независимо от состояния Redis, а событие откаченной
+транзакции никуда не уходит.
+
+Django не объединяет save() и обработчики post_save в одну транзакцию, а ATOMIC_REQUESTS
+не включён (он несовместим с асинхронными представлениями и держал бы соединение
+PgBouncer на всё время запроса). Поэтому представления и задачи, изменяющие модели
+с событиями outbox, сами оборачивают запись в transaction.atomic().
+
+Процесс relay_outbox (management-команда, отдельный сервис docker-compose) читает
+неразосланные события пакетами по возрастанию id и передаёт каждое обработчикам
+его темы, после чего отмечает пакет разосланным. Обработчики регистрируются
+декоратором outbox_handler — сейчас это рассылка в channel layer
+(realtime/notifications), сюда же подключаются будущие потребители
+(агрегаты аналитики, кэши контроллеров въезда).
+
+Доставка «хотя бы один раз»: если обработчик упал, событие и следующие за ним
+остаются в очереди и рассылаются повторно на следующем проходе. Событие, рассылка
+которого не удалась OUTBOX_MAX_ATTEMPTS раз подряд, откладывается (failed_at, dead letter),
+чтобы не блокировать очередь; отложенные события возвращаются в очередь командой
+relay_outbox --retry-failed.
+Порядок событий — порядок id; событие транзакции, зафиксированной позже
+транзакции с большим id, может прийти после него.
+
+Разосланные события хранятся OUTBOX_RETENTION (задача purge_outbox) и могут быть
+разосланы повторно: relay_outbox --replay-from <id>.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# тема -> список асинхронных обработчиков payload
+HANDLERS = defaultdict(list)
+
+
+def outbox_handler(topic):
+    """
+    Регистрирует асинхронный обработчик событий темы.
+    """
+    def decorator(handler):
+        HANDLERS[topic].append(handler)
+        return handler
+
+    return decorator
+
+
+def enqueue(topic, payload):
+    """
+    Записывает событие в outbox. Вызывается в транзакции изменения данных (transaction.atomic()).
+    """
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def enqueue_many(events):
+    """
+    Записывает несколько событий одним INSERT.
+
+    Аргументы:
+        events: Пары (тема, payload).
+    """
+    return OutboxEvent.objects.bulk_create([OutboxEvent(topic=topic, payload=payload) for topic, payload in events])
+
+
+def _pending(limit, replay_from=None):
+    close_old_connections()
+    events = OutboxEvent.objects.order_by('id')
+    if replay_from is not None:
+        events = events.filter(id__gte=replay_from)
+    else:
+        events = events.filter(published_at__isnull=True, failed_at__isnull=True)
+    return list(events[:limit])
+
+
+def _mark_published(ids):
+    OutboxEvent.objects.filter(id__in=ids).update(published_at=timezone.now(), failed_at=None)
+
+
+def _record_failure(event, error):
+    """
+    Учитывает неудачную попытку рассылки события. После OUTBOX_MAX_ATTEMPTS попыток
+    событие откладывается (failed_at) и больше не рассылается.
+
+    Возвращает:
+        bool: True, если событие отложено.
+    """
+    event.attempts += 1
+    event.last_error = f'{type(error).__name__}: {error}'
+    if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        event.failed_at = timezone.now()
+    event.save(update_fields=['attempts', 'last_error', 'failed_at'])
+    return event.failed_at is not None
+
+
+def retry_failed():
+    """
+    Возвращает отложенные события в очередь рассылки.
+
+    Возвращает:
+        int: Количество возвращённых событий.
+    """
+    return OutboxEvent.objects.filter(published_at__isnull=True, failed_at__isnull=False).update(
+        failed_at=None, attempts=0
+    )
+
+
+async def publish(event):
+    """
+    Передаёт событие всем обработчикам его темы.
+    """
+    for handler in HANDLERS.get(event.topic, []):
+        await handler(event.payload)
+
+
+async def relay_batch(limit, replay_from=None):
+    """
+    Рассылает один пакет событий.
+
+    Если обработчик упал, попытка учитывается (кроме повторной рассылки replay_from) и ошибка
+    пробрасывается: пакет прерывается, и событие рассылается повторно на следующем проходе.
+    Событие, исчерпавшее OUTBOX_MAX_ATTEMPTS попыток, откладывается, и рассылка
+    продолжается со следующего.
+
+    Возвращает:
+        tuple[int, int | None]: Количество обработанных (разосланных и отложенных) событий
+            и id последнего из них.
+    """
+    events = await sync_to_async(_pending)(limit, replay_from)
+    published = []
+    processed = 0
+    try:
+        for event in events:
+            try:
+                await publish(event)
+            except Exception as e:
+                if replay_from is not None or not await sync_to_async(_record_failure)(event, e):
+                    raise
+                logger.exception('Событие outbox %s отложено после %s неудачных попыток', event, event.attempts)
+            else:
+                published.append(event.id)
+            processed += 1
+    finally:
+        if published:
+            await sync_to_async(_mark_published)(published)
+    return processed, events[processed - 1].id if processed else None
+
+
+async def relay(batch_size, poll_interval, error_delay):
+    """
+    Бесконечно рассылает события outbox. Если очередь пуста, ждёт poll_interval секунд,
+    при ошибке обработчика — error_delay секунд и повторяет с того же события.
+    """
+    while True:
+        try:
+            count, _ = await relay_batch(batch_size)
+        except Exception:
+            logger.exception('Ошибка рассылки событий outbox')
+            await asyncio.sleep(error_delay)
+            continue
+        if count < batch_size:
+            await asyncio.sleep(poll_interval)
+
+
+async def replay(batch_size, replay_from):
+    """
+    Повторно рассылает все события начиная с id replay_from (в том числе уже разосланные).
+
+    Возвращает:
+        int: Количество разосланных событий.
+    """
+    total = 0
+    while True:
+        count, last_id = await relay_batch(batch_size, replay_from)
+        total += count
+        if count < batch_size:
+            return total
+        replay_from = last_id + 1
@@ -0,0 +1,15 @@
+import time
+from channels.layers import get_channel_layer
+from config.metrics import record_publish
+
+
+async def group_send(group, message):
+    """
+    Отправляет сообщение в группу channel layer.
+
+    Время отправки учитывается в метриках текущего HTTP-запроса,
+    если он попал в выборку (см. config.metrics).
+    """
+    started = time.perf_counter()
+    await get_channel_layer().group_send(group, message)
+    record_publish(time.perf_counter() - started)
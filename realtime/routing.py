@@ -5,6 +5,7 @@ from .consumers.bookings import AdminBookingConsumer
 from .consumers.payments import AdminPaymentConsumer
 from .consumers.parking_spots import ParkingSpotConsumer
 from .consumers.access_logs import AdminAccessLogConsumer
+from .consumers.user_bookings import UserBookingConsumer
 
 
 websocket_urlpatterns = [
@@ -14,4 +15,5 @@ websocket_urlpatterns = [
     re_path(r'ws/admin/bookings$', AdminBookingConsumer.as_asgi()),
     re_path(r'ws/admin/payments$', AdminPaymentConsumer.as_asgi()),
     re_path(r'ws/admin/access-logs$', AdminAccessLogConsumer.as_asgi()),
+    re_path(r'ws/user/bookings$', UserBookingConsumer.as_asgi()),
 ]
@@ -0,0 +1,28 @@
+"""
+Снимки текущего состояния WebSocket- и SSE-лент (см. SnapshotDeltaMixin и realtime.sse).
+Функции синхронные — из асинхронного кода их вызывают через database_sync_to_async.
+"""
+from bookings.models import BookingSummary
+from parking_spots.models import ParkingSpot
+from realtime.notifications.bookings import booking_event_data
+
+
+def spots_snapshot(spot_from=None, spot_to=None, zone_id=None):
+    """
+    Возвращает пары [номер места, статус] по возрастанию номера,
+    при заданном диапазоне или зоне — только для мест из них.
+    """
+    spots = ParkingSpot.objects.order_by('spot_number')
+    if spot_from is not None:
+        spots = spots.filter(spot_number__gte=spot_from, spot_number__lte=spot_to)
+    if zone_id is not None:
+        spots = spots.filter(zone_id=zone_id)
+    return {'spots': [list(row) for row in spots.values_list('spot_number', 'status')]}
+
+
+def bookings_snapshot():
+    """
+    Возвращает активные бронирования в формате событий booking.change.
+    """
+    summaries = BookingSummary.objects.filter(status='active').order_by('booking_id')
+    return {'bookings': [booking_event_data(summary) for summary in summaries]}
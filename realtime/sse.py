@@ -0,0 +1,243 @@
+"""
+Server-Sent Events — резервный транспорт для клиентов, у которых WebSocket
+не проходит через прокси (например, табло в корпоративных сетях).
+
+SSE-потоки подписываются на те же группы channel layer, что и WebSocket-потребители,
+и передают те же события (поле data — JSON события):
+- GET /realtime/sse/parking-spots — обновления мест (параметры from/to и zone как у ws/parking_spots);
+- GET /realtime/sse/admin/<лента> — ленты администратора (users, cars, bookings,
+  payments, access-logs), требуют JWT администратора;
+- GET /realtime/sse/user/bookings — бронирования и оплаты пользователя, требует JWT.
+
+Токен передаётся в заголовке Authorization: Bearer <token> или параметром `token`
+(EventSource в браузере не позволяет задать заголовки).
+
+Для лент с номерами событий (parking-spots, admin/bookings, см. realtime/events.py)
+номер передаётся в поле id. После переподключения EventSource сам отправляет
+заголовок Last-Event-ID, и сервер досылает пропущенные события из буфера, а если их
+там уже нет — снимок (событие snapshot). Снимок можно запросить и явно параметром snapshot=1.
+
+Раз в REALTIME_SSE_HEARTBEAT секунд отправляется комментарий, чтобы прокси
+не закрывали простаивающее соединение. Поток завершается через REALTIME_SSE_MAX_AGE
+секунд — клиент переподключается и продолжает с последнего события. Это ограничивает
+время жизни потоков, клиенты которых отключились незаметно для сервера.
+"""
+import asyncio
+import json
+import time
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from api.async_views import api_json_response
+from api.authentication import aauthenticate, aget_user_by_token
+from .events import current_seq, events_since
+from .groups import PARKING_UPDATES_GROUP, spot_groups, user_group, zone_group
+from .notifications.parking_spots import filter_spot_event, zone_id_by_code
+from .snapshots import bookings_snapshot, spots_snapshot
+
+ADMIN_FEEDS = {
+    'users': 'admin_users',
+    'cars': 'admin_cars',
+    'bookings': 'admin_bookings',
+    'payments': 'admin_payments',
+    'access-logs': 'admin_access_logs',
+}
+
+
+def sse_frame(data, event=None, event_id=None):
+    """
+    Формирует кадр SSE. data — текст (JSON), может содержать переводы строк.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _request_user(request):
+    user = await aauthenticate(request)
+    if user is None and 'token' in request.GET:
+        user = await aget_user_by_token(request.GET['token'])
+    return user
+
+
+def _int_param(value):
+    return int(value) if value not in (None, '') else None
+
+
+class EventStream:
+    """
+    Поток событий групп channel layer для одного SSE-клиента.
+
+    Аргументы:
+        groups: Группы, на которые подписывается поток.
+        feed: Лента с номерами событий (realtime/events.py) или None.
+        since: Номер последнего полученного клиентом события (Last-Event-ID).
+        snapshot: Функция без аргументов, возвращающая снимок ленты, или None.
+        send_snapshot: Отправить снимок сразу, без since.
+        filter_event: Функция, возвращающая событие для клиента (возможно, урезанное)
+            или None, если событие клиенту не нужно (см. SnapshotDeltaMixin.filter_event).
+    """
+    def __init__(self, groups, feed=None, since=None, snapshot=None, send_snapshot=False, filter_event=None):
+        self.groups = groups
+        self.feed = feed
+        self.since = since
+        self.snapshot = snapshot
+        self.send_snapshot = send_snapshot
+        self.filter_event = filter_event or (lambda data: data)
+        self.last_seq = 0
+
+    def event_frame(self, seq, message):
+        if seq is not None:
+            if seq <= self.last_seq:
+                return None
+            self.last_seq = seq
+        data = json.loads(message)
+        filtered = self.filter_event(data)
+        if filtered is None:
+            return None
+        if filtered is not data:
+            message = json.dumps(filtered)
+        return sse_frame(message, event_id=seq)
+
+    async def initial_frames(self):
+        """
+        Кадры, отправляемые сразу после подписки: пропущенные события или снимок.
+        """
+        if self.feed is None:
+            return []
+        if self.since is not None:
+            events = await sync_to_async(events_since)(self.feed, self.since)
+            if events is not None:
+                self.last_seq = self.since
+                return [frame for frame in (self.event_frame(seq, message) for seq, message in events) if frame]
+        elif not self.send_snapshot:
+            return []
+        if self.snapshot is None:
+            return []
+        seq = await sync_to_async(current_seq)(self.feed)
+        data = await database_sync_to_async(self.snapshot)()
+        self.last_seq = seq
+        return [sse_frame(json.dumps({'seq': seq, **data}), event='snapshot', event_id=seq)]
+
+    async def __aiter__(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        for group in self.groups:
+            await layer.group_add(group, channel)
+        try:
+            yield f'retry: {settings.REALTIME_SSE_RETRY_MS}\n\n'
+            for frame in await self.initial_frames():
+                yield frame
+
+            deadline = time.monotonic() + settings.REALTIME_SSE_MAX_AGE
+            while time.monotonic() < deadline:
+                try:
+                    event = await asyncio.wait_for(layer.receive(channel), settings.REALTIME_SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': heartbeat\n\n'
+                    continue
+                frame = self.event_frame(event.get('seq'), event['message'])
+                if frame is not None:
+                    yield frame
+        finally:
+            for group in self.groups:
+                await layer.group_discard(group, channel)
+
+
+def event_stream_response(stream):
+    response = StreamingHttpResponse(stream.__aiter__(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Отключает буферизацию ответа в nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _last_event_id(request):
+    return _int_param(request.headers.get('Last-Event-ID') or request.GET.get('since'))
+
+
+async def parking_spots_sse(request):
+    """
+    SSE-аналог ws/parking_spots: обновления статусов мест.
+
+    Параметры запроса: from, to — диапазон номеров мест; zone — код зоны; snapshot=1 — начать со снимка;
+    since — номер последнего события (вместо заголовка Last-Event-ID).
+    Места, перенесённые из зоны в другую, перечисляются в поле previous_zones события:
+    клиент зоны убирает их, как удалённые.
+    """
+    try:
+        spot_from = _int_param(request.GET.get('from'))
+        spot_to = _int_param(request.GET.get('to'))
+        since = _last_event_id(request)
+    except ValueError:
+        return api_json_response({"error": "Параметры from, to и since должны быть целыми числами."}, status=400)
+
+    if (spot_from is None) != (spot_to is None) or (spot_from is not None and spot_from > spot_to):
+        return api_json_response({"error": "Укажите оба параметра from и to, from не больше to."}, status=400)
+    zone_id = None
+    if 'zone' in request.GET:
+        zone_id = await zone_id_by_code(request.GET['zone'])
+        if zone_id is None:
+            return api_json_response({"error": "Зона не найдена."}, status=404)
+
+    if zone_id is not None:
+        groups = [zone_group(zone_id)]
+    elif spot_from is None:
+        groups = [PARKING_UPDATES_GROUP]
+    else:
+        groups = spot_groups(spot_from, spot_to)
+
+    return event_stream_response(EventStream(
+        groups,
+        feed='parking_spots',
+        since=since,
+        snapshot=lambda: spots_snapshot(spot_from, spot_to, zone_id),
+        send_snapshot=request.GET.get('snapshot') in ('1', 'true'),
+        filter_event=lambda data: filter_spot_event(data, spot_from, spot_to, zone_id),
+    ))
+
+
+async def admin_feed_sse(request, feed):
+    """
+    SSE-аналог ws/admin/<лента>. Для ленты bookings поддерживаются snapshot=1 и Last-Event-ID.
+    """
+    if feed not in ADMIN_FEEDS:
+        return api_json_response({"error": "Лента не найдена."}, status=404)
+    user = await _request_user(request)
+    if user is None:
+        return api_json_response({"detail": str(NotAuthenticated.default_detail)}, status=401)
+    if not user.is_staff:
+        return api_json_response({"detail": str(PermissionDenied.default_detail)}, status=403)
+    try:
+        since = _last_event_id(request)
+    except ValueError:
+        return api_json_response({"error": "Параметр since должен быть целым числом."}, status=400)
+
+    if feed == 'bookings':
+        stream = EventStream(
+            [ADMIN_FEEDS[feed]],
+            feed='admin_bookings',
+            since=since,
+            snapshot=bookings_snapshot,
+            send_snapshot=request.GET.get('snapshot') in ('1', 'true'),
+        )
+    else:
+        stream = EventStream([ADMIN_FEEDS[feed]])
+    return event_stream_response(stream)
+
+
+async def user_bookings_sse(request):
+    """
+    SSE-аналог ws/user/bookings: изменения бронирований и оплат текущего пользователя.
+    """
+    user = await _request_user(request)
+    if user is None:
+        return api_json_response({"detail": str(NotAuthenticated.default_detail)}, status=401)
+    return event_stream_response(EventStream([user_group(user.pk)]))
@@ -0,0 +1,18 @@
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from config.task_metrics import record_rows
+from .models import OutboxEvent
+
+
+@shared_task(expires=3600)
+def purge_outbox():
+    """
+    Удаляет разосланные события outbox старше OUTBOX_RETENTION.
+    Отложенные (failed_at) события не удаляются.
+    """
+    deleted, _ = OutboxEvent.objects.filter(
+        published_at__isnull=False, created_at__lt=timezone.now() - settings.OUTBOX_RETENTION
+    ).delete()
+    record_rows(deleted)
+    return deleted
@@ -0,0 +1,8 @@
+from django.urls import path
+from .sse import parking_spots_sse, admin_feed_sse, user_bookings_sse
+
+urlpatterns = [
+    path('sse/parking-spots', parking_spots_sse, name='sse-parking-spots'),
+    path('sse/admin/<str:feed>', admin_feed_sse, name='sse-admin-feed'),
+    path('sse/user/bookings', user_bookings_sse, name='sse-user-bookings'),
+]
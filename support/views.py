@@ -26,7 +26,7 @@ class SupportRequestListCreateAPIView(APIView):
 
     def get(self, request):
         user = request.user
-        requests = SupportRequest.objects.filter(user=user).order_by('-created_at')
+        requests = SupportRequest.objects.filter(user=user).select_related('user').order_by('-created_at')
         serializer = SupportRequestSerializer(requests, many=True)
         return Response(serializer.data)
 
@@ -48,7 +48,7 @@ class SupportRequestDetailAPIView(APIView):
         support_request = get_object_or_404(SupportRequest, pk=request_id)
         if not request.user.is_staff and support_request.user != request.user:
             return Response({'detail': 'Нет доступа'}, status=status.HTTP_403_FORBIDDEN)
-        serializer = SupportReplySerializer(support_request.replies, many=True)
+        serializer = SupportReplySerializer(support_request.replies.select_related('admin'), many=True)
         return Response(serializer.data)
 
 
@@ -62,7 +62,7 @@ class SupportRequestListView(ListAPIView):
     """
     API для получения списка обращений администратором.
     """
-    queryset = SupportRequest.objects.all().order_by('-created_at')
+    queryset = SupportRequest.objects.select_related('user').order_by('-created_at')
     serializer_class = SupportRequestSerializer
     permission_classes = [IsAuthenticated, IsAdminPermission]
     pagination_class = AdminRequestsPagination
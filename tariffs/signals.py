@@ -0,0 +1,16 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from .models import Tariff
+
+ACTIVE_TARIFFS_CACHE_KEY = 'tariffs:active'
+
+
+@receiver(post_save, sender=Tariff)
+@receiver(post_delete, sender=Tariff)
+def tariff_change_handler(**kwargs):
+    """
+    Сбрасывает кэш списка активных тарифов после фиксации транзакции.
+    """
+    transaction.on_commit(lambda: cache.delete(ACTIVE_TARIFFS_CACHE_KEY))
@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import TariffsListView, TariffView, TariffUpdateView, TariffPriceHistoryListView
+from api.async_views import async_api_view
+from .views import TariffsListView, TariffView, TariffUpdateView, TariffPriceHistoryListView, tariff_list_async
 
 
 urlpatterns = [
-    path('user/', TariffsListView.as_view(), name='tariff-list'),
+    path('user/', async_api_view(TariffsListView.as_view(), get=tariff_list_async), name='tariff-list'),
     path('admin/', TariffView.as_view(), name='admin-tariff-list-create'),
     path('admin/price-history/', TariffPriceHistoryListView.as_view(), name='price-history'),
     path('admin/<int:tariff_id>/', TariffUpdateView.as_view(), name='admin-tariff-update'),
@@ -1,11 +1,14 @@
+from django.core.cache import cache
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from api.permissions import IsAdminPermission
+from api.async_views import api_json_response, async_login_required
 from .models import Tariff, TariffPriceHistory
 from .serializers import TariffSerializer, AdminTariffSerializer, UpdateTariffSerializer, TariffPriceHistorySerializer
+from .signals import ACTIVE_TARIFFS_CACHE_KEY
 
 
 class TariffsListView(ListAPIView):
@@ -19,6 +22,21 @@ class TariffsListView(ListAPIView):
     permission_classes = [IsAuthenticated]
 
 
+@async_login_required
+async def tariff_list_async(request):
+    """
+    Асинхронная версия TariffsListView.
+
+    Список активных тарифов кэшируется в Redis и сбрасывается при изменении любого тарифа.
+    """
+    data = await cache.aget(ACTIVE_TARIFFS_CACHE_KEY)
+    if data is None:
+        tariffs = [tariff async for tariff in Tariff.objects.filter(is_active=True).order_by('duration_minutes')]
+        data = TariffSerializer(tariffs, many=True).data
+        await cache.aset(ACTIVE_TARIFFS_CACHE_KEY, data, timeout=None)
+    return api_json_response(data)
+
+
 class TariffView(APIView):
     """
     Представление для управления тарифами администратором.
@@ -80,6 +98,6 @@ class TariffPriceHistoryListView(ListAPIView):
     """
     Представление для получения истории обновления цен тарифов.
     """
-    queryset = TariffPriceHistory.objects.all().order_by('-id')
+    queryset = TariffPriceHistory.objects.select_related('tariff', 'changed_by').order_by('-id')
     serializer_class = TariffPriceHistorySerializer
     permission_classes = [IsAuthenticated, IsAdminPermission]